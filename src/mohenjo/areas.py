@@ -0,0 +1,503 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .registry import (LANDMARKS, FeatureCategory, Landmark, LandmarkCategory, LandmarkRegistry,
+                       ProceduralFeature, category_table)
+from .generators import House, Street, ZONE_GENERATORS, generate_street_network
+from .spatial import BBox, GridIndex, bbox_intersects, bbox_of_points
+from .consolidate import merge_pair
+from .raster import (AreaCanvas, Tile, LEVEL_STREET, DPI, SCALE_RATIO,
+                     split_tiles_horizontal, split_tiles_vertical)
+from .formats import DEFAULT_PROFILE, PROFILES, OutputProfile
+from .output import save_images, save_pyramid
+from .heights import (Calibration, LegacyLevels, height_code, DEFAULT_BUILDING_HEIGHT_M,
+                      GROUND_HEIGHT_M, STREET_HEIGHT_M)
+
+@dataclass
+class ZonePlan:
+    """Candidate shapes for one zone, in zone-local coordinates (Y grows down from the top edge)."""
+    zone: Landmark
+    houses: List[House]
+    paired: bool            # Rich zones: [Wall, Courtyard, ...], collided on the wall only
+    house_prefix: str       # Feature id prefix, index appended
+    house_description: str  # Category appended in brackets
+    streets: List[Street] = field(default_factory=list)
+    street_prefix: str = ""
+    street_description: str = ""
+
+    @property
+    def origin(self) -> Tuple[float, float]:
+        """Global position of the zone's top-left corner."""
+        return (self.zone.abs_x - self.zone.dimensions.width / 2,
+                self.zone.abs_y + self.zone.dimensions.length / 2)
+
+    def to_global(self, points) -> List[Tuple[float, float]]:
+        tl_x, tl_y = self.origin
+        return [(tl_x + lx, tl_y - ly) for (lx, ly) in points]
+
+@dataclass
+class Rejection:
+    """A candidate house dropped by the collision check, and what it hit first."""
+    zone_id: str
+    house_id: str
+    obstacle_id: str
+    reason: str  # Obstacle kind: a LandmarkCategory name, or GENERATED_STREET
+
+GENERATED_STREET = "generated_street"
+
+def landmark_box(lm: Landmark) -> BBox:
+    return lm.get_bounds()
+
+class PrintArea:
+    """One printable Lower City area: procedural generation, persistence and rasterization.
+
+    Subclasses describe which zones they fill, what counts as an obstacle and
+    how features map to laser levels. Generation and rasterization can be
+    limited to dirty boxes so a single moved landmark does not mean
+    regenerating the whole area (see mohenjo.incremental).
+    """
+    area_id = ""
+    prefix = ""             # Output filename prefix, e.g. "vs_area_print"
+    padding_m = 10.0
+    level_street = LEVEL_STREET  # Street gray of the default (legacy) calibration
+    # Height above the area datum per FeatureCategory
+    category_heights = category_table(DEFAULT_BUILDING_HEIGHT_M, {
+        FeatureCategory.STREET: STREET_HEIGHT_M,
+        FeatureCategory.COURTYARD: GROUND_HEIGHT_M,
+    })
+    # Generator keyword arguments per zone kind (see generators.ZONE_GENERATORS).
+    # House 12m, Gap 2m = Stride 14m. Guarantees clearance and packs more rows.
+    generator_defaults: Dict[str, dict] = {"rich": {"house_size": 12.0, "gap": 2.0}}
+
+    def __init__(self):
+        # Generated candidates per (zone id, width, length); generators are seeded so
+        # these only change when a zone is resized. Keeps long-running watchers hot.
+        self._candidates: Dict[tuple, tuple] = {}
+        # Optional mohenjo.terrain.Terrain painted under everything instead of flat ground
+        self.terrain = None
+        # Height -> gray mapping (mohenjo.heights); None keeps the original three levels
+        self.calibration: Optional[Calibration] = None
+        # Overrides for parameter sweeps: generator kwargs per kind, generator kind per zone id
+        self.generator_params: Dict[str, dict] = {}
+        self.zone_generators: Dict[str, str] = {}
+
+    def cached_candidates(self, zone: Landmark, make, extra=()):
+        key = (zone.id, zone.dimensions.width, zone.dimensions.length) + tuple(extra)
+        if key not in self._candidates:
+            self._candidates[key] = make()
+        return self._candidates[key]
+
+    def zone_kind(self, zone: Landmark, default: Optional[str]) -> Optional[str]:
+        return self.zone_generators.get(zone.id, default)
+
+    def zone_houses(self, zone: Landmark, kind: str) -> List[House]:
+        """Seeded candidates of the `kind` generator for a zone (defaults, then overrides)."""
+        params = dict(self.generator_defaults.get(kind, {}), **self.generator_params.get(kind, {}))
+        w, l = zone.dimensions.width, zone.dimensions.length
+        return self.cached_candidates(zone, lambda: ZONE_GENERATORS[kind](w, l, **params),
+                                      (kind,) + tuple(sorted(params.items())))
+
+    def area(self, registry: LandmarkRegistry) -> Optional[Landmark]:
+        return registry.landmarks.get(self.area_id)
+
+    # --- Generation ---
+
+    def zone_plans(self, registry: LandmarkRegistry) -> List[ZonePlan]:
+        raise NotImplementedError
+
+    def obstacles(self, registry: LandmarkRegistry) -> List[Landmark]:
+        raise NotImplementedError
+
+    def zone_ids(self, registry: LandmarkRegistry) -> Set[str]:
+        return {plan.zone.id for plan in self.zone_plans(registry)}
+
+    def owns(self, pf: ProceduralFeature, zone_ids: Set[str]) -> bool:
+        """True if a persisted feature was produced by this area."""
+        return pf.parent_id in zone_ids
+
+    def obstacle_index(self, registry: LandmarkRegistry) -> GridIndex:
+        index = GridIndex()
+        for lm in self.obstacles(registry):
+            index.insert(lm.id, landmark_box(lm))
+        return index
+
+    def generate(self, registry: LandmarkRegistry, dirty: Optional[List[BBox]] = None,
+                 verbose: bool = True,
+                 plans: Optional[List[ZonePlan]] = None,
+                 rejected: Optional[List[Rejection]] = None) -> Tuple[List[ProceduralFeature], Set[str]]:
+        """Places streets and houses, rejecting houses that hit an obstacle.
+
+        If `dirty` is given, only houses whose bounds touch one of the boxes
+        are collided and returned (streets are cheap and always returned).
+        The second return value holds every house id that was (re)considered,
+        valid or not. `plans` limits generation to some zone plans. A
+        `rejected` list gets a Rejection per dropped house (a rich pair once).
+        """
+        index = self.obstacle_index(registry)
+        features = []
+        considered = set()
+
+        for plan in self.zone_plans(registry) if plans is None else plans:
+            zone = plan.zone
+            if verbose:
+                print(f"  - Processing Zone: {zone.name} ({zone.id})")
+
+            # Streets are obstacles for every later house, so they are always placed
+            for i, s in enumerate(plan.streets):
+                global_points = plan.to_global(s.points)
+                pf = ProceduralFeature(
+                    id=f"{plan.street_prefix}_{i}",
+                    parent_id=zone.id,
+                    shape="POLYGON",
+                    geometry={'points': global_points},
+                    description=plan.street_description,
+                    category=FeatureCategory.STREET
+                )
+                index.insert(pf.id, bbox_of_points(global_points))
+                features.append(pf)
+            if plan.streets and verbose:
+                print(f"    - Generated {len(plan.streets)} street segments.")
+
+            houses = plan.houses
+            step = 2 if plan.paired else 1
+            valid = 0
+            for i in range(0, len(houses), step):
+                group = houses[i:i + step]
+                if len(group) < step:
+                    break
+
+                # Paired houses are validated on the wall (first) only
+                group_points = [plan.to_global(h.points) for h in group]
+                box = bbox_of_points(group_points[0])
+                if dirty is not None and not any(bbox_intersects(box, d) for d in dirty):
+                    continue
+
+                ids = [f"{plan.house_prefix}_{i + k}" for k in range(len(group))]
+                considered.update(ids)
+                if index.collides(box):
+                    if rejected is not None:
+                        rejected.append(self._rejection(registry, zone, ids[0], index.query(box)[0]))
+                    continue
+
+                group_features = [ProceduralFeature(
+                    id=pf_id,
+                    parent_id=zone.id,
+                    shape="POLYGON",
+                    geometry={'points': points},
+                    description=f"{plan.house_description} ({h.category})",
+                    category=FeatureCategory[h.category]
+                ) for pf_id, h, points in zip(ids, group, group_points)]
+                if plan.paired:
+                    # Wall with the courtyard as a hole (see mohenjo.consolidate)
+                    group_features = [merge_pair(*group_features)]
+                features.extend(group_features)
+                valid += len(group)
+
+            if verbose:
+                print(f"    - Valid shapes after collision check: {valid} of {len(houses)}")
+
+        return features, considered
+
+    def _rejection(self, registry: LandmarkRegistry, zone: Landmark, house_id: str, obstacle_id: str) -> Rejection:
+        lm = registry.landmarks.get(obstacle_id)
+        return Rejection(zone.id, house_id, obstacle_id, lm.category.name.lower() if lm else GENERATED_STREET)
+
+    def canonical_ids(self, registry: LandmarkRegistry) -> List[str]:
+        """Every id generate() can produce, in generation order."""
+        ids = []
+        for plan in self.zone_plans(registry):
+            ids.extend(f"{plan.street_prefix}_{i}" for i in range(len(plan.streets)))
+            ids.extend(f"{plan.house_prefix}_{i}" for i in range(len(plan.houses)))
+        return ids
+
+    def merge(self, registry: LandmarkRegistry, existing: List[ProceduralFeature],
+              new_features: List[ProceduralFeature]) -> List[ProceduralFeature]:
+        """Replaces this area's features in a full feature list, keeping everything else."""
+        zone_ids = self.zone_ids(registry)
+        preserved = [f for f in existing if not self.owns(f, zone_ids)]
+        preserved.extend(new_features)
+        return preserved
+
+    def own_features(self, registry: LandmarkRegistry,
+                     features: List[ProceduralFeature]) -> List[ProceduralFeature]:
+        zone_ids = self.zone_ids(registry)
+        return [f for f in features if self.owns(f, zone_ids)]
+
+    # --- Rasterization ---
+
+    def canvas(self, registry: LandmarkRegistry, dpi: int = DPI) -> AreaCanvas:
+        area = self.area(registry)
+        return AreaCanvas(area.abs_x, area.abs_y, area.dimensions.width, area.dimensions.length,
+                          padding_m=self.padding_m, dpi=dpi)
+
+    def tiles(self, canvas: AreaCanvas) -> List[Tile]:
+        return split_tiles_vertical(canvas, self.prefix)
+
+    def levels(self) -> Calibration:
+        return self.calibration or LegacyLevels(street=self.level_street)
+
+    def feature_height(self, pf: ProceduralFeature) -> float:
+        """Height above the area datum in metres."""
+        return self.category_heights[pf.category]
+
+    def draw_underlay(self, registry: LandmarkRegistry, region):
+        pass
+
+    def draw_overlay(self, registry: LandmarkRegistry, region):
+        pass
+
+    def rasterize(self, registry: LandmarkRegistry, features: List[ProceduralFeature],
+                  canvas: AreaCanvas, box=None, bits: int = 8):
+        """Renders the area (or one pixel box of it) from persisted features and landmarks.
+
+        bits=16 returns a 16-bit (I;16) image with the calibration's unrounded grays.
+        """
+        if box is not None:
+            # Draw the box's rows at full width and crop. PIL computes polygon edges in
+            # float32: shifting the origin in x can move an edge pixel, shifting in y cannot.
+            image = self._rasterize_box(registry, features, canvas, (0, box[1], canvas.img_w, box[3]), bits,
+                                        columns=box[::2])
+            return image.crop((box[0], 0, box[2], box[3] - box[1]))
+        return self._rasterize_box(registry, features, canvas, None, bits)
+
+    def rasterize_spans(self, registry: LandmarkRegistry, features: List[ProceduralFeature],
+                        canvas: AreaCanvas, box=None, bits: int = 8) -> 'SpanRaster':
+        """rasterize() as runs of equal gray per row (mohenjo.spans, needs numpy).
+
+        Drawn SPAN_BAND_ROWS rows at a time, so memory is one band plus the
+        runs however large the canvas. Bands span the full width: PIL's
+        polygon edges then only move in y, which does not change their
+        rounding, so the pixels are those of the full render (and a box is
+        exactly its crop).
+        """
+        import numpy as np
+        from .spans import SPAN_BAND_ROWS, SpanRaster
+        box = box or canvas.full_box
+        levels = self.levels()
+        lut = levels.lut16() if bits == 16 else levels.lut()
+        spans = SpanRaster(box[2] - box[0], box[3] - box[1], lut[height_code(GROUND_HEIGHT_M)],
+                           np.uint16 if bits == 16 else np.uint8)
+        index = self._feature_index(features)
+        for top in range(box[1], box[3], SPAN_BAND_ROWS):
+            region = canvas.region((0, top, canvas.img_w, min(box[3], top + SPAN_BAND_ROWS)),
+                                   fill=height_code(GROUND_HEIGHT_M))
+            self._draw_region(registry, index, region, box[::2])
+            spans.set_rows(top - box[1], np.asarray(region.image), box[0], lut)
+        return spans
+
+    def _rasterize_box(self, registry, features, canvas, box, bits=8, columns=None):
+        region = canvas.region(box, fill=height_code(GROUND_HEIGHT_M))
+        self._draw_region(registry, self._feature_index(features), region, columns)
+        # Heights were drawn as codes; one table lookup turns them into laser grays
+        if bits == 16:
+            return self.levels().apply16(region.image)
+        return self.levels().apply(region.image)
+
+    def _feature_index(self, features: List[ProceduralFeature]) -> GridIndex:
+        index = GridIndex()
+        for pf in features:
+            index.insert(pf, bbox_of_points(pf.geometry['points']))
+        return index
+
+    def _draw_region(self, registry, index: GridIndex, region, columns=None):
+        """Draws everything into the region; terrain (per pixel, the slow part) only in `columns`."""
+        if self.terrain is not None:
+            area = self.area(registry)
+            self.terrain.paint(region, self.terrain.datum(area.abs_x, area.abs_y), columns)
+        self.draw_underlay(registry, region)
+        for pf in index.query(region.world_box):
+            region.polygon(pf.geometry['points'], height_code(self.feature_height(pf)),
+                           pf.geometry.get('holes', ()))
+        self.draw_overlay(registry, region)
+
+    # --- Vector outlines ---
+
+    def landmark_shapes(self, registry: LandmarkRegistry) -> List[Landmark]:
+        """Explicit landmarks that appear on the print."""
+        return []
+
+    def landmark_height(self, lm: Landmark) -> float:
+        if is_street(lm):
+            return STREET_HEIGHT_M
+        return lm.height_m or DEFAULT_BUILDING_HEIGHT_M
+
+    def outlines(self, registry: LandmarkRegistry,
+                 features: List[ProceduralFeature]) -> List[Tuple[str, List[Tuple[float, float]], float]]:
+        """(id, world outline, height) for every shape on the print, landmarks first."""
+        shapes = []
+        for lm in self.landmark_shapes(registry):
+            min_x, min_y, max_x, max_y = lm.get_bounds()
+            shapes.append((lm.id, [(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)],
+                           self.landmark_height(lm)))
+        for pf in features:
+            shapes.append((pf.id, [tuple(p) for p in pf.geometry['points']], self.feature_height(pf)))
+            for k, hole in enumerate(pf.geometry.get('holes', ())):
+                shapes.append((f"{pf.id}_hole_{k}", [tuple(p) for p in hole], GROUND_HEIGHT_M))
+        return shapes
+
+    def save_outputs(self, image, canvas: AreaCanvas, output_dir: str,
+                     tiles: Optional[List[Tile]] = None, profile: Optional[OutputProfile] = None) -> List[str]:
+        """Saves the full reference image, the given (default: all) tiles and the thumbnail pyramid, encoding in parallel."""
+        os.makedirs(output_dir, exist_ok=True)
+        profile = profile or PROFILES[DEFAULT_PROFILE]
+        items = [(image, profile.path(os.path.join(output_dir, f"{self.prefix}_full.png")))]
+        for tile in (self.tiles(canvas) if tiles is None else tiles):
+            items.append((image.crop(tile.box), profile.path(os.path.join(output_dir, tile.name))))
+        save_images(items, profile=profile)
+        return [path for _, path in items] + save_pyramid(image, items[0][1])
+
+def is_street(lm: Landmark) -> bool:
+    return lm.category == LandmarkCategory.STREET
+
+# Landmarks that are never drawn or collided with: zone fills and outlines
+NON_SOLID = (LandmarkCategory.ZONE, LandmarkCategory.BOUNDARY)
+
+class VSArea(PrintArea):
+    """VS Area: two landmark zones, rich pairs in the north and poor houses in the south."""
+    area_id = "lower_vs_area"
+    prefix = "vs_area_print"
+    district = "VS"  # Zones filled by this print (Landmark.district)
+    split_world_y = 140  # South edge of Workshop/Central Street, keeps the workshop in one tile
+
+    def zone_plans(self, registry):
+        plans = []
+        for zone in self.zones(registry):
+            kind = self.zone_kind(zone, zone.zone_kind or None)
+            houses = self.zone_houses(zone, kind) if kind else []
+            paired = kind == "rich"
+            plans.append(ZonePlan(
+                zone=zone, houses=houses, paired=paired,
+                house_prefix=f"{zone.id}_house",
+                house_description=f"Procedural House in {zone.name}",
+                street_prefix=f"{zone.id}_street",
+                street_description=f"Tertiary Street in {zone.name}"
+            ))
+        return plans
+
+    def zones(self, registry: LandmarkRegistry) -> List[Landmark]:
+        return [lm for lm in registry.landmarks.values()
+                if lm.category == LandmarkCategory.ZONE and lm.district == self.district]
+
+    def zone_ids(self, registry):
+        return {lm.id for lm in self.zones(registry)}
+
+    def obstacles(self, registry):
+        return [lm for lm in registry.landmarks.values()
+                if lm.category in (LandmarkCategory.STREET, LandmarkCategory.HOUSE, LandmarkCategory.WORKSHOP)]
+
+    def tiles(self, canvas):
+        return split_tiles_horizontal(canvas, self.prefix, self.split_world_y)
+
+    def overlay_landmarks(self, registry: LandmarkRegistry) -> List[Landmark]:
+        """Explicit landmarks centered in the area, streets first so buildings sit on top."""
+        area = self.area(registry)
+        selected = [lm for lm in registry.within_bbox(area.get_bounds(), LANDMARKS, center=True)
+                    if lm.id != self.area_id and lm.category not in NON_SOLID]
+        selected.sort(key=lambda lm: 0 if is_street(lm) else 1)
+        return selected
+
+    def landmark_shapes(self, registry):
+        return self.overlay_landmarks(registry)
+
+    def draw_overlay(self, registry, region):
+        for lm in self.overlay_landmarks(registry):
+            if not bbox_intersects(lm.get_bounds(padding=1.0), region.world_box):
+                continue
+            w, l = lm.dimensions.width, lm.dimensions.length
+            # Clear the ground first so streets cut through and buildings get a clean foundation
+            region.rect(w + 2, l + 2, lm.abs_x, lm.abs_y, height_code(GROUND_HEIGHT_M))
+            region.rect(w, l, lm.abs_x, lm.abs_y, height_code(self.landmark_height(lm)))
+
+class DKArea(PrintArea):
+    """DK Area: the whole area is one rich zone with a regular street grid."""
+    area_id = "lower_dk_area"
+    prefix = "dk_area_print"
+    level_street = 0  # Deep burn (Black)
+    category_heights = category_table(DEFAULT_BUILDING_HEIGHT_M, {
+        FeatureCategory.STREET: STREET_HEIGHT_M,
+        FeatureCategory.COURTYARD: GROUND_HEIGHT_M,
+        FeatureCategory.RICH_SOLID_FILLER: GROUND_HEIGHT_M,
+    })
+
+    def zone_plans(self, registry):
+        area = self.area(registry)
+        w, l = area.dimensions.width, area.dimensions.length
+        kind = self.zone_kind(area, "rich")
+        houses = self.zone_houses(area, kind)
+        streets = self.cached_candidates(area, lambda: generate_street_network(w, l, "RICH"), ("streets",))
+        return [ZonePlan(
+            zone=area,
+            houses=houses,
+            paired=kind == "rich",
+            house_prefix="dk_house",
+            house_description="Procedural House in DK",
+            streets=streets,
+            street_prefix="dk_street",
+            street_description=f"Street in {area.name}"
+        )]
+
+    def zone_ids(self, registry):
+        return {lm.id for lm in registry.landmarks.values() if "dk_area" in lm.id or "dk_zone" in lm.id}
+
+    def owns(self, pf, zone_ids):
+        return pf.parent_id in zone_ids or pf.id.startswith("dk_")
+
+    def obstacles(self, registry):
+        """Explicit landmarks overlapping the DK bounds (zones and boundaries excluded)."""
+        area_box = self.area(registry).get_bounds()
+        # The index counts circle diameters; the obstacle test keeps width x length
+        return [lm for lm in registry.intersecting(area_box, LANDMARKS)
+                if lm.id != self.area_id and lm.category not in NON_SOLID
+                and bbox_intersects(landmark_box(lm), area_box)]
+
+    def landmark_shapes(self, registry):
+        return self.obstacles(registry)
+
+    def draw_underlay(self, registry, region):
+        for lm in self.obstacles(registry):
+            if bbox_intersects(landmark_box(lm), region.world_box):
+                region.rect(lm.dimensions.width, lm.dimensions.length, lm.abs_x, lm.abs_y,
+                            height_code(self.landmark_height(lm)))
+
+class CitadelArea(PrintArea):
+    """The citadel print's outlines: the consolidated walls and buildings plus the citadel landmarks.
+
+    Nothing is generated here (generate.py builds the citadel features) and the
+    raster print stays generate_citadel_print.py; this gives the laser export
+    the same board.
+    """
+    area_id = "citadel_walls"
+    prefix = "citadel_print"
+    target_cm = (6.0, 10.0)  # Board the citadel print is centered on (generate_citadel_print.py)
+
+    def zone_plans(self, registry):
+        return []
+
+    def obstacles(self, registry):
+        return []
+
+    def owns(self, pf, zone_ids):
+        return pf.parent_id == self.area_id
+
+    def canvas(self, registry: LandmarkRegistry, dpi: int = DPI) -> AreaCanvas:
+        walls = self.area(registry)
+        w_m, l_m = (max(cm / 100 * SCALE_RATIO, size)
+                    for cm, size in zip(self.target_cm, (walls.dimensions.width, walls.dimensions.length)))
+        return AreaCanvas(walls.abs_x, walls.abs_y, w_m, l_m, padding_m=0, dpi=dpi)
+
+    def landmark_shapes(self, registry):
+        return [lm for lm in registry.landmarks.values() if lm.region == "Citadel" and lm.id != self.area_id]
+
+    def draw_underlay(self, registry, region):
+        for lm in self.landmark_shapes(registry):
+            if bbox_intersects(landmark_box(lm), region.world_box):
+                region.rect(lm.dimensions.width, lm.dimensions.length, lm.abs_x, lm.abs_y,
+                            height_code(self.landmark_height(lm)))
+
+AREAS: Dict[str, PrintArea] = {
+    "vs": VSArea(),
+    "dk": DKArea(),
+}
+# Areas with vector outlines: the generated ones plus the citadel
+PRINT_AREAS: Dict[str, PrintArea] = dict(AREAS, citadel=CitadelArea())
@@ -0,0 +1,179 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .geometry import overlap_extent, polygons_overlap
+from .join import Shapes, overlap_pairs
+from .registry import FeatureCategory, LandmarkCategory, LandmarkRegistry
+
+# Landmarks that take up ground; zones, boundaries and the river are areas drawn as outlines
+SOLID_LANDMARKS = (LandmarkCategory.BUILDING, LandmarkCategory.STREET, LandmarkCategory.HOUSE,
+                   LandmarkCategory.WORKSHOP)
+# Parts inside a rich house's wall (they overlap it until consolidated)
+INNER_FEATURES = (FeatureCategory.COURTYARD, FeatureCategory.RICH_SOLID_FILLER)
+# Region -> boundary landmark its landmarks must lie inside
+REGION_BOUNDARIES = {"Lower City": "lower_city_boundary"}
+SITE_BOUNDARY = "site_boundary"  # Every landmark but the Natural ones lies inside it
+TOLERANCE_M = 0.01
+# Towers built onto a wall: they overlap it and the features generated on it (its bastions)
+BUILT_ONTO = {"citadel_se_tower": "citadel_walls"}
+# How much further (m) features may stick out of their parent: the generators wobble every
+# corner (generators.py), and bastions project from the wall they are built on
+PARENT_SLACK_M = {
+    FeatureCategory.CITADEL_WALL: 12.0,  # Consolidated with its bastions (generate.py: 12 m deep)
+    FeatureCategory.BASTION: 12.0,
+    FeatureCategory.RICH_WALL: 0.3,
+    FeatureCategory.COURTYARD: 0.1,
+    FeatureCategory.POOR: 0.2,
+    FeatureCategory.INDUSTRIAL: 0.2,
+    FeatureCategory.STREET: 1.0,         # Poor street networks wobble by up to 1 m
+}
+
+RULES = {
+    "overlap": "solid shapes overlap (streets may cross streets)",
+    "outside_parent": "procedural feature sticks out of its parent landmark",
+    "orphan": "procedural feature whose parent landmark does not exist",
+    "outside_boundary": "landmark sticks out of its region's boundary",
+}
+
+@dataclass
+class Conflict:
+    rule: str
+    region: str
+    a: str
+    b: str = ""
+    detail: str = ""
+
+class AuditItems:
+    """Landmarks then procedural features as columns: boxes and the flags the rules need."""
+
+    def __init__(self, registry: LandmarkRegistry, features=None):
+        features = registry.procedural_features if features is None else features
+        landmarks = list(registry.landmarks.values())
+        position = {lm.id: i for i, lm in enumerate(landmarks)}
+        n = len(landmarks)
+        self.n_landmarks = n
+        self.ids = [lm.id for lm in landmarks] + [pf.id for pf in features]
+        self.parent = np.array([-1] * n + [position.get(pf.parent_id, -1) for pf in features], np.int64)
+        regions = [lm.region for lm in landmarks] + ["Unknown"]  # A missing parent (-1) picks "Unknown"
+        self.regions = regions[:n] + [regions[p] for p in self.parent[n:].tolist()]
+
+        categories = np.array([pf.category for pf in features], np.int64)
+        self.solid = np.r_[[lm.category in SOLID_LANDMARKS for lm in landmarks],
+                           ~np.isin(categories, INNER_FEATURES)].astype(bool)
+        self.street = np.r_[[lm.category == LandmarkCategory.STREET for lm in landmarks],
+                            categories == FeatureCategory.STREET].astype(bool)
+        # RECT parts of one parent are unioned, not conflicts
+        self.rect_part = np.r_[np.zeros(n, bool), [pf.shape == "RECT" for pf in features]].astype(bool)
+        self.built_onto = np.array([position.get(BUILT_ONTO.get(lm.id), -1) for lm in landmarks] + [-1] * len(features),
+                                   np.int64)
+        self.slack = np.r_[np.zeros(n), [PARENT_SLACK_M.get(pf.category, 0.0) for pf in features]]
+
+        self.shapes = Shapes(landmarks + list(features))
+        self.boxes = self.shapes.boxes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+def _contains(outer: np.ndarray, inner: np.ndarray, tolerance=TOLERANCE_M) -> np.ndarray:
+    """Row-wise box containment; `tolerance` is one value or one per row."""
+    return ((outer[:, 0] - tolerance <= inner[:, 0]) & (outer[:, 1] - tolerance <= inner[:, 1])
+            & (inner[:, 2] <= outer[:, 2] + tolerance) & (inner[:, 3] <= outer[:, 3] + tolerance))
+
+def _protrusion(outer, inner) -> float:
+    return max(outer[0] - inner[0], outer[1] - inner[1], inner[2] - outer[2], inner[3] - outer[3])
+
+def find_overlaps(items: AuditItems) -> List[Conflict]:
+    i, j = overlap_pairs(items.boxes)
+    keep = items.solid[i] & items.solid[j] & ~(items.street[i] & items.street[j])
+    # A feature sits inside its own parent
+    keep &= (items.parent[j] != i) & (items.parent[i] != j)
+    # Nested landmarks (buildings inside the citadel walls) are layout, not conflicts
+    both = (i < items.n_landmarks) & (j < items.n_landmarks)
+    bi, bj = items.boxes[i], items.boxes[j]
+    keep &= ~(both & (_contains(bi, bj) | _contains(bj, bi)))
+    keep &= ~(items.rect_part[i] & items.rect_part[j] & (items.parent[i] == items.parent[j]))
+    # A tower overlaps the wall it is built onto, and that wall's bastions
+    for a, b in ((i, j), (j, i)):
+        onto = items.built_onto[a]
+        keep &= ~((onto >= 0) & ((onto == b) | (onto == items.parent[b])))
+    conflicts = []
+    for a, b in zip(i[keep].tolist(), j[keep].tolist()):
+        if items.shapes.outlines[a] is None and items.shapes.outlines[b] is None:
+            x1, y1 = np.maximum(items.boxes[a][:2], items.boxes[b][:2])
+            x2, y2 = np.minimum(items.boxes[a][2:], items.boxes[b][2:])
+            area, box = (x2 - x1) * (y2 - y1), (x1, y1, x2, y2)
+        else:
+            outline_a, outline_b = items.shapes.outline(a), items.shapes.outline(b)
+            if not polygons_overlap(outline_a, outline_b):
+                continue
+            area, box = overlap_extent(outline_a, outline_b)
+        detail = "edges cross" if box is None else \
+            f"{area:.2f} m2 shared, within {box[2] - box[0]:.2f} x {box[3] - box[1]:.2f} m"
+        conflicts.append(Conflict("overlap", items.regions[a], items.ids[a], items.ids[b], detail))
+    return conflicts
+
+def find_outside_parent(items: AuditItems, tolerance: float = TOLERANCE_M) -> List[Conflict]:
+    """Features outside their parent by more than `tolerance` plus their category's PARENT_SLACK_M."""
+    conflicts = []
+    features = np.arange(items.n_landmarks, len(items))
+    parent = items.parent[features]
+    for f in features[parent < 0].tolist():
+        conflicts.append(Conflict("orphan", items.regions[f], items.ids[f]))
+    features, parent = features[parent >= 0], parent[parent >= 0]
+    outside = ~_contains(items.boxes[parent], items.boxes[features], tolerance + items.slack[features])
+    for f, p in zip(features[outside].tolist(), parent[outside].tolist()):
+        conflicts.append(Conflict("outside_parent", items.regions[f], items.ids[f], items.ids[p],
+                                  f"{_protrusion(items.boxes[p], items.boxes[f]):.2f} m outside"))
+    return conflicts
+
+def find_outside_boundary(registry: LandmarkRegistry, tolerance: float = TOLERANCE_M) -> List[Conflict]:
+    conflicts = []
+    site = registry.landmarks.get(SITE_BOUNDARY)
+    for lm in registry.landmarks.values():
+        if lm.category == LandmarkCategory.BOUNDARY and lm.id in (SITE_BOUNDARY, REGION_BOUNDARIES.get(lm.region)):
+            continue
+        bounds = []
+        if lm.region in REGION_BOUNDARIES and REGION_BOUNDARIES[lm.region] in registry.landmarks:
+            bounds.append(registry.landmarks[REGION_BOUNDARIES[lm.region]])
+        if site is not None and lm.region != "Natural" and lm.id != SITE_BOUNDARY:
+            bounds.append(site)
+        box = np.array([lm.get_extent()])
+        for boundary in bounds:
+            outer = np.array([boundary.get_bounds()])
+            if not _contains(outer, box, tolerance)[0]:
+                conflicts.append(Conflict("outside_boundary", lm.region, lm.id, boundary.id,
+                                          f"{_protrusion(outer[0], box[0]):.2f} m outside"))
+    return conflicts
+
+def audit(registry: LandmarkRegistry, rules: Optional[Sequence[str]] = None, features=None,
+          tolerance: float = TOLERANCE_M) -> List[Conflict]:
+    """All conflicts of the given rules (default: all) over landmarks and procedural features.
+
+    `features` defaults to the registry's; `tolerance` is how far (m) a shape
+    may stick out of its parent or boundary (generated features get their
+    category's PARENT_SLACK_M on top).
+    """
+    rules = list(RULES) if rules is None else list(rules)
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown audit rules: {sorted(unknown)}")
+    conflicts = []
+    if {"overlap", "outside_parent", "orphan"} & set(rules):
+        items = AuditItems(registry, features)
+        if "overlap" in rules:
+            conflicts += find_overlaps(items)
+        if {"outside_parent", "orphan"} & set(rules):
+            conflicts += [c for c in find_outside_parent(items, tolerance) if c.rule in rules]
+    if "outside_boundary" in rules:
+        conflicts += find_outside_boundary(registry, tolerance)
+    return conflicts
+
+def by_region(conflicts: Sequence[Conflict]) -> Dict[str, Dict[str, List[Conflict]]]:
+    """region -> rule -> conflicts, regions and rules sorted."""
+    grouped: Dict[str, Dict[str, List[Conflict]]] = defaultdict(lambda: defaultdict(list))
+    for c in conflicts:
+        grouped[c.region][c.rule].append(c)
+    return {region: dict(sorted(grouped[region].items())) for region in sorted(grouped)}
@@ -0,0 +1,176 @@
+import contextlib
+import io
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+@dataclass
+class Step:
+    """One node of the build: `func(**results of deps, by dep name)`.
+
+    `func` must be a module-level function (it is pickled to a worker
+    process) and its result must pickle too. Steps hand results to their
+    dependents instead of writing shared files; give each shared file a
+    single step that merges everything into it.
+    """
+    name: str
+    func: Callable
+    deps: Tuple[str, ...] = ()
+
+@dataclass
+class StepRun:
+    name: str
+    start: float     # Seconds since the build started
+    end: float
+    log: str = ""
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+def _call(func, kwargs):
+    """Runs a step, capturing its prints and wall-clock span (time.time is shared across processes)."""
+    out = io.StringIO()
+    start = time.time()
+    try:
+        with contextlib.redirect_stdout(out):
+            result = func(**kwargs)
+        return result, start, time.time(), out.getvalue(), None
+    except Exception:
+        return None, start, time.time(), out.getvalue(), traceback.format_exc()
+
+class BuildGraph:
+    """Steps with dependencies, run as soon as their inputs are ready."""
+
+    def __init__(self, steps: Iterable[Step] = ()):
+        self.steps: Dict[str, Step] = {}
+        for step in steps:
+            self.add(step)
+
+    def add(self, step: Step):
+        if step.name in self.steps:
+            raise ValueError(f"Duplicate step: {step.name}")
+        self.steps[step.name] = step
+
+    def order(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Topological order of the given steps (default: all), raising on unknown deps or cycles."""
+        names = list(self.steps) if names is None else list(names)
+        order, state = [], {}
+
+        def visit(name, path):
+            if name not in self.steps:
+                raise ValueError(f"Unknown step: {name}" + (f" (needed by {path[-1]})" if path else ""))
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'active':
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = 'active'
+            for dep in self.steps[name].deps:
+                visit(dep, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in names:
+            visit(name, [])
+        return order
+
+    def run(self, targets: Optional[Iterable[str]] = None, jobs: Optional[int] = None,
+            on_done: Optional[Callable[[StepRun], None]] = None) -> 'BuildReport':
+        """Runs `targets` (default: everything) and their dependencies, independent steps in parallel.
+
+        A failed step skips everything downstream of it; the other branches
+        still finish.
+        """
+        order = self.order(targets)
+        pending: Set[str] = set(order)
+        results: Dict[str, object] = {}
+        runs: Dict[str, StepRun] = {}
+        failed: Set[str] = set()
+        t0 = time.time()
+
+        def finish(name, payload):
+            result, start, end, log, error = payload
+            run = StepRun(name, start - t0, end - t0, log, error)
+            runs[name] = run
+            if error:
+                failed.add(name)
+            else:
+                results[name] = result
+            if on_done:
+                on_done(run)
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            running = {}
+            while pending or running:
+                # Drop steps whose inputs failed, then start everything that is ready
+                for name in [n for n in order if n in pending]:
+                    step = self.steps[name]
+                    if any(d in failed for d in step.deps):
+                        pending.discard(name)
+                        failed.add(name)
+                        continue
+                    if not all(d in results for d in step.deps):
+                        continue
+                    pending.discard(name)
+                    kwargs = {d: results[d] for d in step.deps}
+                    running[pool.submit(_call, step.func, kwargs)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result())
+
+        skipped = [n for n in order if n not in runs]
+        return BuildReport(self, order, runs, results, skipped, time.time() - t0)
+
+@dataclass
+class BuildReport:
+    graph: BuildGraph
+    order: List[str]
+    runs: Dict[str, StepRun]
+    results: Dict[str, object]
+    skipped: List[str]
+    wall: float
+    _critical: Optional[Tuple[List[str], float]] = field(default=None, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return not self.skipped and not any(r.error for r in self.runs.values())
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """Longest chain of dependent steps by measured duration: the floor on the build time."""
+        if self._critical is None:
+            best: Dict[str, Tuple[float, Optional[str]]] = {}
+            for name in self.order:
+                run = self.runs.get(name)
+                own = run.duration if run else 0.0
+                prev = max(((best[d][0], d) for d in self.graph.steps[name].deps if d in best),
+                           default=(0.0, None))
+                best[name] = (prev[0] + own, prev[1])
+            end = max(best, key=lambda n: best[n][0])
+            path, total = [], best[end][0]
+            node = end
+            while node is not None:
+                path.append(node)
+                node = best[node][1]
+            self._critical = (path[::-1], total)
+        return self._critical
+
+    def format(self) -> str:
+        path, total = self.critical_path()
+        on_path = set(path)
+        busy = sum(r.duration for r in self.runs.values())
+        lines = [f"{'step':<22}{'start':>8}{'time':>8}"]
+        for name in self.order:
+            run = self.runs.get(name)
+            if run is None:
+                lines.append(f"{name:<22}{'-':>8}{'-':>8}  skipped")
+                continue
+            mark = "FAILED" if run.error else ("*" if name in on_path else "")
+            lines.append(f"{name:<22}{run.start:>7.2f}s{run.duration:>7.2f}s  {mark}")
+        lines.append(f"Critical path (*): {' -> '.join(path)} = {total:.2f}s")
+        lines.append(f"Wall time {self.wall:.2f}s for {busy:.2f}s of work ({busy / max(self.wall, 1e-9):.1f}x parallel)")
+        return "\n".join(lines)
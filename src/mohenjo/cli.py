@@ -0,0 +1,91 @@
+import os
+import runpy
+import sys
+
+# `python -m mohenjo <command> [target] [args]` (with src/ on PYTHONPATH).
+# Commands dispatch to the scripts in src/scripts, importing each one only
+# when it runs: PIL, numpy and the procedural file are paid for by the
+# commands that use them, not by `render --id` or `--help`.
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+# command -> target -> script; a None target is the default when the first argument is an option
+COMMANDS = {
+    "render": {
+        None: "render_map.py",
+        "map": "render_map.py",
+        "streets": "build_street_graph.py",
+    },
+    "generate": {
+        "citadel": "generate.py",
+        "vs": "generate_vs_area_print.py",
+        "dk": "generate_dk_area.py",
+        "changed": "regenerate_changed.py",
+        "city": "build_city.py",
+        "sweep": "sweep_generators.py",
+    },
+    "print": {
+        "citadel": "generate_citadel_print.py",
+        "hr": "generate_hr_area_print.py",
+        "laser": "export_laser_paths.py",
+        "mesh": "export_mesh.py",
+    },
+    "serve": {
+        None: "render_server.py",
+    },
+    "audit": {
+        None: "audit_registry.py",
+    },
+}
+
+# Cold-start budgets for `bench`, in milliseconds (wall clock, best of --runs)
+COLD_START_TARGETS_MS = {
+    ("--help",): 100,
+    ("render", "--id", "citadel_great_bath", "--output", "{tmp}/bench.svg"): 400,
+}
+# Modules a landmarks-only render must not import
+FORBIDDEN_IMPORTS = ("PIL", "numpy")
+
+def usage() -> str:
+    lines = ["usage: python -m mohenjo <command> [target] [options]", "", "commands:"]
+    for command, targets in COMMANDS.items():
+        names = [t for t in targets if t is not None]
+        lines.append(f"  {command:<9}" + (" | ".join(names) if names else "[options]"))
+    lines.append(f"  {'bench':<9}cold-start and import-time regression checks")
+    lines.append("")
+    lines.append("Options after the target go to the script, e.g. `python -m mohenjo render --id citadel_walls`")
+    lines.append("or `python -m mohenjo generate vs --terrain`; add --help for a script's own options.")
+    return "\n".join(lines)
+
+def run_script(name: str, args) -> int:
+    path = os.path.normpath(os.path.join(SCRIPTS_DIR, name))
+    # Scripts import their siblings and expect to be run as __main__
+    sys.path.insert(0, os.path.dirname(path))
+    sys.argv = [path] + list(args)
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage())
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command == "bench":
+        from .startup_bench import main as bench_main
+        return bench_main(rest)
+    if command not in COMMANDS:
+        print(f"Unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    targets = COMMANDS[command]
+    if rest and rest[0] in targets:
+        return run_script(targets[rest[0]], rest[1:])
+    if None in targets and (not rest or rest[0].startswith('-')):
+        return run_script(targets[None], rest)
+    names = ", ".join(t for t in targets if t is not None)
+    print(f"{command}: expected one of {names}", file=sys.stderr)
+    return 2
@@ -0,0 +1,141 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .registry import FeatureCategory, ProceduralFeature
+from .geometry import clip_convex, rect_to_box, union_rects
+
+# Feature categories that are the inner half of a rich house pair
+INNER_CATEGORIES = (FeatureCategory.COURTYARD, FeatureCategory.RICH_SOLID_FILLER)
+
+# A union of RECTs takes the category of its most important member (a wall ring with
+# its bastions is a wall), with the name and part noun used to describe a mixed union
+MERGED_NAMES = {
+    FeatureCategory.CITADEL_WALL: ("Citadel Wall", "wall segments"),
+    FeatureCategory.BASTION: ("Citadel Bastions", "bastions"),
+    FeatureCategory.CITADEL_BUILDING: ("Citadel Building", "blocks"),
+}
+
+def is_courtyard(pf: ProceduralFeature) -> bool:
+    return pf.category == FeatureCategory.COURTYARD
+
+def merge_pair(wall: ProceduralFeature, inner: Optional[ProceduralFeature]) -> ProceduralFeature:
+    """One feature for a rich house: the wall block with its courtyard as a hole.
+
+    The courtyard is clipped to the wall (the wobble can push it across the
+    wall's edge), so the hole may touch the outline. Rasterized as a hole it
+    keeps its own edge pixels at ground, as the separate courtyard drawn over
+    the wall did. Solid fillers only exist to keep the [wall, courtyard]
+    pairing and are dropped.
+    """
+    points = [tuple(p) for p in wall.geometry['points']]
+    geometry = {'points': points}
+    if inner is not None and is_courtyard(inner):
+        hole = clip_convex(inner.geometry['points'], points)
+        if hole:
+            geometry['holes'] = [hole[::-1]]  # Holes run clockwise
+    return ProceduralFeature(id=wall.id, parent_id=wall.parent_id, shape="POLYGON",
+                             geometry=geometry, description=wall.description, category=wall.category)
+
+def _touching(a, b) -> bool:
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+def merged_attributes(members: List[ProceduralFeature]) -> Tuple[ProceduralFeature, FeatureCategory, str]:
+    """Lead feature (id, parent), category and description of a union of RECT features.
+
+    Members that all share a description keep it; otherwise it counts the parts,
+    e.g. "Citadel Wall (36 wall segments, 36 bastions)".
+    """
+    counts = Counter(pf.category for pf in members)
+    category = next((c for c in MERGED_NAMES if c in counts), members[0].category)
+    lead = next(pf for pf in members if pf.category == category)
+    if len({pf.description for pf in members}) == 1:
+        return lead, category, lead.description
+    order = [c for c in MERGED_NAMES if c in counts] + [c for c in counts if c not in MERGED_NAMES]
+    parts = ", ".join(f"{counts[c]} {MERGED_NAMES.get(c, (None, c.name.lower()))[1]}" for c in order)
+    name = MERGED_NAMES.get(category, (lead.description,))[0]
+    return lead, category, f"{name} ({parts})"
+
+def merge_rects(rects: List[ProceduralFeature]) -> List[ProceduralFeature]:
+    """Unions touching or overlapping RECT features of one parent, courtyards cut out as holes."""
+    solids = [pf for pf in rects if not is_courtyard(pf)]
+    courts = [rect_to_box(pf.geometry) for pf in rects if is_courtyard(pf)]
+    boxes = [rect_to_box(pf.geometry) for pf in solids]
+
+    # Clusters of touching boxes (union-find)
+    parent = list(range(len(boxes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(boxes)):
+        for j in range(i + 1, len(boxes)):
+            if _touching(boxes[i], boxes[j]):
+                parent[find(i)] = find(j)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(boxes)):
+        clusters[find(i)].append(i)
+
+    merged = []
+    for members in sorted(clusters.values()):
+        lead, category, description = merged_attributes([solids[i] for i in members])
+        member_boxes = [boxes[i] for i in members]
+        holes = [c for c in courts if any(_touching(c, b) for b in member_boxes)]
+        for k, (outer, inner) in enumerate(union_rects(member_boxes, holes)):
+            geometry = {'points': outer}
+            if inner:
+                geometry['holes'] = inner
+            merged.append(ProceduralFeature(
+                id=lead.id if k == 0 else f"{lead.id}_{k}",
+                parent_id=lead.parent_id,
+                shape="POLYGON",
+                geometry=geometry,
+                description=description,
+                category=category
+            ))
+    return merged
+
+def consolidate_features(features: List[ProceduralFeature]) -> List[ProceduralFeature]:
+    """Collapses footprints into as few polygons as possible, per parent.
+
+    - RECT features (citadel walls, bastions, building parts) are unioned
+      when they touch or overlap; courtyards become holes.
+    - Rich house pairs [wall, courtyard/filler] become one polygon.
+    Everything else is kept as is. Already consolidated lists pass through unchanged.
+    """
+    rects: Dict[str, List[ProceduralFeature]] = defaultdict(list)
+    out: List[ProceduralFeature] = []
+    rect_slots: Dict[str, int] = {}  # parent -> position of its merged RECTs in the output
+
+    i = 0
+    while i < len(features):
+        pf = features[i]
+        if pf.shape == "RECT":
+            if pf.parent_id not in rect_slots:
+                rect_slots[pf.parent_id] = len(out)
+                out.append(None)
+            rects[pf.parent_id].append(pf)
+            i += 1
+            continue
+
+        nxt = features[i + 1] if i + 1 < len(features) else None
+        if (pf.category == FeatureCategory.RICH_WALL and nxt is not None and nxt.parent_id == pf.parent_id
+                and nxt.category in INNER_CATEGORIES):
+            out.append(merge_pair(pf, nxt))
+            i += 2
+            continue
+
+        out.append(pf)
+        i += 1
+
+    result = []
+    slots = {pos: parent_id for parent_id, pos in rect_slots.items()}
+    for pos, pf in enumerate(out):
+        if pos in slots:
+            result.extend(merge_rects(rects[slots[pos]]))
+        else:
+            result.append(pf)
+    return result
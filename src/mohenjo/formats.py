@@ -0,0 +1,155 @@
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+# zlib strategies for PNG (PIL's compress_type)
+Z_DEFAULT = -1
+Z_FILTERED = 1
+Z_RLE = 3  # Long runs of one gray: fast, and small on flat heightmaps
+
+@dataclass
+class OutputProfile:
+    """How print images are written: format, zlib effort, bit depth.
+
+    None/default fields leave PIL's own choice, so the "default" profile
+    writes the same bytes as a bare image.save(path).
+    """
+    name: str
+    description: str
+    format: str = "PNG"                    # PNG or TIFF (tiled)
+    compress_level: Optional[int] = None   # zlib 0-9; PIL's default is 6
+    strategy: int = Z_DEFAULT
+    optimize: bool = False                 # PNG: level 9 and a second pass
+    palette: bool = False                  # Maps with <= 16 levels as 1/2/4-bit palette PNGs
+    bits: int = 8                          # 16: I;16 from the calibration's unrounded grays
+    tile_px: int = 512                     # TIFF tile edge (a multiple of 16)
+
+    @property
+    def ext(self) -> str:
+        return ".tif" if self.format == "TIFF" else ".png"
+
+    def path(self, path: str) -> str:
+        """`path` with this profile's extension."""
+        return os.path.splitext(path)[0] + self.ext
+
+    def save(self, image, path: str):
+        """Writes a PIL image, or a mohenjo.spans.SpanRaster (expanded only as far as the format needs)."""
+        if not isinstance(image, Image.Image):
+            if self.format == "PNG" and not (self.palette or self.optimize or self.strategy != Z_DEFAULT):
+                # Streamed a band at a time; same pixels as PIL's file, different bytes (Up filter on every row)
+                image.save_png(path, 6 if self.compress_level is None else self.compress_level)
+                return
+            image = image.to_image()
+        if self.format == "TIFF":
+            save_tiled_tiff(image, path, self.tile_px, 6 if self.compress_level is None else self.compress_level)
+            return
+        options = {}
+        if self.compress_level is not None:
+            options['compress_level'] = self.compress_level
+        if self.strategy != Z_DEFAULT:
+            options['compress_type'] = self.strategy
+        if self.optimize:
+            options['optimize'] = True
+        if self.palette:
+            image, bits = to_palette(image)
+            if bits:
+                options['bits'] = bits
+        image.save(path, **options)
+
+# Check that the laser software reads palette and 16-bit files before switching a board to them
+PROFILES: Dict[str, OutputProfile] = {p.name: p for p in [
+    OutputProfile("default", "PIL defaults (zlib level 6), what the scripts always wrote"),
+    OutputProfile("preview", "Fast drafts: zlib level 1 with run-length matching",
+                  compress_level=1, strategy=Z_RLE),
+    OutputProfile("archival", "Smallest 8-bit grayscale PNG, slow", optimize=True),
+    OutputProfile("palette", "1/2/4-bit palette PNG for maps with few levels (8-bit gray otherwise)",
+                  palette=True, optimize=True),
+    OutputProfile("height16", "16-bit grayscale PNG: terrain relief without 8-bit rounding", bits=16),
+    OutputProfile("tiff", "Tiled deflate TIFF (512 px tiles) for very large maps", format="TIFF"),
+]}
+DEFAULT_PROFILE = "default"
+
+def to_palette(image: Image.Image):
+    """(palette image, bits) for an L image with at most 16 grays; (image, None) otherwise.
+
+    The palette holds the grays themselves, so image.convert('L') gives back the original.
+    """
+    if image.mode != 'L':
+        return image, None
+    colors = image.getcolors(16)
+    if colors is None:
+        return image, None
+    grays = sorted(g for _, g in colors)
+    lut = [0] * 256
+    for i, g in enumerate(grays):
+        lut[g] = i
+    indexed = Image.frombytes('P', image.size, image.point(lut).tobytes())
+    indexed.putpalette([c for g in grays for c in (g, g, g)])
+    bits = next(b for b in (1, 2, 4) if len(grays) <= 1 << b)
+    return indexed, bits
+
+# --- Tiled TIFF ---
+# PIL writes TIFF in strips only (it drops the tile tags), so tiles are written here:
+# little-endian baseline TIFF, one grayscale channel, each tile deflated on its own.
+
+TIFF_SHORT, TIFF_LONG = 3, 4
+COMPRESSION_DEFLATE = 8
+
+def _tiff_tiles(image: Image.Image, tile_px: int, level: int) -> List[bytes]:
+    tiles = []
+    for y in range(0, image.height, tile_px):
+        for x in range(0, image.width, tile_px):
+            # Edge tiles are padded to full size with zeros, as TIFF requires
+            tiles.append(zlib.compress(image.crop((x, y, x + tile_px, y + tile_px)).tobytes(), level))
+    return tiles
+
+def save_tiled_tiff(image: Image.Image, path: str, tile_px: int = 512, level: int = 6):
+    """Writes an L or I;16 image as a tiled, deflate-compressed TIFF."""
+    if image.mode not in ('L', 'I;16'):
+        raise ValueError(f"tiled TIFF supports L and I;16 images, not {image.mode}")
+    if tile_px % 16:
+        raise ValueError(f"TIFF tile size must be a multiple of 16 (got {tile_px})")
+    bits = 16 if image.mode == 'I;16' else 8  # I;16 is little-endian, like the file
+    tiles = _tiff_tiles(image, tile_px, level)
+
+    offsets, pos = [], 8
+    for data in tiles:
+        offsets.append(pos)
+        pos += len(data)
+    pos += pos % 2  # The directory starts on a word boundary
+    entries = [
+        (256, TIFF_LONG, [image.width]),
+        (257, TIFF_LONG, [image.height]),
+        (258, TIFF_SHORT, [bits]),
+        (259, TIFF_SHORT, [COMPRESSION_DEFLATE]),
+        (262, TIFF_SHORT, [1]),  # BlackIsZero
+        (277, TIFF_SHORT, [1]),
+        (284, TIFF_SHORT, [1]),
+        (322, TIFF_LONG, [tile_px]),
+        (323, TIFF_LONG, [tile_px]),
+        (324, TIFF_LONG, offsets),
+        (325, TIFF_LONG, [len(d) for d in tiles]),
+    ]
+    # Arrays that do not fit in an entry's 4 bytes follow the directory
+    extra_at = pos + 2 + 12 * len(entries) + 4
+    directory, extra = [struct.pack('<H', len(entries))], []
+    for tag, kind, values in entries:
+        fmt = '<%d%s' % (len(values), 'H' if kind == TIFF_SHORT else 'I')
+        packed = struct.pack(fmt, *values)
+        if len(packed) <= 4:
+            directory.append(struct.pack('<HHI', tag, kind, len(values)) + packed.ljust(4, b'\0'))
+        else:
+            directory.append(struct.pack('<HHII', tag, kind, len(values), extra_at + sum(map(len, extra))))
+            extra.append(packed)
+    directory.append(struct.pack('<I', 0))  # No next directory
+
+    with open(path, 'wb') as f:
+        f.write(b'II*\0' + struct.pack('<I', pos))
+        for data in tiles:
+            f.write(data)
+        f.write(b'\0' * (pos - f.tell()))
+        f.write(b''.join(directory) + b''.join(extra))
@@ -17,7 +17,8 @@ def get_wobbly_rect_points(x, y, w, h, wobble=0.2):
     p4 = (x + random.uniform(-wobble, wobble), y + h + random.uniform(-wobble, wobble))
     return [p1, p2, p3, p4]
 
-def generate_rich_zone(width_m: float, length_m: float, seed: int = 42, house_size: float = 15.0, gap: float = 4.0) -> List[House]:
+def generate_rich_zone(width_m: float, length_m: float, seed: int = 42, house_size: float = 15.0, gap: float = 4.0,
+                       wobble: float = 0.3, court_wobble: float = 0.1) -> List[House]:
     random.seed(seed)
     houses = []
     
@@ -37,7 +38,7 @@ def generate_rich_zone(width_m: float, length_m: float, seed: int = 42, house_si
             shape_type = random.choice([0, 1, 2, 3, 4, 4, 0, 1, 5, 5]) # Weighted: 20% Solid, 20% O-Shape, Rest U-Shape
             
             # 1. Main Block
-            main_poly = get_wobbly_rect_points(x, y, house_size, house_size, wobble=0.3)
+            main_poly = get_wobbly_rect_points(x, y, house_size, house_size, wobble=wobble)
             houses.append(House(points=main_poly, category="RICH_WALL"))
             
             # 2. Courtyard (Eraser or Filler)
@@ -68,7 +69,7 @@ def generate_rich_zone(width_m: float, length_m: float, seed: int = 42, house_si
                 elif shape_type == 3: # Left Open
                     cx, cy, cw, ch = x, y+wall, house_size-wall, house_size-2*wall
                 
-                court_poly = get_wobbly_rect_points(cx, cy, cw, ch, wobble=0.1)
+                court_poly = get_wobbly_rect_points(cx, cy, cw, ch, wobble=court_wobble)
                 houses.append(House(points=court_poly, category="COURTYARD"))
              
             
@@ -79,28 +80,26 @@ class Street:
     points: List[Tuple[float, float]] # Polygon (likely a rect)
     category: str # "TERTIARY_STREET"
 
-def generate_poor_zone(width_m: float, length_m: float, seed: int = 42) -> List[House]:
+def generate_poor_zone(width_m: float, length_m: float, seed: int = 42, house_w: float = 5.0, house_h: float = 6.0,
+                       gap: float = 1.0, skip_prob: float = 0.2, merge_prob: float = 0.3,
+                       wobble: float = 0.2) -> List[House]:
     random.seed(seed)
     houses = []
     
-    house_w = 5.0
-    house_h = 6.0
-    gap = 1.0
-    
     current_y = 0
     while current_y < length_m - house_h:
         current_x = 0
         while current_x < width_m - house_w:
             
-            # Logic: Skipping (20%)
-            if random.random() < 0.2:
+            # Logic: Skipping (20% by default)
+            if random.random() < skip_prob:
                 current_x += house_w + gap
                 continue
                 
-            # Logic: Coalescing (Merging) (30%)
+            # Logic: Coalescing (Merging) (30% by default)
             w_actual = house_w
             h_actual = house_h
-            if random.random() < 0.3 and (current_x + (house_w*2) + gap < width_m):
+            if random.random() < merge_prob and (current_x + (house_w*2) + gap < width_m):
                 w_actual = (house_w * 2) + gap + random.uniform(-0.5, 0.5)
                 h_actual = house_h + random.uniform(-0.5, 0.5)
             else:
@@ -109,7 +108,7 @@ def generate_poor_zone(width_m: float, length_m: float, seed: int = 42) -> List[
 
             # Draw
             if current_x + w_actual < width_m:
-                 poly = get_wobbly_rect_points(current_x, current_y, w_actual, h_actual, wobble=0.2)
+                 poly = get_wobbly_rect_points(current_x, current_y, w_actual, h_actual, wobble=wobble)
                  houses.append(House(points=poly, category="POOR"))
             
             current_x += w_actual + gap
@@ -167,8 +166,9 @@ def generate_street_network(width_m: float, length_m: float, style: str, seed: i
                 
     return streets
 
-def generate_industrial_zone(width_m: float, length_m: float, seed: int = 42) -> List[House]:
-    """Generates large, spaced-out industrial buildings."""
+def generate_industrial_zone(width_m: float, length_m: float, seed: int = 42, house_size: float = 16.0,
+                             gap: float = 8.0, wobble: float = 0.2) -> List[House]:
+    """Generates large, spaced-out industrial buildings (house_size is the mean width)."""
     random.seed(seed)
     buildings = []
     
@@ -180,21 +180,19 @@ def generate_industrial_zone(width_m: float, length_m: float, seed: int = 42) ->
     y = 0
     row_height = 0
     
-    gap = 8.0
-    
     current_y = 5.0
     while current_y < length_m - 10:
         current_x = 5.0
         row_h = 0
         while current_x < width_m - 10:
             
-            w = random.uniform(12.0, 20.0)
-            h = random.uniform(10.0, 18.0)
+            w = random.uniform(house_size - 4.0, house_size + 4.0)
+            h = random.uniform(house_size - 6.0, house_size + 2.0)
             
             if current_x + w > width_m:
                  break
                  
-            poly = get_wobbly_rect_points(current_x, current_y, w, h, wobble=0.2)
+            poly = get_wobbly_rect_points(current_x, current_y, w, h, wobble=wobble)
             buildings.append(House(points=poly, category="INDUSTRIAL"))
             
             row_h = max(row_h, h)
@@ -203,3 +201,10 @@ def generate_industrial_zone(width_m: float, length_m: float, seed: int = 42) ->
         current_y += row_h + gap
         
     return buildings
+
+# Zone generators by kind, as used by PrintArea zone plans and the parameter sweep
+ZONE_GENERATORS = {
+    "rich": generate_rich_zone,
+    "poor": generate_poor_zone,
+    "industrial": generate_industrial_zone,
+}
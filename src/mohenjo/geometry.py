@@ -0,0 +1,258 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from .spatial import BBox
+
+Point = Tuple[float, float]
+Ring = List[Point]
+# Outer ring (counter-clockwise) and its holes (clockwise)
+PolygonWithHoles = Tuple[Ring, List[Ring]]
+
+def signed_area(ring: Sequence[Point]) -> float:
+    """Shoelace area, positive for counter-clockwise rings."""
+    total = 0.0
+    for (x1, y1), (x2, y2) in zip(ring, list(ring[1:]) + list(ring[:1])):
+        total += x1 * y2 - x2 * y1
+    return total / 2
+
+def point_in_ring(p: Point, ring: Sequence[Point]) -> bool:
+    """Even-odd ray cast."""
+    x, y = p
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, list(ring[1:]) + list(ring[:1])):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+def _drop_collinear(ring: Ring) -> Ring:
+    out = []
+    n = len(ring)
+    for i, p in enumerate(ring):
+        a, b = ring[i - 1], ring[(i + 1) % n]
+        if (p[0] - a[0]) * (b[1] - p[1]) - (p[1] - a[1]) * (b[0] - p[0]) != 0:
+            out.append(p)
+    return out
+
+# --- Axis-aligned rectangles ---
+
+def union_rects(rects: Sequence[BBox], holes: Sequence[BBox] = ()) -> List[PolygonWithHoles]:
+    """Exact union of axis-aligned boxes, minus `holes`, as polygons with holes.
+
+    Works on the grid of all box edges (coordinate compression), so touching
+    and overlapping boxes merge without tolerances. Boxes that only share a
+    corner stay separate polygons.
+    """
+    xs = sorted({v for r in list(rects) + list(holes) for v in (r[0], r[2])})
+    ys = sorted({v for r in list(rects) + list(holes) for v in (r[1], r[3])})
+    xi = {v: i for i, v in enumerate(xs)}
+    yi = {v: i for i, v in enumerate(ys)}
+
+    def cells(r):
+        return ((i, j) for i in range(xi[r[0]], xi[r[2]]) for j in range(yi[r[1]], yi[r[3]]))
+
+    covered = set()
+    for r in rects:
+        covered.update(cells(r))
+    for r in holes:
+        covered.difference_update(cells(r))
+
+    # 4-connected components
+    component: Dict[Tuple[int, int], int] = {}
+    cid = -1
+    for start in sorted(covered):
+        if start in component:
+            continue
+        cid += 1
+        stack = [start]
+        component[start] = cid
+        while stack:
+            i, j = stack.pop()
+            for n in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+                if n in covered and n not in component:
+                    component[n] = cid
+                    stack.append(n)
+
+    # Boundary edges with the material on their left, on lattice indices
+    outgoing: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
+    edge_component = {}
+    for (i, j) in covered:
+        cid = component[(i, j)]
+        for (ni, nj), a, b in (((i, j - 1), (i, j), (i + 1, j)),
+                               ((i + 1, j), (i + 1, j), (i + 1, j + 1)),
+                               ((i, j + 1), (i + 1, j + 1), (i, j + 1)),
+                               ((i - 1, j), (i, j + 1), (i, j))):
+            if (ni, nj) not in covered:
+                outgoing[a].append(b)
+                edge_component[(a, b)] = cid
+
+    rings: Dict[int, List[Ring]] = defaultdict(list)
+    for start_a in sorted(outgoing):
+        while outgoing[start_a]:
+            a, b = start_a, outgoing[start_a].pop()
+            cid = edge_component[(a, b)]
+            ring = [a]
+            while b != start_a:
+                ring.append(b)
+                options = outgoing[b]
+                if len(options) > 1:
+                    # Corner-only contact: turn left to stay on the same component
+                    d = (b[0] - a[0], b[1] - a[1])
+                    options.sort(key=lambda c: d[0] * (c[1] - b[1]) - d[1] * (c[0] - b[0]))
+                a, b = b, options.pop()
+            ring = _drop_collinear([(xs[i], ys[j]) for i, j in ring])
+            rings[cid].append(ring)
+
+    polygons = []
+    for cid in sorted(rings):
+        outer = [r for r in rings[cid] if signed_area(r) > 0]
+        inner = [r for r in rings[cid] if signed_area(r) < 0]
+        polygons.append((outer[0], inner))
+    return polygons
+
+def rect_to_box(geometry: Dict) -> BBox:
+    """Bounds of a RECT feature geometry {x, y, w, h} (x, y = center)."""
+    hw, hh = geometry['w'] / 2, geometry['h'] / 2
+    return (geometry['x'] - hw, geometry['y'] - hh, geometry['x'] + hw, geometry['y'] + hh)
+
+# --- Convex polygons ---
+
+def _ccw(ring: Sequence[Point]) -> Ring:
+    ring = [tuple(p) for p in ring]
+    return ring if signed_area(ring) > 0 else ring[::-1]
+
+def convex_hull(points: Sequence[Point]) -> Ring:
+    """Counter-clockwise hull (monotone chain), collinear points dropped."""
+    pts = sorted(set(tuple(p) for p in points))
+    if len(pts) < 3:
+        return pts
+
+    def half(seq):
+        out = []
+        for p in seq:
+            while len(out) >= 2 and ((out[-1][0] - out[-2][0]) * (p[1] - out[-2][1])
+                                     - (out[-1][1] - out[-2][1]) * (p[0] - out[-2][0])) <= 0:
+                out.pop()
+            out.append(p)
+        return out[:-1]
+
+    return half(pts) + half(reversed(pts))
+
+def clip_convex(a: Sequence[Point], b: Sequence[Point]) -> Ring:
+    """a intersected with the convex polygon b (Sutherland-Hodgman); empty when they do not overlap."""
+    out = _ccw(a)
+    b = _ccw(b)
+    for i in range(len(b)):
+        (x1, y1), (x2, y2) = b[i], b[(i + 1) % len(b)]
+
+        def side(p):  # > 0 left of the edge, i.e. inside
+            return (x2 - x1) * (p[1] - y1) - (y2 - y1) * (p[0] - x1)
+
+        ring, out = out, []
+        for k, p in enumerate(ring):
+            q = ring[k - 1]
+            sp, sq = side(p), side(q)
+            if (sp >= 0) != (sq >= 0):
+                t = sq / (sq - sp)
+                out.append((q[0] + (p[0] - q[0]) * t, q[1] + (p[1] - q[1]) * t))
+            if sp >= 0:
+                out.append(p)
+        if not out:
+            return []
+    return out
+
+def _segment_hit(p1: Point, p2: Point, q1: Point, q2: Point):
+    """(t, u) parameters of a proper crossing of p1p2 and q1q2, or None."""
+    rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+    sx, sy = q2[0] - q1[0], q2[1] - q1[1]
+    denom = rx * sy - ry * sx
+    if denom == 0:
+        return None
+    qx, qy = q1[0] - p1[0], q1[1] - p1[1]
+    t = (qx * sy - qy * sx) / denom
+    u = (qx * ry - qy * rx) / denom
+    if 0 < t < 1 and 0 < u < 1:
+        return t, u
+    return None
+
+# --- Overlap tests ---
+
+def in_shape(p: Point, rings: Sequence[Sequence[Point]]) -> bool:
+    """Even-odd over the outer ring and its holes."""
+    inside = False
+    for ring in rings:
+        if point_in_ring(p, ring):
+            inside = not inside
+    return inside
+
+def _edges_near(rings, window):
+    """Edges whose bounding box touches window (x1, y1, x2, y2): the only ones that can cross inside it."""
+    x1, y1, x2, y2 = window
+    return [(r[i - 1], r[i]) for r in rings for i in range(len(r))
+            if min(r[i - 1][0], r[i][0]) <= x2 and max(r[i - 1][0], r[i][0]) >= x1
+            and min(r[i - 1][1], r[i][1]) <= y2 and max(r[i - 1][1], r[i][1]) >= y1]
+
+def _edges_cross(a, b, window) -> bool:
+    edges_b = _edges_near(b, window)
+    for p1, p2 in _edges_near(a, window):
+        for q1, q2 in edges_b:
+            if _segment_hit(p1, p2, q1, q2):
+                return True
+    return False
+
+def _grid_cells(rings, window):
+    """Cells (x1, y1, x2, y2) of the grid of the rings' coordinates inside window (x1, y1, x2, y2)."""
+    x1, y1, x2, y2 = window
+    xs = sorted({x1, x2} | {p[0] for r in rings for p in r if x1 < p[0] < x2})
+    ys = sorted({y1, y2} | {p[1] for r in rings for p in r if y1 < p[1] < y2})
+    return [(u, s, v, t) for u, v in zip(xs, xs[1:]) for s, t in zip(ys, ys[1:])]
+
+def _grid_centers(rings, window):
+    """Cell centers of the grid of the rings' coordinates inside window (x1, y1, x2, y2)."""
+    return [((u + v) / 2, (s + t) / 2) for u, s, v, t in _grid_cells(rings, window)]
+
+def _common_box(a, b):
+    x1 = max(min(p[0] for p in a[0]), min(p[0] for p in b[0]))
+    x2 = min(max(p[0] for p in a[0]), max(p[0] for p in b[0]))
+    y1 = max(min(p[1] for p in a[0]), min(p[1] for p in b[0]))
+    y2 = min(max(p[1] for p in a[0]), max(p[1] for p in b[0]))
+    return x1, y1, x2, y2
+
+def polygons_overlap(a: Sequence[Sequence[Point]], b: Sequence[Sequence[Point]]) -> bool:
+    """True if the interiors of two polygons (outer ring, then holes) overlap; touching edges do not count.
+
+    A proper crossing of two edges is an overlap. Otherwise the shapes are
+    tested at the cell centers of the grid of both shapes' coordinates inside
+    the common bounding box, which is exact for axis-aligned outlines (every
+    generator's) and misses only slivers between slanted edges.
+    """
+    x1, y1, x2, y2 = _common_box(a, b)
+    if x1 >= x2 or y1 >= y2:
+        return False
+    if _edges_cross(a, b, (x1, y1, x2, y2)):
+        return True
+    return any(in_shape(c, a) and in_shape(c, b) for c in _grid_centers(list(a) + list(b), (x1, y1, x2, y2)))
+
+def overlap_extent(a: Sequence[Sequence[Point]], b: Sequence[Sequence[Point]]):
+    """(area, box) the interiors of two polygons share, from the grid cells of polygons_overlap.
+
+    Exact for axis-aligned outlines; along slanted edges each cell counts
+    whole or not at all. (0.0, None) when only slivers along crossing edges
+    are shared.
+    """
+    x1, y1, x2, y2 = _common_box(a, b)
+    if x1 >= x2 or y1 >= y2:
+        return 0.0, None
+    cells = [(u, s, v, t) for u, s, v, t in _grid_cells(list(a) + list(b), (x1, y1, x2, y2))
+             if in_shape(((u + v) / 2, (s + t) / 2), a) and in_shape(((u + v) / 2, (s + t) / 2), b)]
+    if not cells:
+        return 0.0, None
+    area = sum((v - u) * (t - s) for u, s, v, t in cells)
+    us, ss, vs, ts = zip(*cells)
+    return area, (min(us), min(ss), max(vs), max(ts))
+
+def polygon_within(a: Sequence[Sequence[Point]], b: Sequence[Sequence[Point]]) -> bool:
+    """True if polygon `a` lies inside polygon `b` (edges may touch), tested like polygons_overlap."""
+    window = (min(p[0] for p in a[0]), min(p[1] for p in a[0]), max(p[0] for p in a[0]), max(p[1] for p in a[0]))
+    if _edges_cross(a, b, window):
+        return False
+    return all(in_shape(c, b) for c in _grid_centers(list(a) + list(b), window) if in_shape(c, a))
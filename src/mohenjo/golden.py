@@ -0,0 +1,115 @@
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+@dataclass(frozen=True)
+class Tolerance:
+    """How far a render may drift from its golden output and still match."""
+    pixel: int = 0          # Gray levels a pixel may move without counting as changed
+    changed: float = 0.0    # Share of the pixels allowed to change
+    ssim: float = 1.0       # Lowest mean structural similarity
+    number: float = 0.0     # SVG: how far a number may move
+
+# PIL computes polygon edges in float32, so an equivalent rewrite may still flip a few edge
+# pixels. At the golden DPI one house moved by a metre already changes more than this
+GOLDEN_TOLERANCE = Tolerance(pixel=0, changed=0.0001, ssim=0.999, number=1e-6)
+SSIM_WINDOW = 7  # Pixels; a few pixels of a wall at the golden DPI
+
+@dataclass
+class ImageDiff:
+    ok: bool
+    max_diff: int           # Largest gray difference (-1 when the sizes or modes differ)
+    changed: float          # Share of pixels that moved by more than the pixel tolerance
+    ssim: float
+    box: Optional[Tuple[int, int, int, int]] = None  # Bounds of the changed pixels
+    detail: str = ""
+
+    def __str__(self) -> str:
+        if self.detail:
+            return self.detail
+        return (f"{self.changed:.4%} of pixels changed (max {self.max_diff} levels, in {self.box}), "
+                f"SSIM {self.ssim:.5f}")
+
+def _window_means(x: np.ndarray, w: int) -> np.ndarray:
+    """Mean of every w x w window (fully inside x), from a summed-area table."""
+    s = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (s[w:, w:] - s[:-w, w:] - s[w:, :-w] + s[:-w, :-w]) / (w * w)
+
+def ssim(a: np.ndarray, b: np.ndarray, data_range: float = 255.0, window: int = SSIM_WINDOW) -> float:
+    """Mean structural similarity of two gray images (uniform window, the usual constants)."""
+    a = a.astype(np.float64) / data_range
+    b = b.astype(np.float64) / data_range
+    w = min(window, *a.shape)
+    ma, mb = _window_means(a, w), _window_means(b, w)
+    va = _window_means(a * a, w) - ma * ma
+    vb = _window_means(b * b, w) - mb * mb
+    cov = _window_means(a * b, w) - ma * mb
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+    s = ((2 * ma * mb + c1) * (2 * cov + c2)) / ((ma * ma + mb * mb + c1) * (va + vb + c2))
+    return float(s.mean())
+
+def compare_images(expected: Image.Image, actual: Image.Image, tolerance: Tolerance = GOLDEN_TOLERANCE) -> ImageDiff:
+    """Per-pixel and structural comparison of a render with its golden image."""
+    if expected.size != actual.size or expected.mode != actual.mode:
+        return ImageDiff(False, -1, 1.0, 0.0,
+                         detail=f"{actual.mode} {actual.size} instead of {expected.mode} {expected.size}")
+    a, b = np.asarray(expected), np.asarray(actual)
+    diff = np.abs(a.astype(np.int64) - b)
+    moved = diff > tolerance.pixel
+    box = None
+    if moved.any():
+        ys, xs = np.nonzero(moved)
+        box = (int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+    changed = float(moved.mean())
+    score = ssim(a, b, 65535.0 if a.dtype == np.uint16 else 255.0)
+    return ImageDiff(changed <= tolerance.changed and score >= tolerance.ssim, int(diff.max()), changed, score, box)
+
+def diff_image(expected: Image.Image, actual: Image.Image, tolerance: Tolerance = GOLDEN_TOLERANCE) -> Image.Image:
+    """The golden image dimmed, with the changed pixels in white (same size and mode only)."""
+    a, b = np.asarray(expected).astype(np.int64), np.asarray(actual).astype(np.int64)
+    scale = 257 if a.dtype == np.uint16 else 1
+    out = np.where(np.abs(a - b) > tolerance.pixel, 255, a // (4 * scale))
+    return Image.fromarray(out.astype(np.uint8))
+
+# --- SVG ---
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+def _values_match(a: str, b: str, tolerance: float) -> bool:
+    if a == b:
+        return True
+    if NUMBER.sub("#", a) != NUMBER.sub("#", b):
+        return False
+    return all(abs(float(x) - float(y)) <= tolerance for x, y in zip(NUMBER.findall(a), NUMBER.findall(b)))
+
+def _tag(element: ET.Element) -> str:
+    return element.tag.rsplit('}', 1)[-1]
+
+def compare_svg(expected: str, actual: str, tolerance: Tolerance = GOLDEN_TOLERANCE, limit: int = 10) -> List[str]:
+    """Differences between two SVG documents, element by element (at most `limit`); empty when they match.
+
+    Elements must come in the same order with the same tags, attributes and
+    text; numbers inside attribute values may move by tolerance.number.
+    """
+    old, new = list(ET.fromstring(expected).iter()), list(ET.fromstring(actual).iter())
+    problems = []
+    if len(old) != len(new):
+        problems.append(f"{len(new)} elements instead of {len(old)}")
+    for k, (a, b) in enumerate(zip(old, new)):
+        where = f"element {k} <{_tag(a)}>"
+        if a.tag != b.tag:
+            problems.append(f"{where} became <{_tag(b)}>")
+        elif set(a.attrib) != set(b.attrib):
+            problems.append(f"{where} attributes {sorted(a.attrib)} became {sorted(b.attrib)}")
+        else:
+            problems += [f"{where} {name}: {a.attrib[name]!r} -> {b.attrib[name]!r}" for name in a.attrib
+                         if not _values_match(a.attrib[name], b.attrib[name], tolerance.number)]
+            if (a.text or "").strip() != (b.text or "").strip():
+                problems.append(f"{where} text {a.text!r} -> {b.text!r}")
+        if len(problems) >= limit:
+            break
+    return problems[:limit]
@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from .raster import LEVEL_GROUND, LEVEL_STREET, LEVEL_BUILDING
+
+# Rasterizers draw height codes, not grays: code = (height - HEIGHT_MIN_M) / HEIGHT_STEP_M,
+# so one 8-bit buffer holds -5 m .. +20.5 m in 10 cm steps. A calibration turns the
+# codes into laser grays in a single lookup-table pass (Image.point).
+HEIGHT_STEP_M = 0.1
+HEIGHT_MIN_M = -5.0
+
+STREET_HEIGHT_M = -1.0   # Streets are channels below the ground
+GROUND_HEIGHT_M = 0.0    # Area datum (courtyards, open ground)
+GROUND_BAND_M = 0.9      # Terrain relief stays within this of the datum, between streets and roofs
+DEFAULT_BUILDING_HEIGHT_M = 4.0  # Generated houses and landmarks without height_m
+
+def height_code(height_m: float) -> int:
+    return min(255, max(0, int(round((height_m - HEIGHT_MIN_M) / HEIGHT_STEP_M))))
+
+def code_height(code: int) -> float:
+    return HEIGHT_MIN_M + code * HEIGHT_STEP_M
+
+class Calibration:
+    """Maps heights (metres above the area datum) to laser gray levels."""
+
+    def gray(self, height_m: float) -> int:
+        raise NotImplementedError
+
+    def lut(self) -> List[int]:
+        """256-entry table from height code to gray, for Image.point."""
+        if not hasattr(self, '_lut'):
+            self._lut = [self.gray(code_height(c)) for c in range(256)]
+        return self._lut
+
+    def apply(self, image):
+        """Height-code image -> gray image."""
+        return image.point(self.lut())
+
+    def gray16(self, height_m: float) -> int:
+        """16-bit gray (0-65535); curves that round to 8 bits override this to keep the fraction."""
+        return self.gray(height_m) * 257
+
+    def lut16(self) -> List[int]:
+        if not hasattr(self, '_lut16'):
+            self._lut16 = [self.gray16(code_height(c)) for c in range(256)]
+        return self._lut16
+
+    def apply16(self, image):
+        """Height-code image -> 16-bit gray image (mode I;16)."""
+        import numpy as np  # Only 16-bit output needs numpy
+        from PIL import Image
+        return Image.fromarray(np.array(self.lut16(), np.uint16)[np.asarray(image)])
+
+@dataclass
+class LegacyLevels(Calibration):
+    """The original three levels: streets, ground, white roofs.
+
+    Ground relief (terrain) is shaded around `ground` by `gray_per_m`;
+    every building prints white whatever its height.
+    """
+    street: int = LEVEL_STREET
+    ground: int = LEVEL_GROUND
+    building: int = LEVEL_BUILDING
+    gray_per_m: float = 8.0
+
+    def exact_gray(self, height_m) -> float:
+        if height_m < STREET_HEIGHT_M + HEIGHT_STEP_M / 2:
+            return self.street
+        if height_m > GROUND_BAND_M + HEIGHT_STEP_M / 2:
+            return self.building
+        return min(255, max(0, self.ground + height_m * self.gray_per_m))
+
+    def gray(self, height_m):
+        return int(round(self.exact_gray(height_m)))
+
+    def gray16(self, height_m):
+        # 10 cm of relief is under one 8-bit gray step; 16 bits keep them apart
+        return int(round(self.exact_gray(height_m) * 257))
+
+@dataclass
+class MaterialCurve(Calibration):
+    """Height -> burn depth -> gray for one material and laser setting.
+
+    The tallest roof (`top_m`) stays unburnt and streets (`bottom_m`) get
+    `max_depth_mm`; heights in between are scaled linearly and snapped to
+    `levels` depths the material can hold apart. `points` is the measured
+    test card: (gray, depth in mm) pairs, interpolated piecewise-linearly.
+    """
+    name: str
+    points: List[Tuple[int, float]]
+    max_depth_mm: float
+    levels: int = 6
+    top_m: float = 8.0
+    bottom_m: float = STREET_HEIGHT_M
+
+    def depth(self, height_m: float) -> float:
+        h = min(self.top_m, max(self.bottom_m, height_m))
+        depth = (self.top_m - h) / (self.top_m - self.bottom_m) * self.max_depth_mm
+        if self.levels > 1:
+            step = self.max_depth_mm / (self.levels - 1)
+            depth = round(depth / step) * step
+        return depth
+
+    def exact_gray_for_depth(self, depth_mm: float) -> float:
+        points = sorted(self.points, key=lambda p: p[1])  # By depth, shallow first
+        if depth_mm <= points[0][1]:
+            return points[0][0]
+        for (g1, d1), (g2, d2) in zip(points, points[1:]):
+            if depth_mm <= d2:
+                t = (depth_mm - d1) / (d2 - d1) if d2 > d1 else 0.0
+                return g1 + (g2 - g1) * t
+        return points[-1][0]
+
+    def gray_for_depth(self, depth_mm: float) -> int:
+        return int(round(self.exact_gray_for_depth(depth_mm)))
+
+    def gray(self, height_m):
+        return self.gray_for_depth(self.depth(height_m))
+
+    def gray16(self, height_m):
+        return int(round(self.exact_gray_for_depth(self.depth(height_m)) * 257))
+
+# Starting curves from the LaserPecker tests in doc/laser_cutting_workflow.md
+# (1.3K, 100% power); re-measure with a test card when the board size or settings change.
+MATERIALS: Dict[str, MaterialCurve] = {
+    # 3mm MDF, depth 20-25%, 3-4 passes: streets ~1 mm, roofs flat
+    "mdf": MaterialCurve("mdf", [(255, 0.0), (200, 0.15), (128, 0.5), (50, 0.85), (0, 1.1)],
+                         max_depth_mm=1.0, levels=6),
+    # Balsa, depth 25%, 1 pass: soft, burns deeper per gray step
+    "balsa": MaterialCurve("balsa", [(255, 0.0), (180, 0.4), (100, 1.0), (0, 1.6)],
+                           max_depth_mm=1.4, levels=5),
+    # EVA foam, depth 5%, 1 pass: melts fast, keep few well separated levels
+    "eva": MaterialCurve("eva", [(255, 0.0), (160, 0.5), (60, 1.2), (0, 1.5)],
+                         max_depth_mm=1.2, levels=4),
+}
@@ -0,0 +1,143 @@
+import os
+from dataclasses import astuple, dataclass, field
+from typing import List, Optional
+
+from PIL import Image
+
+from .registry import Landmark, LandmarkRegistry, ProceduralFeature
+from .areas import PrintArea
+from .spatial import BBox, bbox_of_points, bbox_pad
+from .raster import DPI, px_box_intersects
+
+@dataclass
+class LandmarkChange:
+    id: str
+    old_bounds: Optional[BBox]  # None if the landmark was added
+    new_bounds: Optional[BBox]  # None if the landmark was removed
+
+    @property
+    def kind(self) -> str:
+        if self.old_bounds is None:
+            return "added"
+        if self.new_bounds is None:
+            return "removed"
+        return "changed"
+
+    @property
+    def boxes(self) -> List[BBox]:
+        return [b for b in (self.old_bounds, self.new_bounds) if b is not None]
+
+def landmark_signature(lm: Landmark) -> tuple:
+    """Everything about a landmark that can affect generation or rasterization.
+
+    The category, zone kind and district pick generators, obstacle rules and
+    styles; a zone's name ends up in its features' descriptions.
+    """
+    return (lm.abs_x, lm.abs_y, astuple(lm.dimensions), lm.shape, lm.region, lm.height_m, lm.category, lm.name,
+            lm.zone_kind, lm.district)
+
+def diff_registries(old: LandmarkRegistry, new: LandmarkRegistry) -> List[LandmarkChange]:
+    """Landmarks that were added, removed or changed between two registries.
+
+    Compares resolved coordinates, so moving a parent also reports every
+    landmark placed relative to it.
+    """
+    changes = []
+    for lm_id, lm in new.landmarks.items():
+        prev = old.landmarks.get(lm_id)
+        if prev is None:
+            changes.append(LandmarkChange(lm_id, None, lm.get_bounds()))
+        elif landmark_signature(prev) != landmark_signature(lm):
+            changes.append(LandmarkChange(lm_id, prev.get_bounds(), lm.get_bounds()))
+    for lm_id, prev in old.landmarks.items():
+        if lm_id not in new.landmarks:
+            changes.append(LandmarkChange(lm_id, prev.get_bounds(), None))
+    return changes
+
+@dataclass
+class RegenResult:
+    features: List[ProceduralFeature]   # The area's features after patching, in generation order
+    full: bool = False                  # True if the area had to be regenerated from scratch
+    considered: int = 0                 # Candidates re-collided
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    dirty: List[BBox] = field(default_factory=list)  # World boxes whose pixels need re-rasterizing
+
+def regenerate_area(area: PrintArea, registry: LandmarkRegistry, changes: List[LandmarkChange],
+                    existing: List[ProceduralFeature]) -> RegenResult:
+    """Re-collides only the candidates whose bounds touch a changed landmark.
+
+    Collision is a plain AABB test against obstacles, so a candidate can only
+    change state if the old or the new box of some changed landmark overlaps
+    it. Everything else keeps its persisted feature. The result is the same
+    feature list a full run of the area generator would produce.
+    """
+    current = area.own_features(registry, existing)
+    structural = area.zone_ids(registry) | {area.area_id}
+    if any(c.id in structural for c in changes):
+        # A zone moved or resized: every local->global transform changed
+        features, considered = area.generate(registry, verbose=False)
+        return RegenResult(features, full=True, considered=len(considered),
+                           added=[f.id for f in features], removed=[f.id for f in current])
+
+    dirty = [b for c in changes for b in c.boxes]
+    if not dirty:
+        return RegenResult(current)
+
+    patch, considered = area.generate(registry, dirty=dirty, verbose=False)
+    patch_by_id = {f.id: f for f in patch}
+    merged = {f.id: f for f in current if f.id not in considered}
+    merged.update(patch_by_id)
+    features = [merged[i] for i in area.canonical_ids(registry) if i in merged]
+
+    current_by_id = {f.id: f for f in current}
+    added = [f for f in patch
+             if f.id not in current_by_id or _points(current_by_id[f.id]) != _points(f)]
+    removed = [f for f in current if f.id in considered and f.id not in patch_by_id]
+
+    # Pixels to redraw: the changed landmarks (1m ground clearing around overlays)
+    # and every feature that appeared or disappeared.
+    raster_dirty = [bbox_pad(b, 1.0) for b in dirty]
+    raster_dirty.extend(bbox_of_points(f.geometry['points']) for f in added + removed)
+
+    return RegenResult(features, considered=len(considered),
+                       added=[f.id for f in added], removed=[f.id for f in removed],
+                       dirty=raster_dirty)
+
+def _points(pf: ProceduralFeature) -> List[tuple]:
+    # Persisted points come back from YAML as lists, generated ones are tuples
+    return [tuple(p) for p in pf.geometry['points']]
+
+def rerasterize_area(area: PrintArea, registry: LandmarkRegistry, result: RegenResult,
+                     output_dir: str, dpi: int = DPI, redraw_all: bool = False) -> List[str]:
+    """Patches the dirty regions of the saved full print and rewrites only the tiles they touch.
+
+    `redraw_all` re-rasters the whole print even if the features were patched
+    (e.g. the terrain under them changed).
+    """
+    canvas = area.canvas(registry, dpi)
+    full_path = os.path.join(output_dir, f"{area.prefix}_full.png")
+    tiles = area.tiles(canvas)
+
+    img = None
+    if not (result.full or redraw_all) and os.path.exists(full_path):
+        img = Image.open(full_path).convert('L')
+        if img.size != canvas.size:
+            img = None
+
+    if img is None:
+        img = area.rasterize(registry, result.features, canvas)
+        return area.save_outputs(img, canvas, output_dir)
+
+    boxes = []
+    for world_box in result.dirty:
+        box = canvas.world_bbox_to_px(world_box)
+        if box[2] > box[0] and box[3] > box[1]:
+            boxes.append(box)
+    if not boxes:
+        return []
+
+    for box in boxes:
+        img.paste(area.rasterize(registry, result.features, canvas, box), box[:2])
+    affected = [t for t in tiles if any(px_box_intersects(t.box, b) for b in boxes)]
+    return area.save_outputs(img, canvas, output_dir, affected)
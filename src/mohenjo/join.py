@@ -0,0 +1,282 @@
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .geometry import in_shape, polygon_within, polygons_overlap
+from .registry import QUERY_EPS, Landmark, feature_bounds
+
+BIG_CELLS = 64        # Boxes covering more grid cells are tested against the other side directly
+PAIR_CHUNK = 1 << 22  # Candidate pairs per numpy pass
+PREDICATES = ("intersects", "within", "center")
+
+Pairs = Tuple[np.ndarray, np.ndarray]
+
+class Shapes:
+    """Landmarks and/or procedural features as columns: `boxes` (N x 4) and exact `outlines`.
+
+    Plain axis-aligned 4-point polygons (most houses) are read in one numpy
+    pass and keep outline None: their box is their shape. Landmarks are their
+    extent box.
+    """
+
+    def __init__(self, items: Sequence):
+        self.items = list(items)
+        self.ids = [item.id for item in self.items]
+        self.boxes = np.zeros((len(self.items), 4))
+        self.outlines: List[Optional[list]] = [None] * len(self.items)
+        quads = [k for k, item in enumerate(self.items) if not isinstance(item, Landmark)
+                 and len(item.geometry.get('points', ())) == 4 and not item.geometry.get('holes')]
+        is_box = np.zeros(len(self.items), bool)
+        if quads:
+            pts = np.array([self.items[k].geometry['points'] for k in quads], float)
+            xs, ys = np.sort(pts[:, :, 0], axis=1), np.sort(pts[:, :, 1], axis=1)
+            is_box[quads] = ((xs[:, 0] == xs[:, 1]) & (xs[:, 2] == xs[:, 3]) & (xs[:, 1] < xs[:, 2])
+                             & (ys[:, 0] == ys[:, 1]) & (ys[:, 2] == ys[:, 3]) & (ys[:, 1] < ys[:, 2]))
+            self.boxes[quads] = np.c_[xs[:, 0], ys[:, 0], xs[:, 3], ys[:, 3]]
+        for k in np.flatnonzero(~is_box).tolist():
+            item = self.items[k]
+            if isinstance(item, Landmark):
+                self.boxes[k] = item.get_extent()
+                continue
+            self.boxes[k] = feature_bounds(item)
+            if 'points' in item.geometry:
+                self.outlines[k] = [item.geometry['points']] + list(item.geometry.get('holes', ()))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+
+    def outline(self, i: int):
+        if self.outlines[i] is not None:
+            return self.outlines[i]
+        x1, y1, x2, y2 = self.boxes[i]
+        return [[(x1, y1), (x2, y1), (x2, y2), (x1, y2)]]
+
+# --- Box joins (grid hash, all numpy) ---
+# Boxes are listed in every grid cell they cover and the lists sorted by cell;
+# boxes sharing a cell are candidates. A pair sharing several cells is kept
+# only in the cell holding the lower-left corner of its intersection.
+
+def _as_boxes(boxes) -> np.ndarray:
+    return np.asarray(boxes, float).reshape(-1, 4)
+
+def _pick_cell(*box_sets) -> float:
+    """About twice a typical box, so most boxes cover 1-4 cells."""
+    boxes = np.concatenate(box_sets)
+    return 2 * float(np.median(np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]))) or 1.0
+
+def _grid(boxes: np.ndarray, cell: float):
+    """(cell range N x 4, big mask)."""
+    cells = np.floor(boxes / cell).astype(np.int64)
+    covered = (cells[:, 2] - cells[:, 0] + 1) * (cells[:, 3] - cells[:, 1] + 1)
+    return cells, covered > BIG_CELLS
+
+def _entries(cells: np.ndarray, big: np.ndarray):
+    """(item, cx, cy): one entry per cell covered by each small box."""
+    small = np.flatnonzero(~big)
+    span_x = cells[small, 2] - cells[small, 0] + 1
+    reps = span_x * (cells[small, 3] - cells[small, 1] + 1)
+    item = np.repeat(small, reps)
+    k = np.arange(len(item)) - np.repeat(np.cumsum(reps) - reps, reps)
+    span = np.repeat(span_x, reps)
+    return item, cells[item, 0] + k % span, cells[item, 1] + k // span
+
+def _cell_key(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """One integer per cell, for a single argsort instead of a lexsort."""
+    if not len(cx):
+        return cx
+    return (cx - cx.min()) * (int(cy.max() - cy.min()) + 1) + (cy - cy.min())
+
+def _chunks(counts: np.ndarray) -> Iterator[np.ndarray]:
+    """Positions with counts > 0, in runs of about PAIR_CHUNK total count."""
+    pos = np.flatnonzero(counts)
+    ends = np.cumsum(counts[pos])
+    lo = 0
+    while lo < len(pos):
+        hi = max(int(np.searchsorted(ends, (ends[lo - 1] if lo else 0) + PAIR_CHUNK, 'right')), lo + 1)
+        yield pos[lo:hi]
+        lo = hi
+
+def _expand(pos: np.ndarray, counts: np.ndarray, first: np.ndarray) -> Pairs:
+    """Entry pairs (pos[k], first[k] + 0 .. counts[k] - 1)."""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(pos, counts), np.repeat(first, counts) + offsets
+
+def _overlap(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a[:, 0] < b[:, 2]) & (a[:, 2] > b[:, 0]) & (a[:, 1] < b[:, 3]) & (a[:, 3] > b[:, 1])
+
+def _in_reference_cell(a: np.ndarray, b: np.ndarray, cx: np.ndarray, cy: np.ndarray, cell: float) -> np.ndarray:
+    return ((np.floor(np.maximum(a[:, 0], b[:, 0]) / cell).astype(np.int64) == cx)
+            & (np.floor(np.maximum(a[:, 1], b[:, 1]) / cell).astype(np.int64) == cy))
+
+def _sorted_pairs(found_i, found_j) -> Pairs:
+    if not found_i:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    i, j = np.concatenate(found_i).astype(np.int64), np.concatenate(found_j).astype(np.int64)
+    order = np.lexsort((j, i))
+    return i[order], j[order]
+
+def overlap_pairs(boxes, cell: Optional[float] = None) -> Pairs:
+    """(i, j) index arrays, i < j, of every pair of boxes (N x 4) that strictly overlap."""
+    boxes = _as_boxes(boxes)
+    if len(boxes) < 2:
+        return _sorted_pairs([], [])
+    cell = cell or _pick_cell(boxes)
+    cells, big = _grid(boxes, cell)
+    item, cx, cy = _entries(cells, big)
+    key = _cell_key(cx, cy)
+    order = np.argsort(key, kind='stable')
+    key, item, cx, cy = key[order], item[order], cx[order], cy[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(item)]
+    # Each entry pairs with the ones after it in its cell
+    partners = np.repeat(ends, ends - starts) - np.arange(len(item)) - 1
+
+    found_i, found_j = [], []
+    for pos in _chunks(partners):
+        left, right = _expand(pos, partners[pos], pos + 1)
+        hit = np.flatnonzero(_overlap(boxes[item[left]], boxes[item[right]]))
+        left, right = left[hit], right[hit]
+        i, j = item[left], item[right]
+        hit = _in_reference_cell(boxes[i], boxes[j], cx[left], cy[left], cell)
+        found_i.append(np.minimum(i[hit], j[hit]))
+        found_j.append(np.maximum(i[hit], j[hit]))
+    for b in np.flatnonzero(big):
+        hit = _overlap(boxes, boxes[b:b + 1])
+        hit[b] = False
+        hit[:b] &= ~big[:b]  # Big-big pairs once, from the earlier one
+        others = np.flatnonzero(hit)
+        found_i.append(np.minimum(others, b))
+        found_j.append(np.maximum(others, b))
+    return _sorted_pairs(found_i, found_j)
+
+def box_join(left, right, cell: Optional[float] = None) -> Pairs:
+    """(i, j) index arrays of every left[i], right[j] pair of boxes that strictly overlap, sorted."""
+    left, right = _as_boxes(left), _as_boxes(right)
+    if not len(left) or not len(right):
+        return _sorted_pairs([], [])
+    cell = cell or _pick_cell(left, right)
+    lcells, lbig = _grid(left, cell)
+    rcells, rbig = _grid(right, cell)
+    li, lx, ly = _entries(lcells, lbig)
+    ri, rx, ry = _entries(rcells, rbig)
+    item = np.r_[li, ri]
+    side = np.r_[np.zeros(len(li), np.int8), np.ones(len(ri), np.int8)]
+    cx, cy = np.r_[lx, rx], np.r_[ly, ry]
+    # Per cell: left entries, then right ones
+    key = _cell_key(cx, cy) * 2 + side
+    order = np.argsort(key, kind='stable')
+    key, item, side, cx, cy = key[order] // 2, item[order], side[order], cx[order], cy[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else key
+    ends = np.r_[starts[1:], len(item)]
+    lefts = np.add.reduceat((side == 0).astype(np.int64), starts) if len(starts) else starts
+    right_start = np.repeat(starts + lefts, ends - starts)
+    partners = np.where(side == 0, np.repeat(ends, ends - starts) - right_start, 0)
+
+    found_i, found_j = [], []
+    for pos in _chunks(partners):
+        a, b = _expand(pos, partners[pos], right_start[pos])
+        hit = np.flatnonzero(_overlap(left[item[a]], right[item[b]]))
+        a, b = a[hit], b[hit]
+        i, j = item[a], item[b]
+        hit = _in_reference_cell(left[i], right[j], cx[a], cy[a], cell)
+        found_i.append(i[hit])
+        found_j.append(j[hit])
+    for b in np.flatnonzero(lbig):
+        others = np.flatnonzero(_overlap(right, left[b:b + 1]))
+        found_i.append(np.full(len(others), b))
+        found_j.append(others)
+    for b in np.flatnonzero(rbig):
+        others = np.flatnonzero(_overlap(left, right[b:b + 1]) & ~lbig)  # Big-big pairs came from the left
+        found_i.append(others)
+        found_j.append(np.full(len(others), b))
+    return _sorted_pairs(found_i, found_j)
+
+# --- Spatial join (boxes, then the exact test) ---
+
+def _contains(outer: np.ndarray, inner: np.ndarray) -> np.ndarray:
+    return ((outer[:, 0] <= inner[:, 0]) & (outer[:, 1] <= inner[:, 1])
+            & (inner[:, 2] <= outer[:, 2]) & (inner[:, 3] <= outer[:, 3]))
+
+def _exact(left: Shapes, right: Shapes, i: int, j: int, predicate: str) -> bool:
+    if predicate == "intersects":
+        return polygons_overlap(left.outline(i), right.outline(j))
+    if predicate == "within":
+        return polygon_within(left.outline(i), right.outline(j))
+    x, y = left.centers[i]
+    return in_shape((x, y), right.outline(j))
+
+def spatial_join(left, right, predicate: str = "intersects", cell: Optional[float] = None) -> Pairs:
+    """(i, j) index arrays of left[i], right[j] pairs that satisfy `predicate`, sorted.
+
+    `left` / `right` are Shapes or sequences of landmarks and procedural features.
+      intersects: interiors overlap (touching does not count)
+      within:     left lies inside right (edges may touch)
+      center:     left's box center lies inside right
+    Candidates come from box_join; only pairs where an outline is not its
+    box get the exact polygon test. An item paired with itself (a collection
+    joined with itself) always matches.
+    """
+    if predicate not in PREDICATES:
+        raise ValueError(f"Unknown predicate {predicate!r} (expected one of {', '.join(PREDICATES)})")
+    left = left if isinstance(left, Shapes) else Shapes(left)
+    right = right if isinstance(right, Shapes) else Shapes(right)
+    if predicate == "center":
+        centers = left.centers
+        points = np.c_[centers - QUERY_EPS, centers + QUERY_EPS]  # Tiny boxes; the test below is inclusive
+        i, j = box_join(points, right.boxes, cell or _pick_cell(right.boxes))
+        c, r = left.centers[i], right.boxes[j]
+        keep = (r[:, 0] <= c[:, 0]) & (c[:, 0] <= r[:, 2]) & (r[:, 1] <= c[:, 1]) & (c[:, 1] <= r[:, 3])
+    else:
+        i, j = box_join(left.boxes, right.boxes, cell)
+        keep = np.ones(len(i), bool) if predicate == "intersects" else _contains(right.boxes[j], left.boxes[i])
+    i, j = i[keep], j[keep]
+    # Box tests are exact when both shapes are boxes ("center" and "within" only need the right one to be)
+    has_outline = np.array([o is not None for o in right.outlines], bool)[j]
+    if predicate == "intersects":
+        has_outline |= np.array([o is not None for o in left.outlines], bool)[i]
+    if left is right:
+        has_outline &= i != j
+    check = np.flatnonzero(has_outline)
+    if len(check):
+        fails = [k for k in check.tolist() if not _exact(left, right, int(i[k]), int(j[k]), predicate)]
+        keep = np.ones(len(i), bool)
+        keep[fails] = False
+        i, j = i[keep], j[keep]
+    return i, j
+
+def nested_loop_join(left, right, predicate: str = "intersects") -> Pairs:
+    """spatial_join by testing every pair in Python: the reference the benchmark compares against."""
+    left = left if isinstance(left, Shapes) else Shapes(left)
+    right = right if isinstance(right, Shapes) else Shapes(right)
+    lboxes, rboxes = left.boxes.tolist(), right.boxes.tolist()
+    lcenters = left.centers.tolist()
+    found_i, found_j = [], []
+    for a, (ax1, ay1, ax2, ay2) in enumerate(lboxes):
+        cx, cy = lcenters[a]
+        for b, (bx1, by1, bx2, by2) in enumerate(rboxes):
+            if left.items[a] is right.items[b]:
+                pass
+            elif predicate == "center":
+                if not (bx1 <= cx <= bx2 and by1 <= cy <= by2):
+                    continue
+                if right.outlines[b] is not None and not in_shape((cx, cy), right.outlines[b]):
+                    continue
+            else:
+                if not (ax1 < bx2 and ax2 > bx1 and ay1 < by2 and ay2 > by1):
+                    continue
+                if predicate == "within":
+                    if not (bx1 <= ax1 and by1 <= ay1 and ax2 <= bx2 and ay2 <= by2):
+                        continue
+                    if right.outlines[b] is not None and not polygon_within(left.outline(a), right.outlines[b]):
+                        continue
+                elif ((left.outlines[a] is not None or right.outlines[b] is not None)
+                      and not polygons_overlap(left.outline(a), right.outline(b))):
+                    continue
+            found_i.append(a)
+            found_j.append(b)
+    return np.array(found_i, np.int64), np.array(found_j, np.int64)
@@ -0,0 +1,251 @@
+import math
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+from .raster import AreaCanvas, SCALE_RATIO
+from .heights import GROUND_HEIGHT_M
+
+Point = Tuple[float, float]
+
+# Operations
+SCORE = "score"   # Low power outline, material stays in one piece
+CUT = "cut"       # Through cut
+
+# Stages run in this order: scores first (the sheet is still whole), then holes
+# (courtyards) before the outlines that contain them, then the board edge last.
+STAGE_SCORE = 0
+STAGE_INNER_CUT = 1
+STAGE_OUTER_CUT = 2
+STAGE_FRAME = 3
+
+@dataclass
+class LaserPath:
+    id: str
+    op: str
+    stage: int
+    points: List[Point]  # Closed loop in material mm, Y down (same as the PNG); points[0] is the entry
+
+    @property
+    def length(self) -> float:
+        return sum(math.dist(a, b) for a, b in zip(self.points, self.points[1:] + self.points[:1]))
+
+@dataclass
+class LaserSettings:
+    cut_speed_mm_s: float = 4.0
+    cut_passes: int = 3          # 3mm MDF / balsa needs several passes
+    cut_power: int = 100         # Percent
+    score_speed_mm_s: float = 20.0
+    score_power: int = 30
+    travel_speed_mm_s: float = 100.0
+    raster_speed_mm_s: float = 100.0  # Engraving sweep speed, for the raster comparison
+
+class PrintFrame:
+    """Maps world meters to material millimeters, aligned with the area PNG (origin top-left)."""
+
+    def __init__(self, canvas: AreaCanvas):
+        self.canvas = canvas
+        self.width_mm = canvas.img_w / canvas.dpi * 25.4
+        self.height_mm = canvas.img_h / canvas.dpi * 25.4
+        self.mm_per_m = 1000 / SCALE_RATIO
+
+    def to_mm(self, x: float, y: float) -> Point:
+        return ((x - self.canvas.center_x) * self.mm_per_m + self.width_mm / 2,
+                (self.canvas.center_y - y) * self.mm_per_m + self.height_mm / 2)
+
+def clip_to_rect(points: List[Point], w: float, h: float) -> List[Point]:
+    """Sutherland-Hodgman clip of a polygon to [0, w] x [0, h]."""
+    edges = [(0, 0.0, True), (0, w, False), (1, 0.0, True), (1, h, False)]  # (axis, value, keep >=)
+    for axis, value, keep_above in edges:
+        if not points:
+            break
+        inside = (lambda p: p[axis] >= value) if keep_above else (lambda p: p[axis] <= value)
+        clipped = []
+        for a, b in zip(points[-1:] + points[:-1], points):
+            if inside(b):
+                if not inside(a):
+                    clipped.append(_crossing(a, b, axis, value))
+                clipped.append(b)
+            elif inside(a):
+                clipped.append(_crossing(a, b, axis, value))
+        points = clipped
+    return points
+
+def _crossing(a: Point, b: Point, axis: int, value: float) -> Point:
+    t = (value - a[axis]) / (b[axis] - a[axis])
+    p = (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t)
+    return (value, p[1]) if axis == 0 else (p[0], value)
+
+def build_paths(shapes: Sequence[Tuple[str, Sequence[Point], float]], frame: PrintFrame,
+                include_frame: bool = True, score_only: bool = False) -> List[LaserPath]:
+    """Turns (id, world outline, height) shapes into laser paths, clipped to the board.
+
+    Buildings are cut out, ground-level shapes inside them (courtyards) are
+    cut as holes, streets are scored. `score_only` scores every outline, the
+    vector counterpart of engraving the raster print.
+    """
+    paths = []
+    for shape_id, outline, height in shapes:
+        points = [frame.to_mm(x, y) for x, y in outline]
+        if len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+        points = clip_to_rect(points, frame.width_mm, frame.height_mm)
+        if len(points) < 3:
+            continue
+        if score_only:
+            paths.append(LaserPath(shape_id, SCORE, STAGE_SCORE, points))
+        elif height > GROUND_HEIGHT_M:
+            paths.append(LaserPath(shape_id, CUT, STAGE_OUTER_CUT, points))
+        elif height == GROUND_HEIGHT_M:
+            paths.append(LaserPath(shape_id, CUT, STAGE_INNER_CUT, points))
+        else:
+            paths.append(LaserPath(shape_id, SCORE, STAGE_SCORE, points))
+    if include_frame:
+        w, h = frame.width_mm, frame.height_mm
+        paths.append(LaserPath("frame", CUT, STAGE_FRAME, [(0.0, 0.0), (w, 0.0), (w, h), (0.0, h)]))
+    return paths
+
+# --- Path ordering ---
+
+def _rotate_to(path: LaserPath, index: int):
+    path.points = path.points[index:] + path.points[:index]
+
+def _nearest_neighbor(paths: List[LaserPath], start: Point) -> List[LaserPath]:
+    remaining = list(paths)
+    ordered = []
+    pos = start
+    while remaining:
+        best = None
+        for i, path in enumerate(remaining):
+            for j, p in enumerate(path.points):
+                d = (p[0] - pos[0]) ** 2 + (p[1] - pos[1]) ** 2
+                if best is None or d < best[0]:
+                    best = (d, i, j)
+        _, i, j = best
+        path = remaining.pop(i)
+        _rotate_to(path, j)
+        ordered.append(path)
+        pos = path.points[0]  # Closed loop: the head ends where it started
+    return ordered
+
+def _two_opt(paths: List[LaserPath], start: Point, max_passes: int = 20) -> List[LaserPath]:
+    """Reverses sub-sequences while that shortens the travel between entry points (open tour)."""
+    seq = list(paths)
+    n = len(seq)
+
+    def pt(k):
+        return start if k < 0 else seq[k].points[0]
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 1):
+            a = pt(i - 1)
+            b = pt(i)
+            d_ab = math.dist(a, b)
+            for j in range(i + 1, n):
+                c = pt(j)
+                # Swap edges (a,b) + (c,d) for (a,c) + (b,d); the last leg is open
+                if j + 1 < n:
+                    d = pt(j + 1)
+                    delta = math.dist(a, c) + math.dist(b, d) - d_ab - math.dist(c, d)
+                else:
+                    delta = math.dist(a, c) - d_ab
+                if delta < -1e-9:
+                    seq[i:j + 1] = reversed(seq[i:j + 1])
+                    improved = True
+                    b = pt(i)
+                    d_ab = math.dist(a, b)
+        if not improved:
+            break
+    return seq
+
+def _choose_entries(paths: List[LaserPath], start: Point):
+    """Re-picks each loop's entry vertex given its neighbours in the final order."""
+    prev = start
+    for k, path in enumerate(paths):
+        nxt = paths[k + 1].points[0] if k + 1 < len(paths) else None
+        costs = [math.dist(prev, p) + (math.dist(p, nxt) if nxt is not None else 0.0) for p in path.points]
+        _rotate_to(path, costs.index(min(costs)))
+        prev = path.points[0]
+
+def order_paths(paths: List[LaserPath], start: Point = (0.0, 0.0)) -> List[LaserPath]:
+    """Orders paths per stage to minimize head travel: nearest neighbour, then 2-opt."""
+    ordered = []
+    pos = start
+    for stage in sorted({p.stage for p in paths}):
+        group = _nearest_neighbor([p for p in paths if p.stage == stage], pos)
+        group = _two_opt(group, pos)
+        _choose_entries(group, pos)
+        ordered.extend(group)
+        pos = group[-1].points[0]
+    return ordered
+
+# --- Job estimate ---
+
+@dataclass
+class JobEstimate:
+    cut_mm: float
+    score_mm: float
+    travel_mm: float
+    seconds: float
+
+def travel_distance(paths: List[LaserPath], start: Point = (0.0, 0.0)) -> float:
+    total = 0.0
+    pos = start
+    for path in paths:
+        total += math.dist(pos, path.points[0])
+        pos = path.points[0]
+    return total
+
+def estimate_job(paths: List[LaserPath], settings: LaserSettings, start: Point = (0.0, 0.0)) -> JobEstimate:
+    cut = sum(p.length for p in paths if p.op == CUT)
+    score = sum(p.length for p in paths if p.op == SCORE)
+    travel = travel_distance(paths, start)
+    seconds = (cut * settings.cut_passes / settings.cut_speed_mm_s +
+               score / settings.score_speed_mm_s +
+               travel / settings.travel_speed_mm_s)
+    return JobEstimate(cut, score, travel, seconds)
+
+def estimate_raster_seconds(canvas: AreaCanvas, settings: LaserSettings) -> float:
+    """Raster engraving sweeps every pixel row across the full width."""
+    width_mm = canvas.img_w / canvas.dpi * 25.4
+    return canvas.img_h * width_mm / settings.raster_speed_mm_s
+
+# --- Writers ---
+
+STROKES = {CUT: "#FF0000", SCORE: "#0000FF"}  # Layer colors most laser software maps to operations
+
+def write_svg(paths: List[LaserPath], frame: PrintFrame, out_path: str):
+    """Hairline SVG in millimeters, one layer group per operation, paths in job order."""
+    w, h = frame.width_mm, frame.height_mm
+    with open(out_path, 'w') as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{w:.3f}mm" height="{h:.3f}mm" '
+                f'viewBox="0 0 {w:.3f} {h:.3f}">\n')
+        for op in (SCORE, CUT):
+            f.write(f'<g id="{op}" fill="none" stroke="{STROKES[op]}" stroke-width="0.1">\n')
+            for path in paths:
+                if path.op != op:
+                    continue
+                d = " L ".join(f"{x:.3f},{y:.3f}" for x, y in path.points)
+                f.write(f'<path id="{path.id}" d="M {d} Z"/>\n')
+            f.write('</g>\n')
+        f.write('</svg>\n')
+
+def write_gcode(paths: List[LaserPath], frame: PrintFrame, settings: LaserSettings, out_path: str):
+    """GRBL-style G-code (S0-1000, dynamic power M4). Y is flipped so the origin is bottom-left."""
+    h = frame.height_mm
+    with open(out_path, 'w') as f:
+        f.write("G21 ; millimeters\nG90 ; absolute\nM5\n")
+        for path in paths:
+            if path.op == CUT:
+                speed, power, passes = settings.cut_speed_mm_s, settings.cut_power, settings.cut_passes
+            else:
+                speed, power, passes = settings.score_speed_mm_s, settings.score_power, 1
+            points = [(x, h - y) for x, y in path.points]
+            x0, y0 = points[0]
+            f.write(f"; {path.op} {path.id}\nG0 X{x0:.3f} Y{y0:.3f}\n")
+            f.write(f"M4 S{power * 10}\nG1 F{speed * 60:.0f}\n")
+            for _ in range(passes):
+                for x, y in points[1:] + points[:1]:
+                    f.write(f"G1 X{x:.3f} Y{y:.3f}\n")
+            f.write("M5\n")
+        f.write("G0 X0 Y0\nM2\n")
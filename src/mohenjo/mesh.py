@@ -0,0 +1,401 @@
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import Iterator, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Level of the mesh floor (z = 0); pixel levels are 0..255
+FLOOR = -1
+# Faces turned into triangles per chunk; bounds the memory the writers need on top of the mesh
+CHUNK_FACES = 1 << 12
+# Lattice lines per band when finding walls; bounds the temporary arrays to a few MB
+WALL_BAND = 256
+
+# Face kinds; a face row is (kind, a0, a1, b0, b1, level before, level after)
+TOP, BOTTOM, ROW, COL = 0, 1, 2, 3
+# Sorted views of the lattice: along rows (level, y, x), along columns (level, x, y), by point (y, x, level)
+ROW_VIEW, COL_VIEW, POINT_VIEW = 0, 1, 2
+
+STL_TRIANGLE = np.dtype([('normal', '<f4', 3), ('points', '<f4', (3, 3)), ('attr', '<u2')])
+
+@dataclass
+class MeshSettings:
+    pixel_mm: float         # XY size of one heightmap pixel (25.4 / dpi for a print raster)
+    base_mm: float = 2.0    # Solid plinth under level 0
+    relief_mm: float = 3.0  # Height of level 255 above the plinth
+
+    def z(self, level):
+        """Height of a level (or an array of levels) in mm."""
+        level = np.asarray(level)
+        return np.where(level == FLOOR, 0.0, self.base_mm + level / 255 * self.relief_mm)
+
+def bridge_diagonals(pixels: np.ndarray) -> int:
+    """Raises one pixel wherever two higher pixels touch only at a corner; returns how many.
+
+    Four walls would share that vertical edge, which slicers reject as
+    non-manifold. Every 2x2 block of the mask is checked at once; a raised
+    pixel can only create a new contact next to it, so the passes repeat
+    until none is left (one or two on real prints).
+    """
+    w = pixels.shape[1]
+    flat = pixels.reshape(-1)
+    fixed = 0
+    while True:
+        nw, ne, sw, se = pixels[:-1, :-1], pixels[:-1, 1:], pixels[1:, :-1], pixels[1:, 1:]
+        raised, values = [], []
+        for high, low, first, second in (((nw, se), (ne, sw), (0, 1), (1, 0)), ((ne, sw), (nw, se), (0, 0), (1, 1))):
+            top = np.minimum(*high)
+            hit = top > np.maximum(*low)
+            if not hit.any():
+                continue
+            # The higher of the two low pixels goes up (the first one on a tie)
+            use_first = (low[0] >= low[1])[hit]
+            ys, xs = np.nonzero(hit)
+            dy = np.where(use_first, first[0], second[0])
+            dx = np.where(use_first, first[1], second[1])
+            raised.append((ys + dy) * w + xs + dx)
+            values.append(top[hit])
+        if not raised:
+            return fixed
+        index = np.concatenate(raised)
+        np.maximum.at(flat, index, np.concatenate(values))
+        fixed += len(index)
+
+def _runs(keys: np.ndarray):
+    """(line, start, end) of each run of equal keys along the rows of a 2D array."""
+    start = np.ones(keys.shape, bool)
+    start[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    line, x0 = np.nonzero(start)
+    end = np.ones(keys.shape, bool)
+    end[:, :-1] = start[:, 1:]
+    x1 = np.nonzero(end)[1] + 1
+    return line, x0, x1
+
+def _tops(pixels: np.ndarray) -> np.ndarray:
+    """Equal-level pixel runs merged across rows into rectangles."""
+    h, w = pixels.shape
+    y, x0, x1 = _runs(pixels)
+    level = pixels[y, x0].astype(np.int64)
+    # Extent and level of each run; with the row in front the keys come out sorted
+    run = (x0 * (w + 1) + x1) * 256 + level
+    row_size = (w + 1) * (w + 1) * 256
+    keys = y * row_size + run
+
+    def continues(dy) -> np.ndarray:
+        """Whether row y + dy has a run with the same extent and level."""
+        wanted = keys + dy * row_size
+        k = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+        return keys[k] == wanted
+
+    first = ~continues(-1)
+    last = ~continues(1)
+    # Per (x0, x1, level), first and last rows alternate down the image: pair them in order
+    f = np.flatnonzero(first)[np.lexsort((y[first], run[first]))]
+    l = np.flatnonzero(last)[np.lexsort((y[last], run[last]))]
+    lv = level[f]
+    return np.column_stack([np.full(len(f), TOP), x0[f], x1[f], y[f], y[l] + 1, lv, lv]).astype(np.int32)
+
+def _walls(kind: int, lines: np.ndarray) -> np.ndarray:
+    """Walls on every lattice line between two rows (or columns of `lines`), borders included."""
+    count, length = lines.shape
+    walls = []
+    for first in range(0, count + 1, WALL_BAND):
+        # Lattice line g lies between lines g - 1 and g; outside the image is the floor
+        stop = min(count + 1, first + WALL_BAND)
+        padded = np.full((stop - first + 1, length), FLOOR, np.int32)
+        lo, hi = max(first - 1, 0), min(stop, count)
+        padded[lo - first + 1:hi - first + 1] = lines[lo:hi]
+        before, after = padded[:-1], padded[1:]
+        g, a0, a1 = _runs((before + 1) * 512 + after + 1)
+        lb, la = before[g, a0], after[g, a0]
+        keep = lb != la
+        g = g[keep] + first
+        walls.append(np.column_stack([np.full(len(g), kind), a0[keep], a1[keep], g, g, lb[keep], la[keep]]))
+    return np.concatenate(walls).astype(np.int32)
+
+class HeightmapMesh:
+    """Closed, printable surface of a grayscale heightmap.
+
+    - Tops: equal-level pixel runs merged across rows into rectangles.
+    - Walls: one quad per run of pixel edges with the same (level, level) pair,
+      including the outer walls down to the floor.
+    - Bottom: a single face.
+
+    Merged faces meet other faces mid-edge, so every face is triangulated
+    through all lattice vertices on its boundary (fan from its center when
+    there are more than four). That keeps the mesh watertight without
+    T-junctions while emitting far fewer triangles than two per pixel.
+
+    Faces and lattice vertices are numpy arrays built in whole-image passes;
+    triangles are produced in chunks (see triangles()), so the writers
+    stream them instead of holding the mesh as Python objects.
+    """
+
+    def __init__(self, image: Image.Image, settings: MeshSettings):
+        pixels = np.array(image.convert('L'))
+        self.settings = settings
+        self.height, self.width = pixels.shape
+        self.bridged = bridge_diagonals(pixels)  # Pixels raised to remove diagonal-only contacts
+
+        # Face rows: (kind, a0, a1, b0, b1, level before, level after), see _corners
+        self.faces = np.concatenate([
+            _tops(pixels),
+            _walls(ROW, pixels),
+            _walls(COL, pixels.T),
+            np.array([[BOTTOM, 0, self.width, 0, self.height, FLOOR, FLOOR]], np.int32),
+        ])
+        del pixels
+
+        # Lattice vertices (x, y, level): every face corner. Vertex ids follow (y, x, level)
+        # order; two more sorted views answer "vertices along this edge" with searchsorted.
+        corners = self._corners(self.faces)
+        keys = np.unique(self._point_key(*[corners[..., k].reshape(-1) for k in range(3)]))
+        self._point_keys = keys
+        x, y, level = self._decode(keys)
+        self._row_keys, self._row_ids = self._view(self._row_key(x, y, level))
+        self._col_keys, self._col_ids = self._view(self._col_key(x, y, level))
+
+    def __len__(self) -> int:
+        return len(self.faces)
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self._point_keys)
+
+    # --- Lattice keys ---
+
+    def _point_key(self, x, y, level):
+        return (y.astype(np.int64) * (self.width + 1) + x) * 257 + level + 1
+
+    def _row_key(self, x, y, level):
+        return ((level.astype(np.int64) + 1) * (self.height + 1) + y) * (self.width + 1) + x
+
+    def _col_key(self, x, y, level):
+        return ((level.astype(np.int64) + 1) * (self.width + 1) + x) * (self.height + 1) + y
+
+    def _decode(self, keys: np.ndarray):
+        level = keys % 257 - 1
+        point = keys // 257
+        return point % (self.width + 1), point // (self.width + 1), level
+
+    @staticmethod
+    def _view(keys: np.ndarray):
+        order = np.argsort(keys, kind='stable')
+        return keys[order], order
+
+    # --- Faces ---
+
+    @staticmethod
+    def _corners(faces: np.ndarray) -> np.ndarray:
+        """(F, 4, 3) corners (x, y, level) of each face, in boundary order."""
+        kind, a0, a1, b0, b1, l0, l1 = faces.T
+        lo, hi = np.minimum(l0, l1), np.maximum(l0, l1)
+        flat = ((kind == TOP) | (kind == BOTTOM))[:, None]
+        col = (kind == COL)[:, None]
+        along, across = np.c_[a0, a1, a1, a0], np.c_[b0, b0, b0, b0]
+        x = np.where(col, across, along)
+        y = np.where(flat, np.c_[b0, b0, b1, b1], np.where(col, along, across))
+        level = np.where(flat, np.c_[l0, l0, l0, l0], np.c_[lo, lo, hi, hi])
+        return np.stack([x, y, level], axis=-1)
+
+    def _span(self, view: int, lo_key, hi_key):
+        """Index range of the sorted keys of a view that lie in [lo_key, hi_key]."""
+        keys = (self._row_keys, self._col_keys, self._point_keys)[view]
+        return np.searchsorted(keys, lo_key, 'left'), np.searchsorted(keys, hi_key, 'right')
+
+    def _sides(self, faces: np.ndarray):
+        """The four boundary sides of each face as ranges of a sorted vertex view.
+
+        Returns [(view, start, end, reverse)] per side, arrays of length F. Side
+        k runs from corner k towards corner k + 1, that corner excluded.
+        """
+        kind, a0, a1, b0, b1, l0, l1 = faces.T.astype(np.int64)
+        lo, hi = np.minimum(l0, l1), np.maximum(l0, l1)
+        row_key, col_key, point_key = self._row_key, self._col_key, self._point_key
+        # Per side: how tops/bottom (x in [a0, a1], y in [b0, b1], level l0), row walls and
+        # column walls (lattice line b0 from a0 to a1, levels lo to hi) find their vertices
+        table = [
+            ((ROW_VIEW, row_key(a0, b0, l0), row_key(a1 - 1, b0, l0)),
+             (ROW_VIEW, row_key(a0, b0, lo), row_key(a1 - 1, b0, lo)),
+             (COL_VIEW, col_key(b0, a0, lo), col_key(b0, a1 - 1, lo))),
+            ((COL_VIEW, col_key(a1, b0, l0), col_key(a1, b1 - 1, l0)),
+             (POINT_VIEW, point_key(a1, b0, lo), point_key(a1, b0, hi - 1)),
+             (POINT_VIEW, point_key(b0, a1, lo), point_key(b0, a1, hi - 1))),
+            ((ROW_VIEW, row_key(a0 + 1, b1, l0), row_key(a1, b1, l0)),
+             (ROW_VIEW, row_key(a0 + 1, b0, hi), row_key(a1, b0, hi)),
+             (COL_VIEW, col_key(b0, a0 + 1, hi), col_key(b0, a1, hi))),
+            ((COL_VIEW, col_key(a0, b0 + 1, l0), col_key(a0, b1, l0)),
+             (POINT_VIEW, point_key(a0, b0, lo + 1), point_key(a0, b0, hi)),
+             (POINT_VIEW, point_key(b0, a0, lo + 1), point_key(b0, a0, hi))),
+        ]
+        which = np.where((kind == TOP) | (kind == BOTTOM), 0, np.where(kind == ROW, 1, 2))
+        sides = []
+        for k, options in enumerate(table):
+            view = np.empty(len(faces), np.int64)
+            start = np.empty(len(faces), np.int64)
+            end = np.empty(len(faces), np.int64)
+            for choice, (v, lo_key, hi_key) in enumerate(options):
+                mask = which == choice
+                view[mask] = v
+                start[mask], end[mask] = self._span(v, lo_key[mask], hi_key[mask])
+            sides.append((view, start, end, k >= 2))
+        return sides
+
+    def _ids(self, view: int, index):
+        """Vertex ids of positions in a sorted view."""
+        return index if view == POINT_VIEW else (self._row_ids, self._col_ids)[view][index]
+
+    def _outward(self, faces: np.ndarray) -> np.ndarray:
+        kind, _, _, _, _, before, after = faces.T
+        sign = np.where(before > after, 1.0, -1.0)
+        normals = np.zeros((len(faces), 3))
+        normals[kind == TOP, 2] = 1.0
+        normals[kind == BOTTOM, 2] = -1.0
+        # The wall faces the lower side. Rows run towards -Y, columns towards +X.
+        normals[kind == ROW, 1] = -sign[kind == ROW]
+        normals[kind == COL, 0] = sign[kind == COL]
+        return normals
+
+    def positions(self, ids: np.ndarray) -> np.ndarray:
+        """(..., 3) positions in mm of lattice vertex ids."""
+        return self._positions_xyl(*self._decode(self._point_keys[ids]))
+
+    def _positions_xyl(self, x, y, level) -> np.ndarray:
+        s = self.settings
+        return np.stack([x * s.pixel_mm, (self.height - y) * s.pixel_mm, s.z(level)], axis=-1)
+
+    def triangles(self, chunk: int = CHUNK_FACES) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(normals (T, 3), vertex ids (T, 3), fan centers (C, 3) in mm) per chunk of faces.
+
+        Ids below vertex_count are lattice vertices; the others are the
+        chunk's fan centers, numbered on from the previous chunks' centers.
+        Triangles are counter-clockwise seen from outside.
+        """
+        next_center = self.vertex_count
+        for first in range(0, len(self.faces), chunk):
+            faces = self.faces[first:first + chunk]
+            sides = self._sides(faces)
+            lengths = sum(end - start for _, start, end, _ in sides)
+            normals = self._outward(faces)
+
+            # A ring is counter-clockwise when its normal agrees with the outward one;
+            # the first three corners of the rectangle give its direction
+            corners = self._corners(faces)
+            p = self._positions_xyl(corners[..., 0], corners[..., 1], corners[..., 2])
+            turn = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 1])
+            flip = (turn * normals).sum(axis=1) < 0
+
+            out_normals, out_ids, centers = [], [], []
+            quads = lengths == 4  # Each side holds just its corner
+            if quads.any():
+                ring = np.empty((int(quads.sum()), 4), np.int64)
+                for k, (view, start, _, _) in enumerate(sides):
+                    v, s = view[quads], start[quads]
+                    for code in (ROW_VIEW, COL_VIEW, POINT_VIEW):
+                        ring[v == code, k] = self._ids(code, s[v == code])
+                ring[flip[quads]] = ring[flip[quads]][:, ::-1]
+                n = normals[quads]
+                out_normals += [n, n]
+                out_ids += [ring[:, [0, 1, 2]], ring[:, [0, 2, 3]]]
+
+            for f in np.flatnonzero(~quads).tolist():
+                parts = []
+                for view, start, end, reverse in sides:
+                    ids = self._ids(int(view[f]), np.arange(start[f], end[f]))
+                    parts.append(ids[::-1] if reverse else ids)
+                ring = np.concatenate(parts)
+                if flip[f]:
+                    ring = ring[::-1]
+                center = next_center + len(centers)
+                centers.append(self.positions(ring).mean(axis=0))
+                out_normals.append(np.repeat(normals[f:f + 1], len(ring), axis=0))
+                out_ids.append(np.column_stack([np.full(len(ring), center), ring, np.roll(ring, -1)]))
+
+            next_center += len(centers)
+            yield (np.concatenate(out_normals), np.concatenate(out_ids),
+                   np.array(centers).reshape(-1, 3))
+
+def _chunk_points(mesh: HeightmapMesh, ids: np.ndarray, centers: np.ndarray, first_center: int) -> np.ndarray:
+    """(T, 3, 3) positions of triangle vertex ids: lattice ids, then the chunk's centers."""
+    out = np.empty(ids.shape + (3,))
+    lattice = ids < mesh.vertex_count
+    out[lattice] = mesh.positions(ids[lattice])
+    out[~lattice] = centers[ids[~lattice] - first_center]
+    return out
+
+def write_stl(mesh: HeightmapMesh, path: str) -> int:
+    """Binary STL, written a chunk of faces at a time. Returns the triangle count."""
+    count = 0
+    first_center = mesh.vertex_count
+    with open(path, 'wb') as f:
+        f.write(b'mohenjo heightmap mesh'.ljust(80, b' '))
+        f.write(np.uint32(0).tobytes())  # Patched below
+        for normals, ids, centers in mesh.triangles():
+            records = np.zeros(len(ids), STL_TRIANGLE)
+            records['normal'] = normals
+            records['points'] = _chunk_points(mesh, ids, centers, first_center)
+            f.write(records.tobytes())
+            count += len(ids)
+            first_center += len(centers)
+        f.seek(80)
+        f.write(np.uint32(count).tobytes())
+    return count
+
+CONTENT_TYPES_3MF = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+ <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+ <Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+RELS_3MF = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+ <Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+def _vertex_xml(points: np.ndarray) -> str:
+    return ''.join(f'<vertex x="{x:.4f}" y="{y:.4f}" z="{z:.4f}"/>\n' for x, y, z in points.tolist())
+
+def write_3mf(mesh: HeightmapMesh, path: str, name: str = "heightmap") -> int:
+    """3MF package (indexed mesh, millimeters). Returns the triangle count.
+
+    3MF lists vertices before triangles. Lattice vertices are written
+    straight from the mesh's arrays; fan centers and triangles come out of
+    triangles() chunk by chunk and are spooled to temp files, then streamed
+    into the zip after them.
+    """
+    count = 0
+    with tempfile.TemporaryFile('w+') as centers_spool, tempfile.TemporaryFile('w+') as spool:
+        for _, ids, centers in mesh.triangles():
+            centers_spool.write(_vertex_xml(centers))
+            spool.write(''.join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>\n' for a, b, c in ids.tolist()))
+            count += len(ids)
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('[Content_Types].xml', CONTENT_TYPES_3MF)
+            zf.writestr('_rels/.rels', RELS_3MF)
+            with zf.open('3D/3dmodel.model', 'w') as raw:
+                raw.write(('<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<model unit="millimeter" xml:lang="en-US" '
+                           'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                           f'<resources>\n<object id="1" type="model" name="{name}">\n<mesh>\n<vertices>\n').encode())
+                for first in range(0, mesh.vertex_count, CHUNK_FACES):
+                    ids = np.arange(first, min(mesh.vertex_count, first + CHUNK_FACES))
+                    raw.write(_vertex_xml(mesh.positions(ids)).encode())
+                _copy(centers_spool, raw)
+                raw.write(b'</vertices>\n<triangles>\n')
+                _copy(spool, raw)
+                raw.write(b'</triangles>\n</mesh>\n</object>\n</resources>\n'
+                          b'<build>\n<item objectid="1"/>\n</build>\n</model>\n')
+    return count
+
+def _copy(spool, raw, size: int = 1 << 20):
+    spool.seek(0)
+    while True:
+        chunk = spool.read(size)
+        if not chunk:
+            break
+        raw.write(chunk.encode('utf-8'))
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from .formats import DEFAULT_PROFILE, PROFILES, OutputProfile
+from .raster import AreaCanvas, Tile
+
+# PNG encoding (zlib) releases the GIL, so a few threads encode in parallel
+# with each other and with the next tile being drawn.
+ENCODERS = 3
+QUEUE_SIZE = 2  # Rendered images waiting for an encoder; caps memory on big prints
+
+# Thumbnail pyramid written next to every full print: level k is 1 / 2**k of it, down to
+# PYRAMID_MIN_PX on the long side. Level 1 would cost a quarter of the full encode, so it starts at 2.
+PYRAMID_FIRST = 2
+PYRAMID_MIN_PX = 256
+PYRAMID_PROFILE = "preview"  # Always PNG, fast zlib
+
+def _to_8bit(image: Image.Image) -> Image.Image:
+    return image.convert('I').point(lambda v: v / 256).convert('L') if image.mode == 'I;16' else image
+
+def pyramid_levels(full) -> List[Tuple[int, Image.Image]]:
+    """(k, image at 1 / 2**k) of a full print (PIL image or SpanRaster), 8-bit, largest first."""
+    if max(full.size) >> PYRAMID_FIRST < PYRAMID_MIN_PX:
+        return []
+    factor = 1 << PYRAMID_FIRST
+    image = _to_8bit(full).reduce(factor) if isinstance(full, Image.Image) else full.reduce(factor, _to_8bit)
+    levels = [(PYRAMID_FIRST, image)]
+    while max(image.size) // 2 >= PYRAMID_MIN_PX:
+        image = image.reduce(2)
+        levels.append((levels[-1][0] + 1, image))
+    return levels
+
+def pyramid_items(full, full_path: str) -> List[Tuple[Image.Image, str]]:
+    """(image, path) of the pyramid levels in <full print name>_pyramid/, and writes its index.json."""
+    levels = pyramid_levels(full)
+    if not levels:
+        return []
+    folder = os.path.splitext(full_path)[0] + "_pyramid"
+    os.makedirs(folder, exist_ok=True)
+    index = {"source": os.path.basename(full_path), "size": list(full.size),
+             "levels": [{"level": k, "scale": 1 / (1 << k), "size": list(image.size), "file": f"level_{k}.png"}
+                        for k, image in levels]}
+    with open(os.path.join(folder, "index.json"), 'w') as f:
+        json.dump(index, f, indent=1)
+    return [(image, os.path.join(folder, f"level_{k}.png")) for k, image in levels]
+
+def save_pyramid(full, full_path: str, encoders: int = ENCODERS) -> List[str]:
+    """Writes the thumbnail pyramid of a full print; returns the level paths."""
+    items = pyramid_items(full, full_path)
+    save_images(items, encoders, PROFILES[PYRAMID_PROFILE])
+    return [path for _, path in items]
+
+def _covers(tiles: Sequence[Tile], canvas: AreaCanvas) -> bool:
+    mask = Image.new('1', canvas.size, 0)
+    for tile in tiles:
+        mask.paste(1, tile.box)
+    return mask.getextrema() == (1, 1)
+
+async def _encode_all(queue: asyncio.Queue, pool: ThreadPoolExecutor, profile: OutputProfile):
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        image, path = item
+        await loop.run_in_executor(pool, profile.save, image, path)
+
+async def _pipeline(produce, encoders: int, queue_size: int, profile: OutputProfile):
+    """Runs `produce(put, render)` against `encoders` encoder tasks sharing a bounded queue."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size)
+    with ThreadPoolExecutor(1, thread_name_prefix='render') as render_pool, \
+            ThreadPoolExecutor(encoders, thread_name_prefix='encode') as encode_pool:
+        def render(func, *args):
+            return loop.run_in_executor(render_pool, func, *args)
+
+        async def producer():
+            await produce(queue.put, render)  # put() waits while the queue is full: backpressure
+            for _ in range(encoders):
+                await queue.put(None)
+
+        # An encoder error propagates here; asyncio.run then cancels the rest
+        await asyncio.gather(producer(), *(_encode_all(queue, encode_pool, profile) for _ in range(encoders)))
+
+def save_images(items: Sequence[Tuple[Image.Image, str]], encoders: int = ENCODERS,
+                profile: Optional[OutputProfile] = None):
+    """Encodes and writes (image, path) pairs on encoder threads."""
+    async def produce(put, render):
+        for item in items:
+            await put(item)
+    asyncio.run(_pipeline(produce, encoders, max(1, len(items)), profile or PROFILES[DEFAULT_PROFILE]))
+
+def render_outputs(area, registry, features, canvas: AreaCanvas, output_dir: str,
+                   encoders: int = ENCODERS, queue_size: int = QUEUE_SIZE,
+                   profile: Optional[OutputProfile] = None, spans: bool = False) -> Tuple[Image.Image, List[str]]:
+    """Rasterizes an area tile by tile and writes the full print and tiles, overlapping drawing and encoding.
+
+    Each tile is drawn on its own (rasterize with a box is pixel-identical
+    to cropping the full render) and queued for encoding while the next one
+    draws; the full image is assembled from the tiles and encoded last.
+    A box is drawn as full-width rows, so this only pays for tiles stacked
+    top to bottom; other areas are drawn in one piece and cropped.
+    With spans=True the print is drawn once as runs (mohenjo.spans, needs
+    numpy), tiles are cropped from the runs and PNGs are streamed from them,
+    so no full-size image is ever held; the first return value is then the
+    SpanRaster.
+    Returns the full image and the written paths (full first, then tiles and
+    pyramid levels, as save_outputs).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    profile = profile or PROFILES[DEFAULT_PROFILE]
+    tiles = area.tiles(canvas)
+    full_path = profile.path(os.path.join(output_dir, f"{area.prefix}_full.png"))
+    tile_paths = [profile.path(os.path.join(output_dir, t.name)) for t in tiles]
+    result: List[Optional[Image.Image]] = [None]
+
+    async def produce(put, render):
+        if spans:
+            full = await render(area.rasterize_spans, registry, features, canvas, None, profile.bits)
+            for tile, path in zip(tiles, tile_paths):
+                await put((full.crop(tile.box), path))
+        elif tiles and _covers(tiles, canvas) and all(t.box[0] == 0 and t.box[2] == canvas.img_w for t in tiles):
+            full = Image.new('I;16' if profile.bits == 16 else 'L', canvas.size)
+            for tile, path in zip(tiles, tile_paths):
+                image = await render(area.rasterize, registry, features, canvas, tile.box, profile.bits)
+                full.paste(image, tile.box[:2])
+                await put((image, path))
+        else:
+            full = await render(area.rasterize, registry, features, canvas, None, profile.bits)
+            for tile, path in zip(tiles, tile_paths):
+                await put((full.crop(tile.box), path))
+        result[0] = full
+        await put((full, full_path))
+
+    asyncio.run(_pipeline(produce, encoders, queue_size, profile))
+    return result[0], [full_path] + tile_paths + save_pyramid(result[0], full_path, encoders)
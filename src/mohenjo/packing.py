@@ -0,0 +1,114 @@
+import heapq
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .spatial import BBox, GridIndex
+
+@dataclass
+class Placement:
+    box: BBox        # Reserved box (item plus its share of the gap)
+    size: Tuple[float, float]
+    rotated: bool
+
+def _contains(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[0] and a[1] <= b[1] and a[2] >= b[2] and a[3] >= b[3]
+
+def _split(free: BBox, used: BBox) -> List[BBox]:
+    """Maximal pieces of `free` left around `used` (up to four, overlapping)."""
+    pieces = []
+    if used[0] > free[0]:
+        pieces.append((free[0], free[1], used[0], free[3]))
+    if used[2] < free[2]:
+        pieces.append((used[2], free[1], free[2], free[3]))
+    if used[1] > free[1]:
+        pieces.append((free[0], free[1], free[2], used[1]))
+    if used[3] < free[3]:
+        pieces.append((free[0], used[3], free[2], free[3]))
+    return pieces
+
+class FreeRectPacker:
+    """Maximal free rectangles over a container, filled bottom-left first.
+
+    The free space is kept as maximal (possibly overlapping) empty
+    rectangles. Obstacles are carved out up front, so blocks pack right up
+    to them instead of being tested against every one. Free rects sit in a
+    grid index, so a placement only splits its neighbours, and in a heap
+    ordered by (y, x): each free rect is popped once and either consumed or
+    dropped for good (free space only shrinks), which keeps filling close
+    to linear in the number of placements.
+    """
+
+    def __init__(self, container: BBox, obstacles: Sequence[BBox] = (), min_size: float = 0.0,
+                 cell_size: float = 60.0):
+        self.min_size = min_size
+        self.index = GridIndex(cell_size)
+        self.alive: List[bool] = []
+        self.heap: List[Tuple[float, float, int]] = []
+        self.placements: List[Placement] = []
+        self._add(container)
+        for ob in obstacles:
+            self.reserve(ob)
+
+    def _add(self, box: BBox):
+        if box[2] - box[0] < self.min_size or box[3] - box[1] < self.min_size:
+            return  # Too small to ever hold an item
+        idx = self.index.insert(box, box)
+        self.alive.append(True)
+        heapq.heappush(self.heap, (box[1], box[0], idx))
+
+    def free_rects(self) -> List[BBox]:
+        return [self.index.boxes[i] for i, alive in enumerate(self.alive) if alive]
+
+    def reserve(self, used: BBox):
+        """Removes `used` from the free space."""
+        fragments = []
+        for i in self.index.query_indices(used):
+            if not self.alive[i]:
+                continue
+            self.alive[i] = False
+            fragments.extend(_split(self.index.boxes[i], used))
+
+        # Keep only maximal fragments: drop those inside another fragment or a surviving free rect
+        fragments = sorted(set(fragments), key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)
+        kept: List[BBox] = []
+        for frag in fragments:
+            if any(_contains(k, frag) for k in kept):
+                continue
+            if any(self.alive[i] and _contains(self.index.boxes[i], frag)
+                   for i in self.index.query_indices(frag)):
+                continue
+            kept.append(frag)
+        for frag in kept:
+            self._add(frag)
+
+    def place(self, choose: Callable[[float, float], Optional[Tuple[float, float, bool]]]) -> Optional[Placement]:
+        """Places one item in the lowest, then leftmost free rect that takes it.
+
+        `choose(free_w, free_h)` returns the (w, h, rotated) to reserve in a
+        free rect of that size, or None if nothing fits there.
+        """
+        while self.heap:
+            _, _, idx = heapq.heappop(self.heap)
+            if not self.alive[idx]:
+                continue
+            free = self.index.boxes[idx]
+            choice = choose(free[2] - free[0], free[3] - free[1])
+            if choice is None:
+                self.alive[idx] = False  # Free space only shrinks: it will never fit later
+                continue
+            w, h, rotated = choice
+            box = (free[0], free[1], free[0] + w, free[1] + h)
+            self.reserve(box)
+            placement = Placement(box, (w, h), rotated)
+            self.placements.append(placement)
+            return placement
+        return None
+
+    def fill(self, choose) -> List[Placement]:
+        """Places items until no free rect takes one."""
+        placed = []
+        while True:
+            p = self.place(choose)
+            if p is None:
+                return placed
+            placed.append(p)
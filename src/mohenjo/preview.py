@@ -0,0 +1,71 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+from .geometry import signed_area
+from .raster import DPI, AreaCanvas, meters_to_pixels
+from .registry import FeatureCategory, ProceduralFeature
+from .spatial import bbox_of_points
+
+PREVIEW_FRACTION = 0.25  # --preview without a value: 150 DPI, a 16th of the pixels
+LOD_CELL_PX = 6          # LOD cells are at least this many preview pixels wide
+LOD_FILL = 0.5           # Share of a cell buildings must cover for it to become a block
+
+def preview_dpi(fraction: float) -> int:
+    return max(1, round(DPI * fraction))
+
+def scale_factor(preview: AreaCanvas, final: AreaCanvas) -> float:
+    """Final print pixels per preview pixel (from the image widths, which round differently from the DPIs)."""
+    return final.img_w / preview.img_w
+
+def describe_scale(preview: AreaCanvas, final: AreaCanvas) -> str:
+    return (f"Preview at {preview.dpi} DPI: 1 preview px = {scale_factor(preview, final):.3f} print px "
+            f"({preview.img_w} x {preview.img_h} instead of {final.img_w} x {final.img_h} at {final.dpi} DPI)")
+
+def lod_cell_m(dpi: int) -> float:
+    """LOD cell edge for a resolution: LOD_CELL_PX pixels, rounded up to a power of two metres."""
+    px_per_m = meters_to_pixels(1000, dpi) / 1000
+    cell_m = 1.0
+    while cell_m * px_per_m < LOD_CELL_PX:
+        cell_m *= 2
+    return cell_m
+
+def lod_features(features: Sequence[ProceduralFeature], cell_m: float) -> List[ProceduralFeature]:
+    """Buildings merged into square blocks of cell_m (as the viewer's LOD cells), then the streets unchanged.
+
+    A building's area is spread over the cells its bounds cover; a cell at
+    least LOD_FILL covered becomes one block of its main category. Streets
+    come last so they still cut through the blocks.
+    """
+    coverage: Dict[tuple, Dict[FeatureCategory, float]] = defaultdict(lambda: defaultdict(float))
+    parents: Dict[tuple, str] = {}
+    streets = []
+    for pf in features:
+        if pf.category == FeatureCategory.STREET:
+            streets.append(pf)
+            continue
+        points = pf.geometry['points']
+        area = abs(signed_area(points)) - sum(abs(signed_area(h)) for h in pf.geometry.get('holes', ()))
+        x1, y1, x2, y2 = bbox_of_points(points)
+        box_m2 = (x2 - x1) * (y2 - y1)
+        if box_m2 <= 0:
+            continue
+        for cx in range(math.floor(x1 / cell_m), math.ceil(x2 / cell_m)):
+            for cy in range(math.floor(y1 / cell_m), math.ceil(y2 / cell_m)):
+                w = min(x2, (cx + 1) * cell_m) - max(x1, cx * cell_m)
+                h = min(y2, (cy + 1) * cell_m) - max(y1, cy * cell_m)
+                if w > 0 and h > 0:
+                    coverage[(cx, cy)][pf.category] += area * w * h / box_m2
+                    parents.setdefault((cx, cy), pf.parent_id)
+
+    blocks = []
+    for (cx, cy), by_category in sorted(coverage.items()):
+        if sum(by_category.values()) < LOD_FILL * cell_m * cell_m:
+            continue
+        x, y = cx * cell_m, cy * cell_m
+        blocks.append(ProceduralFeature(
+            id=f"lod_{cx}_{cy}", parent_id=parents[(cx, cy)], shape="POLYGON",
+            geometry={'points': [(x, y), (x + cell_m, y), (x + cell_m, y + cell_m), (x, y + cell_m)]},
+            description=f"LOD block ({cell_m:g} m)",
+            category=max(by_category, key=by_category.get)))
+    return blocks + streets
@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw
+
+from .spatial import BBox
+
+# Print Constants (shared by the area print scripts)
+SCALE_RATIO = 4000
+DPI = 600
+CM_TO_INCH = 1 / 2.54
+
+# Laser Grayscale Values
+LEVEL_GROUND = 50       # Low burn (Gray)
+LEVEL_STREET = 20       # Medium burn (Dark Gray)
+LEVEL_BUILDING = 255    # No burn (White) - Highest point
+
+# Pixel box (x1, y1, x2, y2), x2/y2 exclusive - same convention as Image.crop
+PxBox = Tuple[int, int, int, int]
+
+def meters_to_pixels(meters: float, dpi: int = DPI) -> int:
+    return int(meters * (100 / SCALE_RATIO) * CM_TO_INCH * dpi)
+
+def px_box_intersects(a: PxBox, b: PxBox) -> bool:
+    return a[0] < b[2] and a[2] > b[0] and a[1] < b[3] and a[3] > b[1]
+
+def fill_polygon(image: Image.Image, points_px: Sequence[Tuple[int, int]], fill: int,
+                 holes_px: Sequence[Sequence[Tuple[int, int]]] = ()):
+    """Fills a polygon, leaving its holes untouched (PIL polygons have no holes).
+
+    Holes are cut from a mask covering the polygon's rows, so whatever was
+    drawn underneath (e.g. landmarks inside the citadel walls) survives. The
+    mask spans the image's full width: PIL computes polygon edges in float32,
+    and shifting the origin in x can move an edge pixel (in y it cannot). The
+    pixels are then exactly those of drawing the outline and then each hole
+    on top, as the separate wall and courtyard features were drawn.
+    """
+    draw = ImageDraw.Draw(image)
+    if not holes_px:
+        draw.polygon(points_px, fill=fill)
+        return
+    ys = [p[1] for p in points_px]
+    y0 = min(ys)
+    mask = Image.new('1', (image.size[0], max(ys) - y0 + 1), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    mask_draw.polygon([(x, y - y0) for x, y in points_px], fill=1)
+    for hole in holes_px:
+        mask_draw.polygon([(x, y - y0) for x, y in hole], fill=0)
+    image.paste(fill, (0, y0, mask.size[0], y0 + mask.size[1]), mask)
+
+@dataclass
+class Tile:
+    name: str   # Output filename
+    box: PxBox  # Crop box in full-image pixels
+
+class AreaCanvas:
+    """Pixel grid of an area print: the area landmark plus padding, centered on the image."""
+
+    def __init__(self, center_x: float, center_y: float, width_m: float, length_m: float,
+                 padding_m: float = 10.0, dpi: int = DPI):
+        self.center_x = center_x
+        self.center_y = center_y
+        self.dpi = dpi
+        self.img_w = meters_to_pixels(width_m + padding_m * 2, dpi)
+        self.img_h = meters_to_pixels(length_m + padding_m * 2, dpi)
+        self.center_x_px = self.img_w // 2
+        self.center_y_px = self.img_h // 2
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.img_w, self.img_h)
+
+    @property
+    def full_box(self) -> PxBox:
+        return (0, 0, self.img_w, self.img_h)
+
+    def m2p(self, meters: float) -> int:
+        return meters_to_pixels(meters, self.dpi)
+
+    def world_to_img(self, x: float, y: float) -> Tuple[int, int]:
+        px = self.center_x_px + self.m2p(x - self.center_x)
+        py = self.center_y_px - self.m2p(y - self.center_y)
+        return int(px), int(py)
+
+    def world_bbox_to_px(self, box: BBox, margin_px: int = 2) -> PxBox:
+        """Pixel box covering a world bbox, clipped to the image."""
+        x1, y2 = self.world_to_img(box[0], box[1])
+        x2, y1 = self.world_to_img(box[2], box[3])
+        return (max(0, x1 - margin_px), max(0, y1 - margin_px),
+                min(self.img_w, x2 + margin_px + 1), min(self.img_h, y2 + margin_px + 1))
+
+    def px_box_to_world(self, box: PxBox, margin_m: float = 2.0) -> BBox:
+        """World bbox covering a pixel box (with margin for rounding)."""
+        px_per_m = self.m2p(1000) / 1000
+        min_x = self.center_x + (box[0] - self.center_x_px) / px_per_m
+        max_x = self.center_x + (box[2] - self.center_x_px) / px_per_m
+        max_y = self.center_y - (box[1] - self.center_y_px) / px_per_m
+        min_y = self.center_y - (box[3] - self.center_y_px) / px_per_m
+        return (min_x - margin_m, min_y - margin_m, max_x + margin_m, max_y + margin_m)
+
+    def region(self, box: Optional[PxBox] = None, fill: int = LEVEL_GROUND) -> "RasterRegion":
+        return RasterRegion(self, box or self.full_box, fill)
+
+class RasterRegion:
+    """Image covering one pixel box of an AreaCanvas.
+
+    Drawing calls take world coordinates; they are shifted by the region
+    origin so a region renders exactly the pixels of the same box in the
+    full image.
+    """
+
+    def __init__(self, canvas: AreaCanvas, box: PxBox, fill: int):
+        self.canvas = canvas
+        self.box = box
+        self.image = Image.new('L', (box[2] - box[0], box[3] - box[1]), fill)
+        self.draw = ImageDraw.Draw(self.image)
+        self.world_box = canvas.px_box_to_world(box)
+
+    def to_px(self, points: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+        ox, oy = self.box[0], self.box[1]
+        pixel_points = []
+        for (gx, gy) in points:
+            px, py = self.canvas.world_to_img(gx, gy)
+            pixel_points.append((px - ox, py - oy))
+        return pixel_points
+
+    def polygon(self, points: Sequence[Sequence[float]], fill: int,
+                holes: Sequence[Sequence[Sequence[float]]] = ()):
+        if not holes:
+            self.draw.polygon(self.to_px(points), fill=fill)
+            return
+        fill_polygon(self.image, self.to_px(points), fill, [self.to_px(h) for h in holes])
+
+    def rect(self, w_m: float, h_m: float, x_m: float, y_m: float, fill: int):
+        """Draws a rect centered on world (x_m, y_m)."""
+        w_px = self.canvas.m2p(w_m)
+        h_px = self.canvas.m2p(h_m)
+        cx, cy = self.canvas.world_to_img(x_m, y_m)
+        x1 = cx - (w_px // 2) - self.box[0]
+        y1 = cy - (h_px // 2) - self.box[1]
+        self.draw.rectangle([x1, y1, x1 + w_px, y1 + h_px], fill=fill)
+
+def overlap_px(dpi: int = DPI, overlap_cm: float = 0.5) -> int:
+    return int(overlap_cm * CM_TO_INCH * dpi)
+
+def split_tiles_vertical(canvas: AreaCanvas, prefix: str) -> List[Tile]:
+    """Left/right halves with overlap (HR, DK)."""
+    ov = overlap_px(canvas.dpi)
+    split_x_px = canvas.img_w // 2
+    return [
+        Tile(f"{prefix}_tile_1.png", (0, 0, split_x_px + ov, canvas.img_h)),
+        Tile(f"{prefix}_tile_2.png", (split_x_px - ov, 0, canvas.img_w, canvas.img_h)),
+    ]
+
+def split_tiles_horizontal(canvas: AreaCanvas, prefix: str, split_world_y: float) -> List[Tile]:
+    """Top/bottom tiles split at a world Y (VS)."""
+    ov = overlap_px(canvas.dpi)
+    split_y_px = canvas.center_y_px - canvas.m2p(split_world_y - canvas.center_y)
+    return [
+        Tile(f"{prefix}_tile_1_top.png", (0, 0, canvas.img_w, split_y_px + ov)),
+        Tile(f"{prefix}_tile_2_bottom.png", (0, split_y_px - ov, canvas.img_w, canvas.img_h)),
+    ]
@@ -2,7 +2,10 @@ import yaml
 import os
 import math
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from enum import IntEnum
+from typing import Collection, Iterator, List, Dict, Optional, Set, Tuple
+
+from .spatial import BBox, GridIndex, bbox_contains, bbox_intersects, bbox_of_points, bbox_pad
 
 @dataclass
 class Dimensions:
@@ -16,13 +19,84 @@ class Dimensions:
     courtyard_w: float = 0
     courtyard_l: float = 0
 
+class FeatureCategory(IntEnum):
+    """What a procedural feature is. Saved by name, used as an index for styles and heights.
+
+    New generators must set it: styles and heights never look at ids or descriptions.
+    """
+    UNKNOWN = 0
+    CITADEL_WALL = 1
+    BASTION = 2
+    CITADEL_BUILDING = 3
+    COURTYARD = 4
+    RICH_WALL = 5
+    RICH_SOLID_FILLER = 6
+    POOR = 7
+    INDUSTRIAL = 8
+    STREET = 9
+
+def classify_feature(feature_id: str, description: str) -> FeatureCategory:
+    """Category from the old description conventions (files saved before categories existed)."""
+    for tag in ("RICH_WALL", "RICH_SOLID_FILLER", "COURTYARD", "POOR", "INDUSTRIAL"):
+        if f"({tag})" in description:
+            return FeatureCategory[tag]
+    if "street" in feature_id or "Street" in description:
+        return FeatureCategory.STREET
+    if "Courtyard" in description:
+        return FeatureCategory.COURTYARD
+    if "Citadel Bastion" in description:
+        return FeatureCategory.BASTION
+    if "Citadel Wall" in description:
+        return FeatureCategory.CITADEL_WALL
+    if "Citadel Building" in description:
+        return FeatureCategory.CITADEL_BUILDING
+    return FeatureCategory.UNKNOWN
+
+def category_table(default, overrides: Optional[Dict[FeatureCategory, object]] = None) -> tuple:
+    """Tuple indexed by FeatureCategory value: per-category dispatch without string tests."""
+    overrides = overrides or {}
+    return tuple(overrides.get(c, default) for c in FeatureCategory)
+
 @dataclass
 class ProceduralFeature:
     id: str
     parent_id: str
     shape: str # RECT, POLYGON
-    geometry: Dict # {x, y, w, h} or {points: [(x,y), ...]}
+    geometry: Dict # {x, y, w, h} or {points: [(x,y), ...], holes: [[(x,y), ...], ...] (optional)}
     description: str = ""
+    category: FeatureCategory = FeatureCategory.UNKNOWN
+
+def feature_bounds(pf: ProceduralFeature) -> BBox:
+    """(min_x, min_y, max_x, max_y) of a feature; RECT geometry is centered on x, y."""
+    g = pf.geometry
+    if 'points' in g:
+        return bbox_of_points(g['points'])
+    return (g['x'] - g['w'] / 2, g['y'] - g['h'] / 2, g['x'] + g['w'] / 2, g['y'] + g['h'] / 2)
+
+class LandmarkCategory(IntEnum):
+    """What a landmark is; derived from its id/shape unless landmarks.yaml sets `category`."""
+    BUILDING = 0
+    STREET = 1
+    ZONE = 2       # Procedural fill regions (RECT_ZONE)
+    BOUNDARY = 3   # Outlines only: site/city boundaries, print areas (RECT_BORDER)
+    RIVER = 4
+    HOUSE = 5
+    WORKSHOP = 6
+
+def classify_landmark(landmark_id: str, shape: str) -> LandmarkCategory:
+    if "zone" in shape.lower():
+        return LandmarkCategory.ZONE
+    if shape == "RECT_BORDER" or "boundary" in landmark_id:
+        return LandmarkCategory.BOUNDARY
+    if "street" in landmark_id or "lane" in landmark_id:
+        return LandmarkCategory.STREET
+    if "river" in landmark_id:
+        return LandmarkCategory.RIVER
+    if "house" in landmark_id:
+        return LandmarkCategory.HOUSE
+    if "workshop" in landmark_id:
+        return LandmarkCategory.WORKSHOP
+    return LandmarkCategory.BUILDING
 
 @dataclass
 class Landmark:
@@ -35,6 +109,11 @@ class Landmark:
     shape: str
     location: Dict
     
+    category: LandmarkCategory = LandmarkCategory.BUILDING
+    # Zones: generator kind (a generators.ZONE_GENERATORS key) and print area code, e.g. "HR"
+    zone_kind: str = ""
+    district: str = ""
+
     # Calculated absolute position (Center)
     abs_x: float = 0.0
     abs_y: float = 0.0
@@ -50,10 +129,143 @@ class Landmark:
             self.abs_y + half_l
         )
 
+    def get_extent(self) -> Tuple[float, float, float, float]:
+        """Like get_bounds(), but circles count their diameter (get_bounds leaves them a point)."""
+        half_w = self.dimensions.width / 2 + self.dimensions.diameter / 2
+        half_l = self.dimensions.length / 2 + self.dimensions.diameter / 2
+        return (self.abs_x - half_w, self.abs_y - half_l, self.abs_x + half_w, self.abs_y + half_l)
+
+def procedural_parent_ids(path: str) -> Set[str]:
+    """Parent ids in a procedural.yaml, from a line scan instead of a full parse.
+
+    Parsing the whole file dominates a small render; this tells a caller
+    whether its landmarks own any features before paying for it.
+    """
+    parents = set()
+    if not os.path.exists(path):
+        return parents
+    with open(path) as f:
+        for line in f:
+            key, sep, value = line.strip().lstrip('- ').partition(':')
+            if sep and key == 'parent_id':
+                parents.add(value.strip().strip('\'"'))
+    return parents
+
+PROCEDURAL_CHUNK = 1000  # Features per list yielded by iter_procedural
+# libyaml's parser and emitter when PyYAML was built with it (several times faster, same
+# output), else the pure Python ones
+STREAM_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+DUMPER = getattr(yaml, 'CDumper', yaml.Dumper)
+
+def feature_from_item(item: Dict) -> ProceduralFeature:
+    """A ProceduralFeature from its procedural.yaml mapping."""
+    return ProceduralFeature(
+        id=item['id'],
+        parent_id=item['parent_id'],
+        shape=item['shape'],
+        geometry=item['geometry'],
+        description=item.get('description', ''),
+        category=(FeatureCategory[item['category']] if 'category' in item
+                  else classify_feature(item['id'], item.get('description', '')))
+    )
+
+def _compose(loader, anchors: Dict[str, yaml.Node]) -> yaml.Node:
+    """The next node of the event stream (the C loader does not expose PyYAML's composer)."""
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        return anchors[event.anchor]
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, event.flow_style)
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose(loader, anchors))
+        loader.get_event()
+    else:
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, event.flow_style)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = _compose(loader, anchors)
+            node.value.append((key, _compose(loader, anchors)))
+        loader.get_event()
+    if event.anchor:
+        anchors[event.anchor] = node
+    return node
+
+def iter_procedural(path: str, chunk_size: int = PROCEDURAL_CHUNK, parent_ids: Optional[Collection[str]] = None,
+                    bbox: Optional[BBox] = None) -> Iterator[List[ProceduralFeature]]:
+    """Features of a procedural.yaml in lists of up to `chunk_size`, in file order.
+
+    Reads the YAML event stream and builds one feature at a time, so memory
+    stays flat however large the file. Features whose parent is not in
+    `parent_ids` are skipped before their geometry is built; with `bbox`,
+    only features whose bounds strictly overlap it are kept.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as f:
+        loader = STREAM_LOADER(f)
+        anchors: Dict[str, yaml.Node] = {}
+        try:
+            loader.get_event()  # Stream start
+            if not loader.check_event(yaml.DocumentStartEvent):
+                return  # Empty file
+            loader.get_event()
+            if not loader.check_event(yaml.MappingStartEvent):
+                return
+            loader.get_event()
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = loader.construct_object(_compose(loader, anchors))
+                if key != 'features' or not loader.check_event(yaml.SequenceStartEvent):
+                    _compose(loader, anchors)  # Skip the value
+                    continue
+                loader.get_event()
+                chunk = []
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    pf = _feature_from_node(loader, _compose(loader, anchors), parent_ids, bbox)
+                    if pf is None:
+                        continue
+                    chunk.append(pf)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+                loader.get_event()
+                if chunk:
+                    yield chunk
+        finally:
+            loader.dispose()
+
+def _feature_from_node(loader, node: yaml.Node, parent_ids, bbox) -> Optional[ProceduralFeature]:
+    if parent_ids is not None:
+        fields = {key.value: value for key, value in node.value}
+        if 'parent_id' not in fields or loader.construct_object(fields['parent_id']) not in parent_ids:
+            return None
+    pf = feature_from_item(loader.construct_object(node, deep=True))
+    # Built objects are cached per node; drop them so memory does not grow with the file
+    loader.constructed_objects = {}
+    if bbox is not None and not bbox_intersects(feature_bounds(pf), bbox):
+        return None
+    return pf
+
+# Query kinds (None queries both, landmarks first)
+LANDMARKS = "landmarks"
+FEATURES = "features"
+INDEX_CELL_M = {LANDMARKS: 50.0, FEATURES: 25.0}  # Landmarks are few and large, features many and small
+QUERY_EPS = 1e-6  # Pads inclusive queries, the grid index overlap test is strict
+
 class LandmarkRegistry:
     def __init__(self, yaml_path: str, procedural_path: Optional[str] = None):
         self.landmarks: Dict[str, Landmark] = {}
         self.procedural_features: List[ProceduralFeature] = []
+        self._indexes: Dict[str, Tuple[tuple, GridIndex]] = {}
         self.load_landmarks(yaml_path)
         self.resolve_coordinates()
         if procedural_path:
@@ -88,28 +300,33 @@ class LandmarkRegistry:
                 dimensions=dims,
                 height_m=item.get('height_m', 0),
                 shape=item['shape'],
-                location=item.get('location', {})
+                location=item.get('location', {}),
+                category=(LandmarkCategory[item['category']] if 'category' in item
+                          else classify_landmark(item['id'], item['shape'])),
+                zone_kind=item.get('zone_kind', ''),
+                district=item.get('district', '')
             )
             self.landmarks[lm.id] = lm
             
-    def load_procedural(self, path: str):
+    def reload_landmarks(self, path: str):
+        """Re-reads landmarks.yaml in place, keeping the loaded procedural features."""
+        previous = self.landmarks
+        self.landmarks = {}
+        try:
+            self.load_landmarks(path)
+            self.resolve_coordinates()
+        except Exception:
+            # Half-saved or invalid YAML: keep the last good state
+            self.landmarks = previous
+            raise
+
+    def load_procedural(self, path: str, parent_ids: Optional[Collection[str]] = None, bbox: Optional[BBox] = None):
+        """Appends the features of a procedural.yaml, optionally only some parents' or those overlapping `bbox`."""
         if not os.path.exists(path):
             return
-        
-        with open(path, 'r') as f:
-            data = yaml.safe_load(f)
-            
-        if not data: return
-            
-        for item in data.get('features', []):
-            pf = ProceduralFeature(
-                id=item['id'],
-                parent_id=item['parent_id'],
-                shape=item['shape'],
-                geometry=item['geometry'],
-                description=item.get('description', '')
-            )
-            self.procedural_features.append(pf)
+        for chunk in iter_procedural(path, parent_ids=parent_ids, bbox=bbox):
+            self.procedural_features.extend(chunk)
+        self.invalidate_index()
 
     def save_procedural(self, path: str, features: List[ProceduralFeature]):
         data = {'features': []}
@@ -131,11 +348,85 @@ class LandmarkRegistry:
                 'parent_id': f.parent_id,
                 'shape': f.shape,
                 'geometry': safe_geometry,
-                'description': f.description
+                'description': f.description,
+                'category': f.category.name
             })
             
-        with open(path, 'w') as f:
-            yaml.dump(data, f, default_flow_style=False)
+        # Write to a temp file and swap it in, so readers (watchers) never see a partial file
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            yaml.dump(data, f, Dumper=DUMPER, default_flow_style=False)
+        os.replace(tmp_path, path)
+
+    # --- Spatial queries ---
+    # Landmarks (get_extent) and features (feature_bounds) are put in a GridIndex
+    # on the first query. An index is rebuilt when coordinates are resolved or
+    # features loaded, and when `landmarks` / `procedural_features` is replaced
+    # or changes length. Call invalidate_index() after moving things in place.
+
+    def invalidate_index(self):
+        self._indexes = {}
+
+    def _index(self, kind: str) -> GridIndex:
+        source = self.landmarks if kind == LANDMARKS else self.procedural_features
+        key = (id(source), len(source))
+        cached = self._indexes.get(kind)
+        if cached and cached[0] == key:
+            return cached[1]
+        index = GridIndex(INDEX_CELL_M[kind])
+        if kind == LANDMARKS:
+            for lm in source.values():
+                index.insert(lm, lm.get_extent())
+        else:
+            for pf in source:
+                index.insert(pf, feature_bounds(pf))
+        self._indexes[kind] = (key, index)
+        return index
+
+    def _kinds(self, kind: Optional[str]) -> Tuple[str, ...]:
+        if kind not in (None, LANDMARKS, FEATURES):
+            raise ValueError(f"Unknown query kind: {kind}")
+        return (LANDMARKS, FEATURES) if kind is None else (kind,)
+
+    def within_bbox(self, box: BBox, kind: Optional[str] = None, center: bool = False) -> List:
+        """Items lying inside `box` (edges included), or whose center does if `center`.
+
+        Results keep registry order: landmarks as in landmarks.yaml, then features.
+        """
+        selected = []
+        for k in self._kinds(kind):
+            index = self._index(k)
+            for i in index.query_indices(bbox_pad(box, QUERY_EPS)):
+                item, b = index.items[i], index.boxes[i]
+                if center:
+                    cx, cy = (item.abs_x, item.abs_y) if k == LANDMARKS else ((b[0] + b[2]) / 2, (b[1] + b[3]) / 2)
+                    inside = box[0] <= cx <= box[2] and box[1] <= cy <= box[3]
+                else:
+                    inside = bbox_contains(box, b)
+                if inside:
+                    selected.append(item)
+        return selected
+
+    def intersecting(self, box: BBox, kind: Optional[str] = None) -> List:
+        """Items whose bounds overlap `box` (strictly, as the collision checks do), in registry order."""
+        return [item for k in self._kinds(kind) for item in self._index(k).query(box)]
+
+    def within_radius(self, x: float, y: float, radius: float, kind: Optional[str] = None) -> List:
+        """Items whose bounds come within `radius` of (x, y), in registry order."""
+        selected = []
+        for k in self._kinds(kind):
+            index = self._index(k)
+            selected.extend(index.items[i] for i in index.within_radius(x, y, radius))
+        return selected
+
+    def nearest(self, x: float, y: float, k: int = 1, kind: Optional[str] = None) -> List:
+        """The k items whose bounds are closest to (x, y), nearest first (0 for items containing it)."""
+        found = []
+        for order, name in enumerate(self._kinds(kind)):
+            index = self._index(name)
+            found.extend((d, order, i, index.items[i]) for d, i in index.nearest(x, y, k))
+        found.sort(key=lambda f: f[:3])
+        return [f[3] for f in found[:k]]
 
     def resolve_coordinates(self):
         # First pass: Get absolute coordinates
@@ -223,3 +514,4 @@ class LandmarkRegistry:
                     lm.abs_y = base_y
                         
                     resolved.add(lm.id)
+        self.invalidate_index()
@@ -0,0 +1,162 @@
+import struct
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .raster import PxBox
+
+# A flat print is mostly long runs of one gray, so rows are stored as runs:
+# row = (starts, values), run i covers starts[i] .. starts[i + 1] - 1 (the last
+# one runs to the width). Rows of only the fill are None. Memory follows the
+# number of edges, not the number of pixels.
+
+SPAN_BAND_ROWS = 64  # Rows drawn densely at a time before they become runs
+
+def _merge(starts: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Drops runs that continue the previous one's value."""
+    keep = np.ones(len(values), bool)
+    keep[1:] = values[1:] != values[:-1]
+    return starts[keep], values[keep]
+
+class SpanRaster:
+    """Image of width x height stored as runs of equal values per row.
+
+    dtype uint8 holds L images, uint16 I;16 (16-bit) ones.
+    """
+
+    def __init__(self, width: int, height: int, fill: int = 0, dtype=np.uint8):
+        self.width = width
+        self.height = height
+        self.fill = fill
+        self.dtype = np.dtype(dtype)
+        self.rows: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * height
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    def row(self, y: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.rows[y] or (np.zeros(1, np.uint32), np.full(1, self.fill, self.dtype))
+
+    def run_count(self) -> int:
+        return sum(len(r[0]) if r else 1 for r in self.rows)
+
+    def nbytes(self) -> int:
+        """Size of the run data (a dense image is width * height * itemsize)."""
+        return sum(r[0].nbytes + r[1].nbytes for r in self.rows if r) + 8 * self.height
+
+    def set_rows(self, y: int, block: np.ndarray, x1: int = 0, lut: Optional[Sequence[int]] = None):
+        """Replaces rows y.. with the runs of a dense block's columns x1 .. x1 + width, values through `lut`."""
+        block = np.asarray(block)[:, x1:x1 + self.width]
+        if lut is not None:
+            block = np.asarray(lut, self.dtype)[block]
+        changes = np.ones(block.shape, bool)
+        changes[:, 1:] = block[:, 1:] != block[:, :-1]
+        rows, cols = np.nonzero(changes)
+        values = block[rows, cols]
+        bounds = np.searchsorted(rows, np.arange(block.shape[0] + 1))
+        for r in range(block.shape[0]):
+            a, b = bounds[r], bounds[r + 1]
+            if b - a == 1 and values[a] == self.fill:
+                self.rows[y + r] = None
+            else:
+                self.rows[y + r] = (cols[a:b].astype(np.uint32), values[a:b].copy())
+
+    @classmethod
+    def from_image(cls, image: Image.Image, fill: Optional[int] = None) -> 'SpanRaster':
+        dense = np.asarray(image)
+        if fill is None:
+            fill = int(dense[0, 0]) if dense.size else 0
+        spans = cls(image.width, image.height, fill, dense.dtype)
+        for top in range(0, image.height, SPAN_BAND_ROWS):
+            spans.set_rows(top, dense[top:top + SPAN_BAND_ROWS])
+        return spans
+
+    # --- Span operations ---
+
+    def crop(self, box: PxBox) -> 'SpanRaster':
+        """Runs of a pixel box (inside the raster), as Image.crop."""
+        x1, y1, x2, y2 = box
+        out = SpanRaster(x2 - x1, y2 - y1, self.fill, self.dtype)
+        for y in range(y1, y2):
+            if self.rows[y] is None:
+                continue
+            starts, values = self.rows[y]
+            i = np.searchsorted(starts, x1, 'right') - 1  # Run holding x1
+            j = np.searchsorted(starts, x2 - 1, 'right')  # Past the run holding x2 - 1
+            new_starts = starts[i:j] - np.uint32(x1)
+            new_starts[0] = 0
+            out.rows[y - y1] = (new_starts, values[i:j].copy())
+        return out
+
+    def remap(self, lut: Sequence[int], dtype=None) -> 'SpanRaster':
+        """Values through a lookup table (as Image.point), merging runs that become equal."""
+        dtype = np.dtype(dtype or self.dtype)
+        table = np.asarray(lut, dtype)
+        out = SpanRaster(self.width, self.height, int(table[self.fill]), dtype)
+        for y, r in enumerate(self.rows):
+            if r is not None:
+                out.rows[y] = _merge(r[0], table[r[1]])
+        return out
+
+    # --- Output ---
+
+    def row_array(self, y: int) -> np.ndarray:
+        starts, values = self.row(y)
+        return np.repeat(values, np.diff(starts, append=self.width))
+
+    def to_array(self, box: Optional[PxBox] = None) -> np.ndarray:
+        """Dense array (height x width), or of rows box[1]..box[3] only."""
+        y1, y2 = (box[1], box[3]) if box else (0, self.height)
+        dense = np.empty((y2 - y1, self.width), self.dtype)
+        for y in range(y1, y2):
+            dense[y - y1] = self.row_array(y)
+        return dense
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.to_array())
+
+    def reduce(self, factor: int, convert=None) -> Image.Image:
+        """Image.reduce(factor) of the dense image (through `convert`, e.g. to 8-bit), one band at a time."""
+        if SPAN_BAND_ROWS % factor:
+            raise ValueError(f"factor {factor} does not divide the {SPAN_BAND_ROWS}-row bands")
+        out = None
+        for top in range(0, self.height, SPAN_BAND_ROWS):
+            band = Image.fromarray(self.to_array((0, top, self.width, min(self.height, top + SPAN_BAND_ROWS))))
+            band = (convert(band) if convert else band).reduce(factor)
+            if out is None:
+                out = Image.new(band.mode, (-(-self.width // factor), -(-self.height // factor)))
+            out.paste(band, (0, top // factor))
+        return out
+
+    def save_png(self, path: str, compress_level: int = 6):
+        """Writes a grayscale PNG one band of rows at a time, never holding the dense image.
+
+        Every row uses the Up filter (difference to the row above), which
+        turns the repeated rows of a flat print into zeros for zlib.
+        """
+        bits = 8 * self.dtype.itemsize
+        compressor = zlib.compressobj(compress_level)
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, bits, 0, 0, 0, 0)))
+            above = np.zeros(self.width * self.dtype.itemsize, np.uint8)
+            for top in range(0, self.height, SPAN_BAND_ROWS):
+                band = self.to_array((0, top, self.width, min(self.height, top + SPAN_BAND_ROWS)))
+                # PNG samples are big-endian bytes; Up subtracts the previous row's bytes mod 256
+                samples = band.astype(band.dtype.newbyteorder('>')).view(np.uint8).reshape(len(band), -1)
+                rows = np.empty((len(band), samples.shape[1] + 1), np.uint8)
+                rows[:, 0] = 2  # Filter type: Up
+                rows[:, 1:] = samples - np.vstack([above, samples[:-1]])
+                above = samples[-1]
+                data = compressor.compress(rows.tobytes())
+                if data:
+                    f.write(chunk(b'IDAT', data))
+            f.write(chunk(b'IDAT', compressor.flush()))
+            f.write(chunk(b'IEND', b''))
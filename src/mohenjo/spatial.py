@@ -0,0 +1,141 @@
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# (min_x, min_y, max_x, max_y), same order as Landmark.get_bounds()
+BBox = Tuple[float, float, float, float]
+
+def bbox_of_points(points: Iterable[Sequence[float]]) -> BBox:
+    """Returns the bounding box of a polygon's points."""
+    xs = []
+    ys = []
+    for p in points:
+        xs.append(p[0])
+        ys.append(p[1])
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def bbox_intersects(a: BBox, b: BBox) -> bool:
+    """Strict AABB overlap (touching edges do not count), as used by the collision checks."""
+    return a[0] < b[2] and a[2] > b[0] and a[1] < b[3] and a[3] > b[1]
+
+def bbox_union(a: BBox, b: BBox) -> BBox:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def bbox_pad(box: BBox, padding: float) -> BBox:
+    return (box[0] - padding, box[1] - padding, box[2] + padding, box[3] + padding)
+
+def bbox_contains(outer: BBox, inner: BBox) -> bool:
+    """True if `inner` lies inside `outer` (edges included)."""
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+def bbox_distance(box: BBox, x: float, y: float) -> float:
+    """Distance from a point to a box (0 inside it)."""
+    dx = max(box[0] - x, 0.0, x - box[2])
+    dy = max(box[1] - y, 0.0, y - box[3])
+    return math.hypot(dx, dy)
+
+class GridIndex:
+    """Uniform grid (spatial hash) over bounding boxes.
+
+    Items are bucketed into every cell their box touches, so a query only
+    tests the items near it instead of the whole list. Query results come
+    back in insertion order, which keeps draw order and collision results
+    identical to the old linear scans.
+    """
+
+    def __init__(self, cell_size: float = 25.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.items: List = []
+        self.boxes: List[BBox] = []
+        self.extent = None  # Cell range holding items, bounds the nearest() ring search
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _cell_range(self, box: BBox) -> Tuple[int, int, int, int]:
+        s = self.cell_size
+        return (math.floor(box[0] / s), math.floor(box[1] / s),
+                math.floor(box[2] / s), math.floor(box[3] / s))
+
+    def insert(self, item, box: BBox) -> int:
+        """Adds an item and returns its index."""
+        idx = len(self.items)
+        self.items.append(item)
+        self.boxes.append(box)
+        cx1, cy1, cx2, cy2 = self._cell_range(box)
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                self.cells.setdefault((cx, cy), []).append(idx)
+        e = self.extent or (cx1, cy1, cx2, cy2)
+        self.extent = (min(e[0], cx1), min(e[1], cy1), max(e[2], cx2), max(e[3], cy2))
+        return idx
+
+    def query_indices(self, box: BBox) -> List[int]:
+        """Indices of items whose box strictly overlaps `box`, in insertion order."""
+        cx1, cy1, cx2, cy2 = self._cell_range(box)
+        found = set()
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                for idx in self.cells.get((cx, cy), ()):
+                    if idx not in found and bbox_intersects(self.boxes[idx], box):
+                        found.add(idx)
+        return sorted(found)
+
+    def query(self, box: BBox) -> List:
+        return [self.items[i] for i in self.query_indices(box)]
+
+    def collides(self, box: BBox) -> bool:
+        """True if anything in the index overlaps `box`."""
+        cx1, cy1, cx2, cy2 = self._cell_range(box)
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                for idx in self.cells.get((cx, cy), ()):
+                    if bbox_intersects(self.boxes[idx], box):
+                        return True
+        return False
+
+    def within_radius(self, x: float, y: float, radius: float) -> List[int]:
+        """Indices of items whose box is at most `radius` from (x, y), in insertion order."""
+        box = (x - radius, y - radius, x + radius, y + radius)
+        cx1, cy1, cx2, cy2 = self._cell_range(box)
+        found = set()
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                for idx in self.cells.get((cx, cy), ()):
+                    if idx not in found and bbox_distance(self.boxes[idx], x, y) <= radius:
+                        found.add(idx)
+        return sorted(found)
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Tuple[float, int]]:
+        """(distance, index) of the k items whose boxes are closest to (x, y), nearest first.
+
+        Searches rings of cells outward from the point's cell. Anything not
+        seen yet lies outside the rings searched so far, so it is at least
+        ring * cell_size away; the search stops once the k-th best is closer.
+        """
+        if not self.items or k <= 0:
+            return []
+        s = self.cell_size
+        px, py = math.floor(x / s), math.floor(y / s)
+        ex1, ey1, ex2, ey2 = self.extent
+        last_ring = max(px - ex1, ex2 - px, py - ey1, ey2 - py, 0)
+        seen = set()
+        best: List[Tuple[float, int]] = []
+        for ring in range(last_ring + 1):
+            if ring == 0:
+                ring_cells = [(px, py)]
+            else:
+                ring_cells = [(cx, cy) for cx in range(px - ring, px + ring + 1) for cy in (py - ring, py + ring)]
+                ring_cells += [(cx, cy) for cx in (px - ring, px + ring) for cy in range(py - ring + 1, py + ring)]
+            for cell in ring_cells:
+                for idx in self.cells.get(cell, ()):
+                    if idx not in seen:
+                        seen.add(idx)
+                        best.append((bbox_distance(self.boxes[idx], x, y), idx))
+            if len(best) >= k:
+                best.sort()
+                del best[k:]
+                if best[-1][0] <= ring * s:
+                    break
+        best.sort()
+        return best[:k]
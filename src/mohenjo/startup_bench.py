@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from .cli import COLD_START_TARGETS_MS, FORBIDDEN_IMPORTS
+
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+def _command(args, importtime=False) -> List[str]:
+    return [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-m", "mohenjo"] + list(args)
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    return env
+
+def cold_start_ms(args, runs: int = 5) -> float:
+    """Best wall-clock time of a fresh interpreter running the command."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(_command(args), env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+def import_times(args) -> Dict[str, Tuple[int, int]]:
+    """{module: (self us, cumulative us)} from `python -X importtime`."""
+    proc = subprocess.run(_command(args, importtime=True), env=_env(), stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE, text=True, check=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m mohenjo bench",
+                                     description="Cold-start time targets and an -X importtime regression check")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (best is kept)")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'command':<58}{'best':>9}{'target':>9}")
+        for cmd, target in COLD_START_TARGETS_MS.items():
+            cmd = [c.format(tmp=tmp) for c in cmd]
+            ms = cold_start_ms(cmd, args.runs)
+            ok = ms <= target
+            failures += not ok
+            label = " ".join(cmd).replace(tmp, "<tmp>")
+            print(f"{label:<58}{ms:>7.0f}ms{target:>7}ms  {'ok' if ok else 'SLOW'}")
+
+        # The landmarks-only render is the one that must stay light
+        render = [c.format(tmp=tmp) for c in list(COLD_START_TARGETS_MS)[1]]
+        modules = import_times(render)
+
+    heavy = sorted({m.split('.')[0] for m in modules} & set(FORBIDDEN_IMPORTS))
+    total_ms = sum(own for own, _ in modules.values()) / 1000
+    print(f"\nImports for `render --id`: {len(modules)} modules, {total_ms:.0f}ms")
+    top = sorted(((cum, name) for name, (_, cum) in modules.items() if '.' not in name), reverse=True)[:5]
+    for cum, name in top:
+        print(f"  {name:<30}{cum / 1000:>7.1f}ms cumulative")
+    if heavy:
+        failures += 1
+        print(f"Regression: `render --id` imports {', '.join(heavy)}; keep those imports inside the commands that need them.")
+    else:
+        print(f"No {'/'.join(FORBIDDEN_IMPORTS)} on the landmarks-only path.")
+    return 1 if failures else 0
@@ -0,0 +1,229 @@
+import csv
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .areas import PrintArea, Rejection
+from .geometry import convex_hull, rect_to_box
+from .join import overlap_pairs, spatial_join
+from .registry import FeatureCategory, LandmarkCategory, LandmarkRegistry, ProceduralFeature, feature_bounds
+
+# Figures compared against the previous run's file; a change in any of them is reported
+TRACKED = ("buildings", "built_fraction", "mean_footprint_m2", "courtyard_ratio", "street_coverage",
+           "rejection_rate")
+
+@dataclass
+class ZoneStats:
+    """Density of one zone (or a whole area) after collision."""
+    scope: str            # "zone" or "area"
+    id: str
+    name: str
+    area_m2: float        # The zone's box
+    buildings: int        # A rich wall + courtyard pair counts once
+    built_m2: float       # Roofed: outlines minus courtyards
+    footprint_m2: float   # Convex hull of each outline, so the open side of a U-shaped house counts as courtyard
+    street_m2: float      # Generated streets plus street landmarks clipped to the zone, crossings counted once
+    rejections: Dict[str, int] = field(default_factory=dict)  # Obstacle kind -> houses dropped
+
+    @property
+    def rejected(self) -> int:
+        return sum(self.rejections.values())
+
+    @property
+    def candidates(self) -> int:
+        return self.buildings + self.rejected
+
+    @property
+    def built_fraction(self) -> float:
+        return self.built_m2 / self.area_m2 if self.area_m2 else 0.0
+
+    @property
+    def mean_footprint_m2(self) -> float:
+        return self.footprint_m2 / self.buildings if self.buildings else 0.0
+
+    @property
+    def courtyard_ratio(self) -> float:
+        return 1 - self.built_m2 / self.footprint_m2 if self.footprint_m2 else 0.0
+
+    @property
+    def street_coverage(self) -> float:
+        return self.street_m2 / self.area_m2 if self.area_m2 else 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        return self.rejected / self.candidates if self.candidates else 0.0
+
+    def row(self) -> Dict[str, object]:
+        row = {"scope": self.scope, "id": self.id, "name": self.name, "area_m2": round(self.area_m2, 1),
+               "buildings": self.buildings,
+               "built_m2": round(self.built_m2, 1),
+               "built_fraction": round(self.built_fraction, 4),
+               "mean_footprint_m2": round(self.mean_footprint_m2, 2),
+               "courtyard_ratio": round(self.courtyard_ratio, 4),
+               "street_m2": round(self.street_m2, 1),
+               "street_coverage": round(self.street_coverage, 4),
+               "candidates": self.candidates,
+               "rejected": self.rejected,
+               "rejection_rate": round(self.rejection_rate, 4)}
+        row.update({f"rejected_{reason}": n for reason, n in sorted(self.rejections.items())})
+        return row
+
+def ring_areas(rings: Sequence[Sequence]) -> np.ndarray:
+    """Unsigned shoelace areas of many rings in one numpy pass."""
+    lengths = np.array([len(r) for r in rings], np.int64)
+    areas = np.zeros(len(rings))
+    filled = lengths >= 3
+    if not filled.any():
+        return areas
+    pts = np.array([p for r, n in zip(rings, lengths.tolist()) if n >= 3 for p in r], float)
+    ends = np.cumsum(lengths[filled])
+    starts = ends - lengths[filled]
+    nxt = np.arange(1, len(pts) + 1)
+    nxt[ends - 1] = starts  # Each ring's last point closes to its first
+    x, y = pts[:, 0], pts[:, 1]
+    areas[filled] = np.abs(np.add.reduceat(x * y[nxt] - x[nxt] * y, starts)) / 2
+    return areas
+
+def feature_rings(pf: ProceduralFeature):
+    """(outer ring, holes) of a feature; RECT geometry becomes its four corners."""
+    g = pf.geometry
+    if 'points' in g:
+        return g['points'], list(g.get('holes', ()))
+    x1, y1, x2, y2 = rect_to_box(g)
+    return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)], []
+
+def footprints(features: Sequence[ProceduralFeature]):
+    """(net, gross) areas per feature: outline minus holes, and convex hull of the outline."""
+    outer, holes, owner = [], [], []
+    for k, pf in enumerate(features):
+        ring, inner = feature_rings(pf)
+        outer.append(ring)
+        holes.extend(inner)
+        owner.extend([k] * len(inner))
+    n = len(outer)
+    hulls = [convex_hull(r) if len(r) > 4 else r for r in outer]  # Wobbly quads are their own hull
+    areas = ring_areas(outer + hulls + holes)
+    net = areas[:n] - np.bincount(np.array(owner, np.int64), areas[2 * n:], minlength=n)
+    return net, areas[n:2 * n]
+
+def _intersect(a: np.ndarray, b) -> np.ndarray:
+    """Row-wise intersection of boxes a with boxes b (or with one box)."""
+    b = np.asarray(b, float)
+    return np.c_[np.maximum(a[:, 0], b[..., 0]), np.maximum(a[:, 1], b[..., 1]),
+                 np.minimum(a[:, 2], b[..., 2]), np.minimum(a[:, 3], b[..., 3])]
+
+def _box_areas(boxes: np.ndarray) -> np.ndarray:
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+def _street_m2(box, polygon_m2: float, street_boxes: np.ndarray) -> float:
+    """Street area in a zone box; overlaps (crossings) are taken off once, from the boxes."""
+    clipped = _intersect(street_boxes, box)
+    i, j = overlap_pairs(clipped)
+    return polygon_m2 - float(_box_areas(_intersect(clipped[i], clipped[j])).sum())
+
+def area_stats(area: PrintArea, registry: LandmarkRegistry, features: Sequence[ProceduralFeature],
+               rejected: Sequence[Rejection] = ()) -> List[ZoneStats]:
+    """Stats of each zone of an area, then of the area itself, from its generated features.
+
+    `features` are the area's own (see PrintArea.own_features) and `rejected`
+    what generate() dropped; without it every rejection count is 0.
+    """
+    zones = [plan.zone for plan in area.zone_plans(registry)]
+    scopes = [("zone", z) for z in zones] + [("area", area.area(registry))]  # DK's zone is the area itself
+    position = {z.id: k for k, z in enumerate(zones)}
+    n = len(zones)
+
+    buildings = [pf for pf in features if pf.category != FeatureCategory.STREET]
+    streets = [pf for pf in features if pf.category == FeatureCategory.STREET]
+    net, gross = footprints(buildings)
+    street_net, _ = footprints(streets)
+    building_zone = np.array([position.get(pf.parent_id, n) for pf in buildings], np.int64)
+    street_zone = np.array([position.get(pf.parent_id, n) for pf in streets], np.int64)
+
+    # Street landmarks crossing each zone, clipped to it (generated streets lie inside their zone)
+    street_landmarks = [lm for lm in registry.landmarks.values() if lm.category == LandmarkCategory.STREET]
+    regions = [lm for _, lm in scopes]
+    li, zi = spatial_join(street_landmarks, regions, "intersects")
+    landmark_boxes = np.array([lm.get_bounds() for lm in street_landmarks], float).reshape(-1, 4)
+    street_boxes = np.array([feature_bounds(pf) for pf in streets], float).reshape(-1, 4)
+
+    reasons = Counter((r.zone_id, r.reason) for r in rejected)
+    stats = []
+    for k, (scope, lm) in enumerate(scopes):
+        box = lm.get_bounds()
+        mine = np.ones(len(buildings), bool) if scope == "area" else building_zone == k
+        own_streets = np.ones(len(streets), bool) if scope == "area" else street_zone == k
+        crossing = landmark_boxes[li[zi == k]]
+        polygon_m2 = float(street_net[own_streets].sum() + _box_areas(_intersect(crossing, box)).sum())
+        zone_ids = {z.id for z in zones} if scope == "area" else {lm.id}
+        counts = Counter()
+        for (zone_id, reason), count in reasons.items():
+            if zone_id in zone_ids:
+                counts[reason] += count
+        stats.append(ZoneStats(
+            scope=scope, id=lm.id, name=lm.name,
+            area_m2=lm.dimensions.width * lm.dimensions.length,
+            buildings=int(mine.sum()),
+            built_m2=float(net[mine].sum()),
+            footprint_m2=float(gross[mine].sum()),
+            street_m2=_street_m2(box, polygon_m2, np.r_[street_boxes[own_streets], crossing]),
+            rejections=dict(sorted(counts.items()))))
+    return stats
+
+# --- Files ---
+
+def stat_changes(old_rows: Sequence[Dict], new_rows: Sequence[Dict]) -> List[str]:
+    """One line per zone whose tracked figures moved since `old_rows`."""
+    old = {(r["scope"], r["id"]): r for r in old_rows}
+    lines = []
+    for row in new_rows:
+        before = old.get((row["scope"], row["id"]))
+        if before is None:
+            lines.append(f"{row['id']}: new")
+            continue
+        moved = [f"{key} {before.get(key)} -> {row[key]}" for key in TRACKED if before.get(key) != row[key]]
+        if moved:
+            lines.append(f"{row['id']} ({row['scope']}): " + ", ".join(moved))
+    return lines
+
+def save_stats(stats: Sequence[ZoneStats], path_prefix: str) -> Tuple[List[str], List[str]]:
+    """Writes <prefix>.json and <prefix>.csv; returns their paths and the changes against the previous JSON."""
+    rows = [s.row() for s in stats]
+    json_path, csv_path = path_prefix + ".json", path_prefix + ".csv"
+    changes: List[str] = []
+    if os.path.exists(json_path):
+        with open(json_path) as f:
+            changes = stat_changes(json.load(f), rows)
+    with open(json_path, 'w') as f:
+        json.dump(rows, f, indent=1)
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(dict.fromkeys(k for row in rows for k in row)))
+        writer.writeheader()
+        writer.writerows(rows)
+    return [json_path, csv_path], changes
+
+def format_stats(stats: Sequence[ZoneStats]) -> str:
+    lines = [f"{'zone':<34}{'houses':>7}{'built':>8}{'mean m2':>9}{'court':>7}{'street':>8}{'rejected':>10}  reasons"]
+    for s in stats:
+        reasons = ", ".join(f"{reason} {n}" for reason, n in s.rejections.items())
+        label = s.id if s.scope == "zone" else f"{s.id} (area)"
+        lines.append(f"{label:<34}{s.buildings:>7}{s.built_fraction:>8.1%}{s.mean_footprint_m2:>9.1f}"
+                     f"{s.courtyard_ratio:>7.1%}{s.street_coverage:>8.1%}{s.rejected:>10}  {reasons}")
+    return "\n".join(lines)
+
+def write_area_stats(area: PrintArea, registry: LandmarkRegistry, features: Sequence[ProceduralFeature],
+                     rejected: Sequence[Rejection], output_dir: str) -> List[str]:
+    """Prints an area's stats and saves <prefix>_stats.json/.csv next to its print; returns the paths."""
+    stats = area_stats(area, registry, features, rejected)
+    os.makedirs(output_dir, exist_ok=True)
+    paths, changes = save_stats(stats, os.path.join(output_dir, f"{area.prefix}_stats"))
+    print(format_stats(stats))
+    if changes:
+        print("Changed since the last run:")
+        for line in changes:
+            print(f"  - {line}")
+    return paths
@@ -0,0 +1,416 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .registry import FeatureCategory, Landmark, LandmarkCategory, LandmarkRegistry, ProceduralFeature
+from .spatial import BBox, GridIndex
+
+Point = Tuple[float, float]
+INF = float('inf')
+
+@dataclass
+class StreetSegment:
+    """Centerline of one street, from a LINE landmark or a street polygon."""
+    id: str
+    a: Point
+    b: Point
+    width: float
+
+    @property
+    def length(self) -> float:
+        return math.dist(self.a, self.b)
+
+    def at(self, t: float) -> Point:
+        return (self.a[0] + (self.b[0] - self.a[0]) * t, self.a[1] + (self.b[1] - self.a[1]) * t)
+
+    def box(self, pad: float = 0.0) -> BBox:
+        return (min(self.a[0], self.b[0]) - pad, min(self.a[1], self.b[1]) - pad,
+                max(self.a[0], self.b[0]) + pad, max(self.a[1], self.b[1]) + pad)
+
+def is_street_landmark(lm: Landmark) -> bool:
+    return lm.shape == "LINE" and lm.category == LandmarkCategory.STREET
+
+def landmark_segment(lm: Landmark) -> StreetSegment:
+    """LINE landmarks run along their longer dimension; the shorter one is the street width."""
+    w, l = lm.dimensions.width, lm.dimensions.length
+    x, y = lm.abs_x, lm.abs_y
+    if w >= l:
+        return StreetSegment(lm.id, (x - w / 2, y), (x + w / 2, y), l)
+    return StreetSegment(lm.id, (x, y - l / 2), (x, y + l / 2), w)
+
+def feature_segment(pf: ProceduralFeature) -> Optional[StreetSegment]:
+    """Street polygons are wobbly quads: the centerline joins the midpoints of the short edges."""
+    points = [tuple(p) for p in pf.geometry.get('points', ())]
+    if len(points) != 4:
+        return None
+    edges = [(points[i], points[(i + 1) % 4]) for i in range(4)]
+    lengths = [math.dist(p, q) for p, q in edges]
+    # Opposite edges 0/2 and 1/3; the shorter pair are the street ends
+    k = 0 if lengths[0] + lengths[2] < lengths[1] + lengths[3] else 1
+    mids = [((p[0] + q[0]) / 2, (p[1] + q[1]) / 2) for p, q in (edges[k], edges[k + 2])]
+    return StreetSegment(pf.id, mids[0], mids[1], (lengths[k] + lengths[k + 2]) / 2)
+
+def street_segments(registry: LandmarkRegistry) -> List[StreetSegment]:
+    """Both street sources: LINE landmarks and generated street polygons."""
+    segments = [landmark_segment(lm) for lm in registry.landmarks.values() if is_street_landmark(lm)]
+    for pf in registry.procedural_features:
+        if pf.category == FeatureCategory.STREET and pf.shape == "POLYGON":
+            seg = feature_segment(pf)
+            if seg is not None:
+                segments.append(seg)
+    return segments
+
+def _line_hit(s: StreetSegment, o: StreetSegment) -> Optional[Tuple[float, float]]:
+    """Parameters (t on s, u on o) where the two centerlines cross, or None.
+
+    Ends may overshoot or stop short by the other street's half width, so
+    T-junctions (a lane ending at the edge of a main street) still connect.
+    """
+    rx, ry = s.b[0] - s.a[0], s.b[1] - s.a[1]
+    sx, sy = o.b[0] - o.a[0], o.b[1] - o.a[1]
+    denom = rx * sy - ry * sx
+    if abs(denom) < 1e-9:
+        return None  # Parallel streets never meet in this model
+    qx, qy = o.a[0] - s.a[0], o.a[1] - s.a[1]
+    t = (qx * sy - qy * sx) / denom
+    u = (qx * ry - qy * rx) / denom
+    tol_t = (o.width / 2) / max(s.length, 1e-9)
+    tol_u = (s.width / 2) / max(o.length, 1e-9)
+    if -tol_t <= t <= 1 + tol_t and -tol_u <= u <= 1 + tol_u:
+        return min(max(t, 0.0), 1.0), min(max(u, 0.0), 1.0)
+    return None
+
+class StreetGraph:
+    """Planar street graph with nodes at intersections and street ends.
+
+    Adjacency is stored CSR-style in flat arrays (offsets / targets /
+    weights / edge ids), so traversals touch a few contiguous buffers
+    instead of per-node dicts and stay cheap on city-wide networks.
+    """
+
+    def __init__(self, segments: Sequence[StreetSegment], merge_tol: float = 1.0):
+        self.segments = list(segments)
+        self.merge_tol = merge_tol
+        self.nodes: List[Point] = []
+        self._node_cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        # Undirected edges: (u, v, length, segment index)
+        self.edges: List[Tuple[int, int, float, int]] = []
+        self._build()
+        self._components: Optional[array] = None
+
+    # --- Construction ---
+
+    def _node_at(self, p: Point) -> int:
+        """Node id for p, reusing a node within merge_tol (three streets meeting at one crossing)."""
+        s = self.merge_tol
+        cx, cy = math.floor(p[0] / s), math.floor(p[1] / s)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for n in self._node_cells.get((cx + dx, cy + dy), ()):
+                    if math.dist(self.nodes[n], p) <= s:
+                        return n
+        self.nodes.append(p)
+        self._node_cells[(cx, cy)].append(len(self.nodes) - 1)
+        return len(self.nodes) - 1
+
+    def _build(self):
+        index = GridIndex(cell_size=50.0)
+        for i, seg in enumerate(self.segments):
+            index.insert(i, seg.box(pad=seg.width / 2))
+
+        # Split parameters per segment: (t, node)
+        splits: Dict[int, List[Tuple[float, int]]] = defaultdict(list)
+        for i, seg in enumerate(self.segments):
+            for j in index.query_indices(seg.box(pad=seg.width / 2)):
+                if j <= i:
+                    continue
+                other = self.segments[j]
+                hit = _line_hit(seg, other)
+                if hit is None:
+                    continue
+                t, u = hit
+                node = self._node_at(other.at(u))
+                splits[i].append((t, node))
+                splits[j].append((u, node))
+
+        for i, seg in enumerate(self.segments):
+            stops = sorted(splits[i])
+            if not stops or stops[0][0] > 0:
+                stops.insert(0, (0.0, self._node_at(seg.a)))
+            if stops[-1][0] < 1:
+                stops.append((1.0, self._node_at(seg.b)))
+            for (_, u), (_, v) in zip(stops, stops[1:]):
+                if u != v:
+                    self.edges.append((u, v, math.dist(self.nodes[u], self.nodes[v]), i))
+
+        # CSR adjacency, both directions per edge
+        degree = [0] * len(self.nodes)
+        for u, v, _, _ in self.edges:
+            degree[u] += 1
+            degree[v] += 1
+        self.offsets = array('l', [0]) * (len(self.nodes) + 1)
+        for n, d in enumerate(degree):
+            self.offsets[n + 1] = self.offsets[n] + d
+        fill = array('l', self.offsets[:-1])
+        total = self.offsets[-1]
+        self.targets = array('l', [0]) * total
+        self.weights = array('d', [0.0]) * total
+        self.edge_ids = array('l', [0]) * total
+        for e, (u, v, length, _) in enumerate(self.edges):
+            for a, b in ((u, v), (v, u)):
+                k = fill[a]
+                self.targets[k], self.weights[k], self.edge_ids[k] = b, length, e
+                fill[a] += 1
+
+        self.node_index = GridIndex(cell_size=50.0)
+        for n, (x, y) in enumerate(self.nodes):
+            self.node_index.insert(n, (x, y, x, y))
+
+    @classmethod
+    def from_registry(cls, registry: LandmarkRegistry, **kwargs) -> 'StreetGraph':
+        return cls(street_segments(registry), **kwargs)
+
+    def neighbors(self, n: int) -> Iterable[Tuple[int, float, int]]:
+        """(neighbor, length, edge id) for every edge at n."""
+        for k in range(self.offsets[n], self.offsets[n + 1]):
+            yield self.targets[k], self.weights[k], self.edge_ids[k]
+
+    @property
+    def total_length(self) -> float:
+        return sum(e[2] for e in self.edges)
+
+    # --- Queries ---
+
+    def nearest_node(self, x: float, y: float) -> int:
+        """Closest node to a world point (grows the search box until something turns up)."""
+        if not self.nodes:
+            raise ValueError("empty street graph")
+        r = self.node_index.cell_size
+        while True:
+            hits = self.node_index.query_indices((x - r, y - r, x + r, y + r))
+            if hits:
+                best = min(hits, key=lambda n: math.dist(self.nodes[n], (x, y)))
+                # A node just outside the box could still be closer than a corner hit
+                if math.dist(self.nodes[best], (x, y)) <= r:
+                    return best
+            r *= 2
+
+    def dijkstra(self, sources: Iterable[int], max_dist: float = INF,
+                 targets: Optional[Set[int]] = None, cost=None) -> Tuple[array, array]:
+        """Shortest distances and predecessors from one or more sources.
+
+        Stops early once every node in `targets` is settled or the frontier
+        passes `max_dist`. `cost(u, v, length)` overrides the edge weight.
+        """
+        dist = array('d', [INF]) * len(self.nodes)
+        pred = array('l', [-1]) * len(self.nodes)
+        heap = []
+        for s in sources:
+            dist[s] = 0.0
+            heap.append((0.0, s))
+        heapq.heapify(heap)
+        remaining = set(targets) if targets is not None else None
+        offsets, tg, wt = self.offsets, self.targets, self.weights
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > max_dist:
+                dist[u] = INF
+                break
+            if remaining is not None:
+                remaining.discard(u)
+                if not remaining:
+                    break
+            for k in range(offsets[u], offsets[u + 1]):
+                v = tg[k]
+                nd = d + (wt[k] if cost is None else cost(u, v, wt[k]))
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        if max_dist < INF:
+            for n in range(len(dist)):
+                if dist[n] > max_dist:
+                    dist[n] = INF
+        return dist, pred
+
+    def shortest_path(self, a: int, b: int) -> Tuple[float, List[int]]:
+        """(length, node list) from a to b; (inf, []) if they are not connected."""
+        if not self.connected(a, b):
+            return INF, []
+        dist, pred = self.dijkstra([a], targets={b})
+        path = [b]
+        while path[-1] != a:
+            path.append(pred[path[-1]])
+        return dist[b], path[::-1]
+
+    def path_lengths(self, pairs: Iterable[Tuple[int, int]]) -> List[float]:
+        """Bulk shortest-path lengths: one early-stopping search per distinct source."""
+        pairs = list(pairs)
+        by_source: Dict[int, Set[int]] = defaultdict(set)
+        for a, b in pairs:
+            if self.connected(a, b):
+                by_source[a].add(b)
+        results = {}
+        for a, targets in by_source.items():
+            dist, _ = self.dijkstra([a], targets=targets)
+            for b in targets:
+                results[(a, b)] = dist[b]
+        return [results.get((a, b), INF) for a, b in pairs]
+
+    def components(self) -> array:
+        """Component label per node (computed once, then cached)."""
+        if self._components is None:
+            labels = array('l', [-1]) * len(self.nodes)
+            label = 0
+            for start in range(len(self.nodes)):
+                if labels[start] != -1:
+                    continue
+                labels[start] = label
+                queue = deque([start])
+                while queue:
+                    u = queue.popleft()
+                    for k in range(self.offsets[u], self.offsets[u + 1]):
+                        v = self.targets[k]
+                        if labels[v] == -1:
+                            labels[v] = label
+                            queue.append(v)
+                label += 1
+            self._components = labels
+        return self._components
+
+    def connected(self, a: int, b: int) -> bool:
+        labels = self.components()
+        return labels[a] == labels[b]
+
+    def reachable(self, source: int, max_dist: float = INF) -> Dict[int, float]:
+        """Nodes reachable from source within max_dist metres of street, with their distance."""
+        dist, _ = self.dijkstra([source], max_dist=max_dist)
+        return {n: d for n, d in enumerate(dist) if d < INF}
+
+# --- Drainage ---
+
+# (upper bound on drained street length in metres, class, channel width in metres)
+DRAIN_CLASSES = [
+    (150.0, "minor", 0.3),
+    (600.0, "branch", 0.5),
+    (INF, "main", 0.9),
+]
+
+@dataclass
+class Drain:
+    """Covered drain along one street edge, flowing from `upstream` to `downstream`."""
+    edge: int
+    upstream: int
+    downstream: int
+    length: float
+    flow: float  # Street length drained through this channel, itself included
+    size: str
+    width: float
+
+@dataclass
+class DrainageNetwork:
+    outfalls: List[int]
+    drains: List[Drain] = field(default_factory=list)
+    downstream: Dict[int, int] = field(default_factory=dict)  # node -> next node towards an outfall
+
+    def size_counts(self) -> Dict[str, int]:
+        counts = {name: 0 for _, name, _ in DRAIN_CLASSES}
+        for d in self.drains:
+            counts[d.size] += 1
+        return counts
+
+def drain_class(flow: float) -> Tuple[str, float]:
+    for limit, name, width in DRAIN_CLASSES:
+        if flow <= limit:
+            return name, width
+    return DRAIN_CLASSES[-1][1], DRAIN_CLASSES[-1][2]
+
+def river_outfalls(graph: StreetGraph, registry: LandmarkRegistry,
+                   river_id: str = "indus_river") -> List[int]:
+    """One outfall per connected component: its node closest to the river edge."""
+    river = registry.landmarks.get(river_id)
+    if river is None:
+        raise ValueError(f"{river_id} not found")
+    x1, y1, x2, y2 = river.get_bounds()
+
+    def to_river(n):
+        x, y = graph.nodes[n]
+        return math.hypot(max(x1 - x, 0, x - x2), max(y1 - y, 0, y - y2))
+
+    best: Dict[int, int] = {}
+    labels = graph.components()
+    for n in range(len(graph.nodes)):
+        c = labels[n]
+        if c not in best or to_river(n) < to_river(best[c]):
+            best[c] = n
+    return sorted(best.values())
+
+def route_drainage(graph: StreetGraph, outfalls: Sequence[int],
+                   elevation: Optional[Callable[[float, float], float]] = None,
+                   uphill_penalty: float = 50.0) -> DrainageNetwork:
+    """Drains every street edge towards the nearest outfall.
+
+    Flow follows a shortest-path tree grown from the outfalls. With an
+    `elevation(x, y)` function, each metre of climb costs `uphill_penalty`
+    metres of run, so water prefers to go downhill. Edges off the tree are
+    short feeders into whichever end is closer to an outfall. Drain size
+    follows the street length upstream of each channel.
+    """
+    cost = None
+    if elevation is not None:
+        heights = [elevation(x, y) for x, y in graph.nodes]
+
+        def cost(u, v, length):
+            # Search runs outfall -> upstream; water flows v -> u
+            return length + uphill_penalty * max(0.0, heights[u] - heights[v])
+
+    dist, pred = graph.dijkstra(outfalls, cost=cost)
+    network = DrainageNetwork(outfalls=list(outfalls))
+    for n, p in enumerate(pred):
+        if p != -1:
+            network.downstream[n] = p
+
+    # Each node's channel towards the outfall is the cheapest edge to its predecessor;
+    # two streets can join the same pair of junctions, and the search took the cheaper one
+    tree_edge = {}  # node -> (edge, length) of its channel towards the outfall
+    best = {}
+    for e, (u, v, length, _) in enumerate(graph.edges):
+        if dist[u] == INF:
+            continue  # Component without an outfall
+        for n, p in ((u, v), (v, u)):
+            if pred[n] == p:
+                c = length if cost is None else cost(p, n, length)
+                if n not in best or c < best[n]:
+                    best[n] = c
+                    tree_edge[n] = (e, length)
+    channels = {e for e, _ in tree_edge.values()}
+
+    # Accumulate from the far ends inwards
+    inflow = [0.0] * len(graph.nodes)
+    order = sorted((n for n in range(len(graph.nodes)) if dist[n] < INF), key=lambda n: -dist[n])
+    feeders = []
+    for e, (u, v, length, _) in enumerate(graph.edges):
+        if dist[u] == INF or e in channels:
+            continue  # No outfall, or already a channel
+        hi, lo = (u, v) if dist[u] >= dist[v] else (v, u)
+        feeders.append((e, hi, lo, length))
+        inflow[lo] += length
+
+    for e, hi, lo, length in feeders:
+        size, width = drain_class(length)
+        network.drains.append(Drain(e, hi, lo, length, length, size, width))
+    for n in order:
+        if n not in tree_edge:
+            continue
+        e, length = tree_edge[n]
+        flow = inflow[n] + length
+        inflow[pred[n]] += flow
+        size, width = drain_class(flow)
+        network.drains.append(Drain(e, n, pred[n], length, flow, size, width))
+    network.drains.sort(key=lambda d: d.edge)
+    return network
@@ -0,0 +1,107 @@
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from .areas import AREAS
+from .geometry import signed_area
+from .registry import FeatureCategory, LandmarkRegistry
+
+# Parameters swept by default per generator kind (see generators.ZONE_GENERATORS)
+DEFAULT_GRIDS: Dict[str, Dict[str, list]] = {
+    "rich": {"house_size": [10.0, 12.0, 15.0], "gap": [1.0, 2.0, 3.0], "wobble": [0.0, 0.3]},
+    "poor": {"house_w": [4.0, 5.0], "gap": [0.5, 1.0, 1.5], "skip_prob": [0.1, 0.2, 0.3],
+             "merge_prob": [0.0, 0.3, 0.6]},
+    "industrial": {"house_size": [12.0, 16.0, 20.0], "gap": [4.0, 8.0], "wobble": [0.0, 0.2]},
+}
+
+# Where each kind is tried by default: (area key in AREAS, zone landmark id)
+DEFAULT_ZONES = {
+    "rich": ("vs", "lower_vs_zone_mixed_north"),
+    "poor": ("vs", "lower_vs_zone_residential_south"),
+    "industrial": ("vs", "lower_vs_zone_residential_south"),
+}
+
+@dataclass
+class SweepRun:
+    index: int
+    area: str
+    zone_id: str
+    kind: str
+    params: Dict[str, float]
+    thumbnail: Optional[str] = None  # PNG path, or None to skip rasterizing
+
+@dataclass
+class SweepResult:
+    run: SweepRun
+    houses: int           # Buildings placed (a rich wall + courtyard pair counts once)
+    candidates: int       # Buildings the generator proposed
+    rejected: int         # Candidates dropped by the obstacle collision check
+    built_m2: float
+    zone_m2: float
+    generate_s: float     # Candidate generation
+    collide_s: float      # Collision against the real obstacle set
+
+    @property
+    def built_ratio(self) -> float:
+        return self.built_m2 / self.zone_m2 if self.zone_m2 else 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        return self.rejected / self.candidates if self.candidates else 0.0
+
+    def row(self) -> Dict[str, object]:
+        row = {"run": self.run.index, "area": self.run.area, "zone": self.run.zone_id, "generator": self.run.kind}
+        row.update(self.run.params)
+        row.update({
+            "houses": self.houses,
+            "candidates": self.candidates,
+            "rejected": self.rejected,
+            "rejection_rate": round(self.rejection_rate, 4),
+            "built_m2": round(self.built_m2, 1),
+            "built_ratio": round(self.built_ratio, 4),
+            "runtime_ms": round((self.generate_s + self.collide_s) * 1000, 2),
+            "generate_ms": round(self.generate_s * 1000, 2),
+            "collide_ms": round(self.collide_s * 1000, 2),
+            "thumbnail": self.run.thumbnail or "",
+        })
+        return row
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict[str, float]]:
+    """Every combination of the grid's values, in a stable order."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+def footprint_m2(points, holes=()) -> float:
+    return abs(signed_area(points)) - sum(abs(signed_area(h)) for h in holes)
+
+def run_sweep(registry: LandmarkRegistry, run: SweepRun, thumb_dpi: int = 50) -> SweepResult:
+    """Generates one zone with overridden generator settings and collides it like a real area run."""
+    area = type(AREAS[run.area])()  # Fresh instance: no cached candidates, no shared overrides
+    area.generator_params = {run.kind: dict(run.params)}
+    area.zone_generators = {run.zone_id: run.kind}
+    zone = registry.landmarks[run.zone_id]
+
+    start = time.perf_counter()
+    area.zone_houses(zone, run.kind)  # Cached for zone_plans below
+    generate_s = time.perf_counter() - start
+
+    plans = [p for p in area.zone_plans(registry) if p.zone.id == run.zone_id]
+    start = time.perf_counter()
+    features, considered = area.generate(registry, verbose=False, plans=plans)
+    collide_s = time.perf_counter() - start
+
+    step = 2 if plans and plans[0].paired else 1
+    buildings = [pf for pf in features if pf.category != FeatureCategory.STREET]
+    candidates = len(considered) // step
+    built = sum(footprint_m2(pf.geometry['points'], pf.geometry.get('holes', ())) for pf in buildings)
+
+    if run.thumbnail:
+        # Only this zone's features, on the area's own obstacles and landmarks
+        image = area.rasterize(registry, features, area.canvas(registry, dpi=thumb_dpi))
+        image.save(run.thumbnail)
+
+    return SweepResult(run=run, houses=len(buildings), candidates=candidates,
+                       rejected=candidates - len(buildings),
+                       built_m2=built, zone_m2=zone.dimensions.width * zone.dimensions.length,
+                       generate_s=generate_s, collide_s=collide_s)
@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .registry import Landmark, LandmarkRegistry
+from .raster import AreaCanvas, RasterRegion, CM_TO_INCH, SCALE_RATIO
+from .heights import GROUND_BAND_M, HEIGHT_MIN_M, HEIGHT_STEP_M
+from .spatial import BBox
+
+# Lower City mound height; the boundary landmark itself carries height_m: 0
+LOWER_CITY_HEIGHT_M = 5.0
+# Landmarks the mounds are sampled from: moving one changes the ground everywhere near it
+CITADEL_MOUND_ID = "citadel_walls"
+LOWER_CITY_MOUND_ID = "lower_city_boundary"
+TERRAIN_LANDMARKS = (CITADEL_MOUND_ID, LOWER_CITY_MOUND_ID)
+
+@dataclass
+class NoiseSettings:
+    seed: int = 42
+    octaves: int = 4
+    wavelength_m: float = 120.0    # Feature size of the first octave
+    lacunarity: float = 2.0
+    gain: float = 0.5
+    period_m: Optional[float] = None  # Wrap the noise every period_m metres (tileable maps)
+
+def _hash(ix: np.ndarray, iy: np.ndarray, seed: int) -> np.ndarray:
+    """Lattice values in [0, 1) from integer coordinates (vectorized integer hash)."""
+    h = (ix.astype(np.int64) * 0x27D4EB2D) ^ (iy.astype(np.int64) * 0x165667B1) ^ ((seed * 0x9E3779B1) & 0xFFFFFFFF)
+    h &= 0xFFFFFFFF
+    h ^= h >> 15
+    h = (h * 0x2C1B3C6D) & 0xFFFFFFFF
+    h ^= h >> 12
+    h = (h * 0x297A2D39) & 0xFFFFFFFF
+    h ^= h >> 15
+    return h.astype(np.float64) / 4294967296.0
+
+def value_noise(x: np.ndarray, y: np.ndarray, seed: int, period: Optional[int] = None) -> np.ndarray:
+    """Value noise on the grid x (columns) by y (rows), in lattice units, range [-1, 1].
+
+    Each axis is floored and faded once; only the corner hashes are 2D.
+    Values depend on absolute coordinates only, so neighbouring tiles agree
+    on their shared edge.
+    """
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = x - x0
+    fy = y - y0
+    ux = (fx * fx * fx * (fx * (fx * 6 - 15) + 10))[None, :]
+    uy = (fy * fy * fy * (fy * (fy * 6 - 15) + 10))[:, None]
+    ix0 = x0.astype(np.int64)
+    iy0 = y0.astype(np.int64)
+    ix1, iy1 = ix0 + 1, iy0 + 1
+    if period:
+        ix0, ix1, iy0, iy1 = ix0 % period, ix1 % period, iy0 % period, iy1 % period
+    cx0, cx1 = ix0[None, :], ix1[None, :]
+    cy0, cy1 = iy0[:, None], iy1[:, None]
+    top = _hash(cx0, cy0, seed) * (1 - ux) + _hash(cx1, cy0, seed) * ux
+    bottom = _hash(cx0, cy1, seed) * (1 - ux) + _hash(cx1, cy1, seed) * ux
+    return (top * (1 - uy) + bottom * uy) * 2 - 1
+
+def fbm(x_m: np.ndarray, y_m: np.ndarray, settings: NoiseSettings) -> np.ndarray:
+    """Multi-octave value noise over world coordinates (metres), range about [-1, 1]."""
+    total = np.zeros((len(y_m), len(x_m)))
+    amplitude, frequency, norm = 1.0, 1.0 / settings.wavelength_m, 0.0
+    for octave in range(settings.octaves):
+        period = None
+        if settings.period_m:
+            period = max(1, int(round(settings.period_m * frequency)))
+            frequency = period / settings.period_m  # Whole lattice cells per period
+        total += amplitude * value_noise(x_m * frequency, y_m * frequency, settings.seed + octave, period)
+        norm += amplitude
+        amplitude *= settings.gain
+        frequency *= settings.lacunarity
+    return total / norm
+
+@dataclass
+class Mound:
+    """Flat-topped mound over a box, easing down to 0 over `falloff_m` outside it."""
+    box: BBox
+    height_m: float
+    falloff_m: float = 60.0
+
+    @classmethod
+    def from_landmark(cls, lm: Landmark, height_m: Optional[float] = None, falloff_m: float = 60.0) -> 'Mound':
+        return cls(lm.get_bounds(), lm.height_m if height_m is None else height_m, falloff_m)
+
+    def elevation(self, x_m: np.ndarray, y_m: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = self.box
+        dx = np.maximum(np.maximum(x1 - x_m, x_m - x2), 0)[None, :]
+        dy = np.maximum(np.maximum(y1 - y_m, y_m - y2), 0)[:, None]
+        t = np.clip(1 - np.hypot(dx, dy) / self.falloff_m, 0, 1)
+        return self.height_m * t * t * (3 - 2 * t)
+
+def city_mounds(registry: LandmarkRegistry, lower_city_height_m: float = LOWER_CITY_HEIGHT_M) -> List[Mound]:
+    """The two mounds: Citadel (its height_m) and the lower Lower City."""
+    mounds = []
+    citadel = registry.landmarks.get(CITADEL_MOUND_ID)
+    if citadel is not None:
+        mounds.append(Mound.from_landmark(citadel))
+    lower = registry.landmarks.get(LOWER_CITY_MOUND_ID)
+    if lower is not None:
+        mounds.append(Mound.from_landmark(lower, lower.height_m or lower_city_height_m, falloff_m=100.0))
+    return mounds
+
+class Terrain:
+    """Ground elevation: mounds plus seeded fBm noise, drawn as height codes in the ground band.
+
+    Everything is a function of world coordinates, so any pixel box can be
+    computed on its own: tiles and incremental patches line up with the
+    full render, and memory is bounded by `block_rows` rows at a time.
+    """
+
+    def __init__(self, mounds: Sequence[Mound], noise: Optional[NoiseSettings] = None,
+                 amplitude_m: float = 1.5, block_rows: int = 256):
+        self.mounds = list(mounds)
+        self.noise = noise or NoiseSettings()
+        self.amplitude_m = amplitude_m
+        self.block_rows = block_rows
+
+    @classmethod
+    def from_registry(cls, registry: LandmarkRegistry, seed: int = 42, **kwargs) -> 'Terrain':
+        return cls(city_mounds(registry), NoiseSettings(seed=seed), **kwargs)
+
+    def mound_elevation(self, x_m: np.ndarray, y_m: np.ndarray) -> np.ndarray:
+        base = np.zeros((len(y_m), len(x_m)))
+        for mound in self.mounds:
+            np.maximum(base, mound.elevation(x_m, y_m), out=base)
+        return base
+
+    def elevation(self, x_m: np.ndarray, y_m: np.ndarray) -> np.ndarray:
+        """Elevation in metres on the grid x_m (columns) by y_m (rows)."""
+        x_m = np.asarray(x_m, dtype=np.float64)
+        y_m = np.asarray(y_m, dtype=np.float64)
+        return self.mound_elevation(x_m, y_m) + self.amplitude_m * fbm(x_m, y_m, self.noise)
+
+    def at(self, x: float, y: float) -> float:
+        """Elevation at one world point (the street graph's drainage hook)."""
+        return float(self.elevation([x], [y])[0, 0])
+
+    def datum(self, x: float, y: float) -> float:
+        """Mound height at a point, without noise: the ground height of an area print."""
+        return float(self.mound_elevation(np.array([x], float), np.array([y], float))[0, 0])
+
+    def codes(self, canvas: AreaCanvas, box, datum_m: float) -> np.ndarray:
+        """uint8 height codes (mohenjo.heights) for a pixel box of the canvas (pixel centres).
+
+        Relief is clipped to the ground band so it never reads as a street or a roof.
+        """
+        px_per_m = (100 / SCALE_RATIO) * CM_TO_INCH * canvas.dpi
+        xs = canvas.center_x + (np.arange(box[0], box[2]) + 0.5 - canvas.center_x_px) / px_per_m
+        ys = canvas.center_y - (np.arange(box[1], box[3]) + 0.5 - canvas.center_y_px) / px_per_m
+        relief = np.clip(self.elevation(xs, ys) - datum_m, -GROUND_BAND_M, GROUND_BAND_M)
+        return np.rint((relief - HEIGHT_MIN_M) / HEIGHT_STEP_M).astype(np.uint8)
+
+    def paint(self, region: RasterRegion, datum_m: float, columns: Optional[Tuple[int, int]] = None):
+        """Fills the region (or its canvas columns x1..x2) with ground heights, block by block.
+
+        Landmark islands are drawn on top.
+        """
+        x1, y1, x2, y2 = region.box
+        if columns:
+            x1, x2 = max(x1, columns[0]), min(x2, columns[1])
+        for top in range(y1, y2, self.block_rows):
+            bottom = min(y2, top + self.block_rows)
+            block = self.codes(region.canvas, (x1, top, x2, bottom), datum_m)
+            region.image.paste(Image.fromarray(block, 'L'), (x1 - region.box[0], top - y1))
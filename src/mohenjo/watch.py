@@ -0,0 +1,136 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+# inotify flags (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+_EVENT_HEADER = struct.Struct('iIII')
+
+class PollingWatcher:
+    """Portable fallback: compares file mtimes/sizes every `interval` seconds."""
+
+    def __init__(self, paths: List[str], interval: float = 0.2):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self.stamps = {p: self._stamp(p) for p in self.paths}
+
+    @staticmethod
+    def _stamp(path: str):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def poll(self) -> Set[str]:
+        changed = set()
+        for p in self.paths:
+            stamp = self._stamp(p)
+            if stamp != self.stamps[p]:
+                self.stamps[p] = stamp
+                changed.add(p)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux inotify on the parent directories, so editors that save by rename are seen too."""
+
+    def __init__(self, paths: List[str]):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed")
+
+        self.paths = {os.path.abspath(p) for p in paths}
+        self.dirs: Dict[int, str] = {}
+        # Only finished writes: no events for half-written files
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO
+        for d in {os.path.dirname(p) for p in self.paths}:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d), mask)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+            self.dirs[wd] = d
+
+    def _read(self) -> Set[str]:
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode()
+            offset += length
+            path = os.path.join(self.dirs.get(wd, ''), name)
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._read()
+            if changed:
+                return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def create_watcher(paths: List[str], poll_interval: float = 0.2, use_inotify: bool = True):
+    """inotify where available, polling otherwise."""
+    if use_inotify and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths, poll_interval)
+
+def watch_loop(paths: List[str], on_change, debounce: float = 0.05, poll_interval: float = 0.2,
+               use_inotify: bool = True):
+    """Calls `on_change(changed_paths)` after every burst of writes until Ctrl+C."""
+    watcher = create_watcher(paths, poll_interval, use_inotify)
+    kind = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    print(f"Watching {', '.join(os.path.basename(p) for p in paths)} ({kind}). Ctrl+C to stop.")
+    try:
+        while True:
+            changed = watcher.wait()
+            # Editors often write in several steps; collect the whole burst
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            start = time.perf_counter()
+            try:
+                on_change(changed)
+            except Exception as e:
+                # Half-edited YAML is normal while typing; keep watching
+                print(f"Error: {e}")
+            print(f"  ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import asdict
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.audit import RULES, TOLERANCE_M, audit, by_region
+from mohenjo.registry import (Dimensions, FeatureCategory, Landmark, LandmarkCategory, LandmarkRegistry,
+                              ProceduralFeature)
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+LANDMARKS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'landmarks.yaml')
+PROCEDURAL_PATH = os.path.join(BASE_DIR, 'src', 'data', 'procedural.yaml')
+
+def add_synthetic_zone(registry, count, house_m=10.0, gap_m=2.0, overlap_every=1000):
+    """Fills a zone east of the site with `count` houses on a grid; every `overlap_every`-th one
+    is widened into its neighbour. Returns the number of planted overlaps."""
+    side = math.ceil(math.sqrt(count))
+    pitch = house_m + gap_m
+    size = side * pitch
+    zone = Landmark(id="synthetic_zone", name="Synthetic Zone", region="Synthetic",
+                    description="Audit scale test", dimensions=Dimensions(size, size), height_m=0,
+                    shape="RECT_ZONE", location={}, category=LandmarkCategory.ZONE,
+                    abs_x=5000 + size / 2, abs_y=size / 2)
+    registry.landmarks[zone.id] = zone
+    planted = 0
+    for n in range(count):
+        x, y = 5000 + (n % side) * pitch, (n // side) * pitch
+        w = house_m
+        if n % overlap_every == 0 and n % side != side - 1 and n + 1 < count:
+            w += gap_m + 1  # Into the next house
+            planted += 1
+        registry.procedural_features.append(ProceduralFeature(
+            id=f"synthetic_house_{n}", parent_id=zone.id, shape="POLYGON",
+            geometry={'points': [(x, y), (x + w, y), (x + w, y + house_m), (x, y + house_m)]},
+            description="Synthetic House", category=FeatureCategory.POOR))
+    return planted
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check landmarks and procedural features for overlaps and shapes outside their parent "
+                    "or region boundary. Exits 1 when conflicts are found, so it can gate a print job.")
+    parser.add_argument('--landmarks', default=LANDMARKS_PATH)
+    parser.add_argument('--procedural', default=PROCEDURAL_PATH)
+    parser.add_argument('--rule', action='append', choices=list(RULES), help="Rules to check (default: all)")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE_M,
+                        help="How far (m) a shape may stick out of its parent or boundary")
+    parser.add_argument('--limit', type=int, default=10, help="Conflicts listed per region and rule (0: all)")
+    parser.add_argument('--json', help="Write every conflict to this JSON file")
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Add a zone of N generated houses (some overlapping) to time the audit at scale")
+    parser.add_argument('--warn-only', action='store_true', help="Report, but exit 0 even with conflicts")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    registry = LandmarkRegistry(args.landmarks, args.procedural)
+    loaded = time.perf_counter()
+    if args.synthetic:
+        planted = add_synthetic_zone(registry, args.synthetic)
+        print(f"Synthetic zone: {args.synthetic} houses, {planted} planted overlaps")
+    prepared = time.perf_counter()
+    conflicts = audit(registry, args.rule, tolerance=args.tolerance)
+    done = time.perf_counter()
+    print(f"Audited {len(registry.landmarks)} landmarks and {len(registry.procedural_features)} features "
+          f"in {done - prepared:.2f}s (load {loaded - start:.2f}s): {len(conflicts)} conflicts")
+
+    for region, rules in by_region(conflicts).items():
+        print(f"\n{region} ({sum(len(c) for c in rules.values())})")
+        for rule, items in rules.items():
+            print(f"  {rule} ({len(items)}): {RULES[rule]}")
+            shown = items if args.limit <= 0 else items[:args.limit]
+            for c in shown:
+                print(f"    - {c.a}" + (f" / {c.b}" if c.b else "") + (f": {c.detail}" if c.detail else ""))
+            if len(shown) < len(items):
+                print(f"    ... {len(items) - len(shown)} more")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump([asdict(c) for c in conflicts], f, indent=1)
+        print(f"\nSaved: {args.json}")
+    if conflicts and not args.warn_only:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
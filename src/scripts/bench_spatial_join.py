@@ -0,0 +1,89 @@
+import argparse
+import dataclasses
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.join import Shapes, nested_loop_join, spatial_join
+from mohenjo.registry import FeatureCategory, LandmarkCategory, LandmarkRegistry
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+LANDMARKS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'landmarks.yaml')
+PROCEDURAL_PATH = os.path.join(BASE_DIR, 'src', 'data', 'procedural.yaml')
+
+def shifted(items, dx):
+    """Copies of landmarks / features moved dx metres east."""
+    out = []
+    for item in items:
+        if hasattr(item, 'geometry'):
+            g = dict(item.geometry)
+            if 'points' in g:
+                g['points'] = [(x + dx, y) for x, y in g['points']]
+                g['holes'] = [[(x + dx, y) for x, y in h] for h in g.get('holes', ())]
+            else:
+                g['x'] = g['x'] + dx
+            out.append(dataclasses.replace(item, geometry=g))
+        else:
+            out.append(dataclasses.replace(item, abs_x=item.abs_x + dx))
+    return out
+
+def tiled(items, copies, pitch):
+    return [c for k in range(copies) for c in shifted(items, k * pitch)] if copies > 1 else list(items)
+
+def time_join(left, right, predicate, naive_max):
+    """(pairs, join s, nested s, nested estimated, match)."""
+    start = time.perf_counter()
+    i, j = spatial_join(left, right, predicate)
+    joined = time.perf_counter() - start
+
+    # The nested loop grows with len(left) * len(right): time a slice of the left side past naive_max
+    rows = len(left) if len(left) * len(right) <= naive_max else max(1, naive_max // max(1, len(right)))
+    sample = Shapes(left.items[:rows])
+    start = time.perf_counter()
+    ni, nj = nested_loop_join(sample, right, predicate)
+    nested = (time.perf_counter() - start) * len(left) / rows
+    keep = i < rows
+    match = np.array_equal(i[keep], ni) and np.array_equal(j[keep], nj)
+    return len(i), joined, nested, rows < len(left), match
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the numpy spatial join against a nested loop on the city's "
+                                                 "features (houses in zones, features on streets, feature overlaps)")
+    parser.add_argument('--copies', type=int, default=1,
+                        help="Tile the features and zones this many times eastward to scale the data up")
+    parser.add_argument('--naive-max', type=int, default=20_000_000,
+                        help="Pairs the nested loop tests at most; beyond that it is timed on a slice and scaled")
+    args = parser.parse_args()
+
+    registry = LandmarkRegistry(LANDMARKS_PATH, PROCEDURAL_PATH)
+    landmarks = list(registry.landmarks.values())
+    pitch = 1000.0  # Wider than the site
+    features = tiled(registry.procedural_features, args.copies, pitch)
+    zones = tiled([lm for lm in landmarks if lm.category == LandmarkCategory.ZONE or lm.id.endswith("_area")],
+                  args.copies, pitch)
+    streets = tiled([lm for lm in landmarks if lm.category == LandmarkCategory.STREET], args.copies, pitch)
+    streets += [pf for pf in features if pf.category == FeatureCategory.STREET]
+
+    start = time.perf_counter()
+    shapes = {name: Shapes(items) for name, items in (("features", features), ("zones", zones), ("streets", streets))}
+    print(f"{len(features)} features, {len(zones)} zones/areas, {len(streets)} streets "
+          f"(columns built in {time.perf_counter() - start:.2f}s)")
+
+    cases = [
+        ("houses in zones", "features", "zones", "center"),
+        ("inside zones", "features", "zones", "within"),
+        ("on streets", "features", "streets", "intersects"),
+        ("feature overlaps", "features", "features", "intersects"),
+    ]
+    print(f"{'case':<18}{'predicate':<12}{'pairs':>9}{'join':>10}{'nested':>12}{'speedup':>9}  match")
+    for label, left, right, predicate in cases:
+        pairs, joined, nested, estimated, match = time_join(shapes[left], shapes[right], predicate, args.naive_max)
+        print(f"{label:<18}{predicate:<12}{pairs:>9}{joined * 1000:>8.0f}ms{nested * 1000:>9.0f}ms"
+              f"{'~' if estimated else ' '}{nested / joined:>8.1f}x  {'yes' if match else 'NO'}")
+
+if __name__ == "__main__":
+    main()
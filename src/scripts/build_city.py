@@ -0,0 +1,149 @@
+import argparse
+import os
+import sys
+from functools import lru_cache, partial
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.areas import AREAS
+from mohenjo.build import BuildGraph, Step
+from mohenjo.consolidate import consolidate_features
+from mohenjo.heights import MATERIALS
+from mohenjo.registry import LandmarkRegistry
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+LANDMARKS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'landmarks.yaml')
+PROCEDURAL_PATH = os.path.join(BASE_DIR, 'src', 'data', 'procedural.yaml')
+SAMPLES_DIR = os.path.join(BASE_DIR, 'outputs', 'samples')
+LOG_DIR = os.path.join(BASE_DIR, 'outputs', 'build')
+
+# Step functions are module level so worker processes can unpickle them.
+# Generation steps only read landmarks.yaml and return features; the single
+# `procedural` step merges them into procedural.yaml, so no step clobbers another.
+
+@lru_cache(maxsize=None)
+def landmarks() -> LandmarkRegistry:
+    return LandmarkRegistry(LANDMARKS_PATH)  # One per worker process
+
+def make_area(key, material=None, terrain_seed=None):
+    area = type(AREAS[key])()
+    if material:
+        area.calibration = MATERIALS[material]
+    if terrain_seed is not None:
+        from mohenjo.terrain import Terrain  # Needs numpy
+        area.terrain = Terrain.from_registry(landmarks(), seed=terrain_seed)
+    return area
+
+def citadel_bastions():
+    from generate import generate_citadel_bastions
+    return generate_citadel_bastions(landmarks())
+
+def citadel_interior():
+    from generate import generate_citadel_interior
+    return generate_citadel_interior(landmarks())
+
+def citadel(citadel_bastions, citadel_interior):
+    return consolidate_features(citadel_bastions + citadel_interior)
+
+def area_features(key):
+    rejected = []
+    features, _ = AREAS[key].generate(landmarks(), rejected=rejected)
+    try:
+        from mohenjo.stats import write_area_stats  # Needs numpy
+    except ImportError:
+        print("numpy not installed: skipping zone stats")
+    else:
+        for out in write_area_stats(AREAS[key], landmarks(), features, rejected, SAMPLES_DIR):
+            print(f"Saved: {out}")
+    return features
+
+def procedural(citadel, vs_features, dk_features):
+    from generate import merge_citadel
+    registry = LandmarkRegistry(LANDMARKS_PATH, PROCEDURAL_PATH if os.path.exists(PROCEDURAL_PATH) else None)
+    features = merge_citadel(registry.procedural_features, citadel)
+    features = AREAS["vs"].merge(registry, features, vs_features)
+    features = AREAS["dk"].merge(registry, features, dk_features)
+    registry.save_procedural(PROCEDURAL_PATH, features)
+    print(f"Saved {len(features)} features to {PROCEDURAL_PATH}")
+    return len(features)
+
+def area_render(key, options, **deps):
+    area = make_area(key, **options)
+    registry = landmarks()
+    canvas = area.canvas(registry)
+    return area.rasterize(registry, deps[f"{key}_features"], canvas)
+
+def area_tiles(key, options, **deps):
+    area = make_area(key, **options)
+    written = area.save_outputs(deps[f"{key}_render"], area.canvas(landmarks()), SAMPLES_DIR)
+    for out in written:
+        print(f"Saved: {out}")
+    return written
+
+def hr_print(options):
+    from generate_hr_area_print import generate_hr_area_print
+    generate_hr_area_print(**options)
+
+def citadel_print(material, procedural):
+    from generate_citadel_print import generate_citadel_print
+    generate_citadel_print(material)
+
+def landmark_map(procedural):
+    from render_map import LandmarkRenderer
+    renderer = LandmarkRenderer(LandmarkRegistry(LANDMARKS_PATH, PROCEDURAL_PATH))
+    renderer.render(os.path.join(BASE_DIR, 'outputs', 'landmark_map.svg'))
+
+def city_graph(material=None, terrain_seed=None) -> BuildGraph:
+    options = {'material': material, 'terrain_seed': terrain_seed}
+    graph = BuildGraph([
+        Step("citadel_bastions", citadel_bastions),
+        Step("citadel_interior", citadel_interior),
+        Step("citadel", citadel, ("citadel_bastions", "citadel_interior")),
+        Step("hr_print", partial(hr_print, options)),
+    ])
+    for key in ("vs", "dk"):
+        graph.add(Step(f"{key}_features", partial(area_features, key)))
+        graph.add(Step(f"{key}_render", partial(area_render, key, options), (f"{key}_features",)))
+        graph.add(Step(f"{key}_tiles", partial(area_tiles, key, options), (f"{key}_render",)))
+    graph.add(Step("procedural", procedural, ("citadel", "vs_features", "dk_features")))
+    graph.add(Step("citadel_print", partial(citadel_print, material), ("procedural",)))
+    graph.add(Step("landmark_map", landmark_map, ("procedural",)))
+    return graph
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Regenerate the whole city: Citadel, VS/DK/HR areas, prints and map, in dependency order")
+    parser.add_argument('targets', nargs='*', help="Steps to build, with their dependencies (default: all)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--list', action='store_true', help="Print the steps and their dependencies, then exit")
+    parser.add_argument("--terrain", action="store_true", help="Noise terrain under the VS/DK/HR prints")
+    parser.add_argument("--seed", type=int, default=42, help="Terrain noise seed")
+    parser.add_argument("--material", choices=sorted(MATERIALS),
+                        help="Map heights through a material calibration curve (default: 3 legacy levels)")
+    args = parser.parse_args()
+
+    graph = city_graph(args.material, args.seed if args.terrain else None)
+    if args.list:
+        for name in graph.order():
+            deps = graph.steps[name].deps
+            print(f"{name}" + (f" <- {', '.join(deps)}" if deps else ""))
+        return
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    def on_done(run):
+        with open(os.path.join(LOG_DIR, f"{run.name}.log"), 'w') as f:
+            f.write(run.log + (run.error or ""))
+        status = "FAILED" if run.error else "done"
+        print(f"  {run.name}: {status} in {run.duration:.2f}s")
+        if run.error:
+            print(run.error)
+
+    report = graph.run(args.targets or None, jobs=args.jobs, on_done=on_done)
+    print(report.format())
+    print(f"Step logs in {LOG_DIR}")
+    if not report.ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
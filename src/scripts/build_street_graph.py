@@ -0,0 +1,132 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import yaml
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.streets import StreetGraph, river_outfalls, route_drainage
+
+DRAIN_COLORS = {"minor": "#6fa8dc", "branch": "#3d85c6", "main": "#073763"}
+
+def write_svg(graph, network, path, margin=20.0):
+    """Street centerlines in grey, drains on top colored and sized by class, outfalls in red."""
+    xs = [p[0] for p in graph.nodes]
+    ys = [p[1] for p in graph.nodes]
+    x0, y0 = min(xs) - margin, min(ys) - margin
+    w, h = max(xs) - x0 + margin, max(ys) - y0 + margin
+
+    def sv(p):  # World Y up -> SVG Y down
+        return f"{p[0] - x0:.1f},{h - (p[1] - y0):.1f}"
+
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {w:.0f} {h:.0f}" '
+             f'width="{w:.0f}" height="{h:.0f}">',
+             f'<rect width="{w:.0f}" height="{h:.0f}" fill="#f4efe4"/>']
+    for u, v, _, i in graph.edges:
+        width = max(graph.segments[i].width, 1.0)
+        lines.append(f'<polyline points="{sv(graph.nodes[u])} {sv(graph.nodes[v])}" stroke="#bbb" '
+                     f'stroke-width="{width:.1f}" fill="none"/>')
+    for d in network.drains:
+        lines.append(f'<polyline points="{sv(graph.nodes[d.upstream])} {sv(graph.nodes[d.downstream])}" '
+                     f'stroke="{DRAIN_COLORS[d.size]}" stroke-width="{d.width * 3:.1f}" fill="none"/>')
+    for n in network.outfalls:
+        x, y = sv(graph.nodes[n]).split(',')
+        lines.append(f'<circle cx="{x}" cy="{y}" r="5" fill="#c00"/>')
+    lines.append('</svg>')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def write_drains(graph, network, path):
+    drains = []
+    for d in network.drains:
+        drains.append({
+            'street': graph.segments[graph.edges[d.edge][3]].id,
+            'from': [round(c, 2) for c in graph.nodes[d.upstream]],
+            'to': [round(c, 2) for c in graph.nodes[d.downstream]],
+            'length_m': round(d.length, 2),
+            'flow_m': round(d.flow, 2),
+            'size': d.size,
+            'width_m': d.width,
+        })
+    data = {
+        'outfalls': [[round(c, 2) for c in graph.nodes[n]] for n in network.outfalls],
+        'drains': drains,
+    }
+    with open(path, 'w') as f:
+        yaml.dump(data, f, sort_keys=False)
+
+def main():
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    landmarks_path = os.path.join(base_dir, 'src', 'data', 'landmarks.yaml')
+    procedural_path = os.path.join(base_dir, 'src', 'data', 'procedural.yaml')
+    output_dir = os.path.join(base_dir, 'outputs', 'streets')
+
+    parser = argparse.ArgumentParser(description="Build the street graph and route drainage to the river")
+    parser.add_argument('--route', nargs=2, metavar=('FROM', 'TO'),
+                        help="Shortest street route between two landmark ids")
+    parser.add_argument('--reach', type=str, metavar='LANDMARK',
+                        help="Street nodes reachable from a landmark (with --radius)")
+    parser.add_argument('--radius', type=float, default=200.0, help="Walking distance for --reach (m)")
+    parser.add_argument('--terrain', action='store_true',
+                        help="Route drains downhill over the noise terrain (needs numpy)")
+    parser.add_argument('--seed', type=int, default=42, help="Terrain noise seed")
+    parser.add_argument('--bench', type=int, default=0, metavar='N',
+                        help="Time N random shortest-path queries in bulk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    graph = StreetGraph.from_registry(registry)
+    components = len(set(graph.components()))
+    print(f"Street graph: {len(graph.segments)} streets -> {len(graph.nodes)} nodes, "
+          f"{len(graph.edges)} edges, {graph.total_length:.0f} m, {components} component(s)")
+
+    def node_for(lm_id):
+        lm = registry.landmarks.get(lm_id)
+        if lm is None:
+            parser.error(f"unknown landmark {lm_id}")
+        return graph.nearest_node(lm.abs_x, lm.abs_y)
+
+    if args.route:
+        a, b = (node_for(lm_id) for lm_id in args.route)
+        length, path = graph.shortest_path(a, b)
+        if path:
+            print(f"Route {args.route[0]} -> {args.route[1]}: {length:.0f} m over {len(path) - 1} edges")
+        else:
+            print(f"Route {args.route[0]} -> {args.route[1]}: not connected")
+
+    if args.reach:
+        reached = graph.reachable(node_for(args.reach), args.radius)
+        print(f"Within {args.radius:.0f} m of {args.reach}: {len(reached)} nodes")
+
+    if args.bench:
+        rng = random.Random(42)
+        pairs = [(rng.randrange(len(graph.nodes)), rng.randrange(len(graph.nodes))) for _ in range(args.bench)]
+        t = time.perf_counter()
+        graph.path_lengths(pairs)
+        print(f"{args.bench} shortest-path queries in {time.perf_counter() - t:.3f}s")
+
+    elevation = None
+    if args.terrain:
+        from mohenjo.terrain import Terrain
+        elevation = Terrain.from_registry(registry, seed=args.seed).at
+    network = route_drainage(graph, river_outfalls(graph, registry), elevation=elevation)
+    counts = network.size_counts()
+    print(f"Drainage: {len(network.drains)} drains to {len(network.outfalls)} outfall(s) "
+          + ", ".join(f"{n} {name}" for name, n in counts.items()))
+
+    os.makedirs(output_dir, exist_ok=True)
+    svg_path = os.path.join(output_dir, 'drainage.svg')
+    yaml_path = os.path.join(output_dir, 'drainage.yaml')
+    write_svg(graph, network, svg_path)
+    write_drains(graph, network, yaml_path)
+    print(f"Saved: {svg_path}")
+    print(f"Saved: {yaml_path}")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.areas import AREAS
+from mohenjo.formats import PROFILES, to_palette
+from mohenjo.heights import MATERIALS
+from mohenjo.registry import LandmarkRegistry
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+LANDMARKS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'landmarks.yaml')
+PROCEDURAL_PATH = os.path.join(BASE_DIR, 'src', 'data', 'procedural.yaml')
+
+def area_images(key, terrain_seed=None, material=None):
+    """{bits: full print} for an area, from the persisted features (8-bit, and 16-bit if numpy is there)."""
+    registry = LandmarkRegistry(LANDMARKS_PATH, PROCEDURAL_PATH)
+    area = AREAS[key]
+    if terrain_seed is not None:
+        from mohenjo.terrain import Terrain  # Needs numpy
+        area.terrain = Terrain.from_registry(registry, seed=terrain_seed)
+    area.calibration = MATERIALS[material] if material else None
+    canvas = area.canvas(registry)
+    features = area.own_features(registry, registry.procedural_features)
+    images = {8: area.rasterize(registry, features, canvas)}
+    try:
+        images[16] = area.rasterize(registry, features, canvas, bits=16)
+    except ImportError:
+        print("numpy not installed: skipping 16-bit")
+    return images
+
+def measure(profile, image, out_dir, runs):
+    """(best encode seconds, file size, file path)."""
+    path = profile.path(os.path.join(out_dir, f"{profile.name}.png"))
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        profile.save(image, path)
+        best = min(best, time.perf_counter() - start)
+    return best, os.path.getsize(path), path
+
+def main():
+    parser = argparse.ArgumentParser(description="Encode one print with every output profile and report time and size")
+    parser.add_argument('--area', choices=sorted(AREAS), default='dk')
+    parser.add_argument('--image', help="Existing grayscale image to encode instead of rendering an area "
+                                        "(e.g. outputs/samples/mohenjo_test_sample_block.png)")
+    parser.add_argument('--terrain', action='store_true', help="Noise terrain under the area")
+    parser.add_argument('--seed', type=int, default=42, help="Terrain noise seed")
+    parser.add_argument('--material', choices=sorted(MATERIALS))
+    parser.add_argument('--profile', action='append', choices=list(PROFILES), help="Profiles to compare (default: all)")
+    parser.add_argument('--runs', type=int, default=3, help="Encodes per profile (best is kept)")
+    parser.add_argument('--keep', help="Folder to keep the encoded files in (default: a temp folder)")
+    args = parser.parse_args()
+
+    if args.image:
+        image = Image.open(args.image).convert('L')
+        images = {8: image, 16: image.convert('I').point(lambda v: v * 257).convert('I;16')}
+        label = os.path.basename(args.image)
+    else:
+        images = area_images(args.area, args.seed if args.terrain else None, args.material)
+        label = AREAS[args.area].prefix
+    full = images[8]
+    levels = len(full.getcolors(256))
+    _, palette_bits = to_palette(full)
+    print(f"{label}: {full.width}x{full.height} px, {levels} gray levels"
+          + (f" (palette: {palette_bits}-bit)" if palette_bits else " (too many for a palette)"))
+
+    profiles = [PROFILES[name] for name in (args.profile or PROFILES)]
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = args.keep or tmp
+        os.makedirs(out_dir, exist_ok=True)
+        baseline = None
+        print(f"{'profile':<10}{'encode':>9}{'size':>12}{'vs default':>12}  file")
+        for profile in profiles:
+            if profile.bits not in images:
+                continue
+            seconds, size, path = measure(profile, images[profile.bits], out_dir, args.runs)
+            if baseline is None or profile.name == 'default':
+                baseline = size
+            # Every profile must read back as the print it was given
+            check = Image.open(path)
+            check.load()
+            back = check.convert('L') if profile.bits == 8 else check
+            ok = back.tobytes() == images[profile.bits].tobytes()
+            print(f"{profile.name:<10}{seconds * 1000:>7.0f}ms{size / 1024:>10.1f}KB{size / baseline:>11.2f}x  "
+                  f"{os.path.basename(path)}{'' if ok else '  MISMATCH'}")
+        if args.keep:
+            print(f"Files kept in {out_dir}")
+
+if __name__ == "__main__":
+    main()
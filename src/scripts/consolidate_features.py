@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import time
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.consolidate import consolidate_features
+
+def main():
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    landmarks_path = os.path.join(base_dir, 'src', 'data', 'landmarks.yaml')
+    procedural_path = os.path.join(base_dir, 'src', 'data', 'procedural.yaml')
+
+    parser = argparse.ArgumentParser(
+        description="Merge touching footprints in procedural.yaml (walls + bastions, house wall/courtyard pairs)")
+    parser.add_argument('--dry-run', action='store_true', help="Report only, do not rewrite procedural.yaml")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    before = registry.procedural_features
+    after = consolidate_features(before)
+
+    def vertices(features):
+        return sum(len(f.geometry.get('points', ())) + sum(len(h) for h in f.geometry.get('holes', ()))
+                   for f in features)
+
+    print(f"Features: {len(before)} -> {len(after)}")
+    print(f"Vertices: {vertices(before)} -> {vertices(after)}")
+    if args.dry_run:
+        return
+
+    size_before = os.path.getsize(procedural_path)
+    registry.save_procedural(procedural_path, after)
+    print(f"procedural.yaml: {size_before // 1024} KB -> {os.path.getsize(procedural_path) // 1024} KB")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import time
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.areas import PRINT_AREAS
+from mohenjo.laser import (LaserSettings, PrintFrame, build_paths, estimate_job, estimate_raster_seconds,
+                           order_paths, travel_distance, write_gcode, write_svg)
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m {seconds:02d}s" if hours else f"{minutes}m {seconds:02d}s"
+
+def main():
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    landmarks_path = os.path.join(base_dir, 'src', 'data', 'landmarks.yaml')
+    procedural_path = os.path.join(base_dir, 'src', 'data', 'procedural.yaml')
+    output_dir = os.path.join(base_dir, 'outputs', 'laser')
+
+    defaults = LaserSettings()
+    parser = argparse.ArgumentParser(description="Export vector cut/score paths for an area print")
+    parser.add_argument('--area', choices=sorted(PRINT_AREAS), required=True,
+                        help="Print area; citadel is the board of generate_citadel_print.py")
+    parser.add_argument('--format', choices=['svg', 'gcode'], default='svg')
+    parser.add_argument('--no-frame', action='store_true', help="Do not cut the board edge")
+    parser.add_argument('--score-only', action='store_true',
+                        help="Score every outline instead of cutting buildings out")
+    parser.add_argument('--cut-speed', type=float, default=defaults.cut_speed_mm_s, help="mm/s")
+    parser.add_argument('--cut-passes', type=int, default=defaults.cut_passes)
+    parser.add_argument('--score-speed', type=float, default=defaults.score_speed_mm_s, help="mm/s")
+    parser.add_argument('--travel-speed', type=float, default=defaults.travel_speed_mm_s, help="mm/s")
+    parser.add_argument('--raster-speed', type=float, default=defaults.raster_speed_mm_s,
+                        help="Engraving speed used for the raster comparison (mm/s)")
+    parser.add_argument('--output', type=str, help="Output path (default: outputs/laser/<prefix>.<format>)")
+    args = parser.parse_args()
+
+    settings = LaserSettings(cut_speed_mm_s=args.cut_speed, cut_passes=args.cut_passes,
+                             score_speed_mm_s=args.score_speed, travel_speed_mm_s=args.travel_speed,
+                             raster_speed_mm_s=args.raster_speed)
+
+    start = time.perf_counter()
+    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    area = PRINT_AREAS[args.area]
+    if not area.area(registry):
+        print(f"Error: {area.area_id} not found.")
+        return
+
+    canvas = area.canvas(registry)
+    frame = PrintFrame(canvas)
+    features = area.own_features(registry, registry.procedural_features)
+    paths = build_paths(area.outlines(registry, features), frame, include_frame=not args.no_frame,
+                        score_only=args.score_only)
+    print(f"{len(paths)} paths ({frame.width_mm:.1f} x {frame.height_mm:.1f} mm)")
+
+    naive_travel = travel_distance(paths)
+    paths = order_paths(paths)
+    job = estimate_job(paths, settings)
+    print(f"  Travel: {naive_travel:.0f} mm in draw order -> {job.travel_mm:.0f} mm optimized")
+    print(f"  Cut: {job.cut_mm:.0f} mm x {settings.cut_passes} passes, score: {job.score_mm:.0f} mm")
+
+    out = args.output or os.path.join(output_dir, f"{area.prefix}.{args.format}")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    if args.format == 'gcode':
+        write_gcode(paths, frame, settings, out)
+    else:
+        write_svg(paths, frame, out)
+    print(f"Saved: {out}")
+
+    print(f"Estimated vector job: {format_duration(job.seconds)} "
+          f"(raster engraving at {canvas.dpi} dpi: {format_duration(estimate_raster_seconds(canvas, settings))})")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
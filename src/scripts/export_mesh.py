@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import time
+
+from PIL import Image
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.areas import AREAS
+from mohenjo.raster import DPI
+from mohenjo.mesh import HeightmapMesh, MeshSettings, write_3mf, write_stl
+
+def main():
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    landmarks_path = os.path.join(base_dir, 'src', 'data', 'landmarks.yaml')
+    procedural_path = os.path.join(base_dir, 'src', 'data', 'procedural.yaml')
+    output_dir = os.path.join(base_dir, 'outputs', 'meshes')
+
+    parser = argparse.ArgumentParser(description="Export a print heightmap as a printable STL/3MF mesh")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--area', choices=sorted(AREAS), help="Rasterize this print area from procedural.yaml")
+    source.add_argument('--image', type=str, help="Use an existing grayscale heightmap PNG")
+    parser.add_argument('--dpi', type=int, default=DPI,
+                        help=f"Raster resolution; sets the XY size of one pixel (default: {DPI})")
+    parser.add_argument('--format', choices=['stl', '3mf'], default='stl')
+    parser.add_argument('--base-mm', type=float, default=2.0, help="Plinth thickness under level 0")
+    parser.add_argument('--relief-mm', type=float, default=3.0, help="Height of white (255) above the plinth")
+    parser.add_argument('--output', type=str, help="Output path (default: outputs/meshes/<name>.<format>)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.area:
+        registry = LandmarkRegistry(landmarks_path, procedural_path)
+        area = AREAS[args.area]
+        if not area.area(registry):
+            print(f"Error: {area.area_id} not found.")
+            return
+        print(f"Rasterizing {area.area_id} at {args.dpi} dpi...")
+        canvas = area.canvas(registry, args.dpi)
+        image = area.rasterize(registry, area.own_features(registry, registry.procedural_features), canvas)
+        name = area.prefix
+    else:
+        image = Image.open(args.image)
+        name = os.path.splitext(os.path.basename(args.image))[0]
+
+    settings = MeshSettings(pixel_mm=25.4 / args.dpi, base_mm=args.base_mm, relief_mm=args.relief_mm)
+    print(f"Meshing {image.size[0]}x{image.size[1]} px ({image.size[0] * settings.pixel_mm:.1f} x "
+          f"{image.size[1] * settings.pixel_mm:.1f} mm)...")
+    mesh = HeightmapMesh(image, settings)
+    if mesh.bridged:
+        print(f"  Raised {mesh.bridged} pixels where buildings touched only at a corner")
+
+    out = args.output or os.path.join(output_dir, f"{name}.{args.format}")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    writer = write_3mf if args.format == '3mf' else write_stl
+    count = writer(mesh, out)
+
+    naive = image.size[0] * image.size[1] * 2
+    print(f"Saved: {out}")
+    print(f"  {len(mesh.faces)} faces, {count} triangles ({naive} for two per pixel tops alone)")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import os
 import sys
 import argparse
+import time
 sys.path.append(os.path.join(os.path.dirname(__file__), '..')) # Add src/
-from mohenjo.registry import LandmarkRegistry, ProceduralFeature
+from mohenjo.registry import FeatureCategory, LandmarkRegistry, ProceduralFeature
+from mohenjo.consolidate import consolidate_features
+from mohenjo.packing import FreeRectPacker
 
 def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeature]:
     features = []
@@ -34,7 +37,8 @@ def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeat
             parent_id="citadel_walls",
             shape="RECT",
             geometry={'x': x, 'y': y, 'w': w, 'h': h},
-            description=f"Citadel Wall Segment {side}"
+            description=f"Citadel Wall Segment {side}",
+            category=FeatureCategory.CITADEL_WALL
         ))
 
     # Determine positions along X axis
@@ -49,7 +53,8 @@ def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeat
         features.append(ProceduralFeature(
             id=f"bastion_top_{i}", parent_id="citadel_walls", shape="RECT",
             geometry={'x': x_pos, 'y': y_start, 'w': bastion_w, 'h': bastion_l},
-            description="Citadel Bastion"
+            description="Citadel Bastion",
+            category=FeatureCategory.BASTION
         ))
         if i < len(x_positions) - 1:
             next_x = x_positions[i+1]
@@ -62,7 +67,8 @@ def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeat
         features.append(ProceduralFeature(
             id=f"bastion_bottom_{i}", parent_id="citadel_walls", shape="RECT",
             geometry={'x': x_pos, 'y': y_end, 'w': bastion_w, 'h': bastion_l},
-            description="Citadel Bastion"
+            description="Citadel Bastion",
+            category=FeatureCategory.BASTION
         ))
         if i < len(x_positions) - 1:
             next_x = x_positions[i+1]
@@ -82,7 +88,8 @@ def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeat
         features.append(ProceduralFeature(
             id=f"bastion_left_{i}", parent_id="citadel_walls", shape="RECT",
             geometry={'x': x_start, 'y': y_pos, 'w': bastion_w, 'h': bastion_l},
-            description="Citadel Bastion"
+            description="Citadel Bastion",
+            category=FeatureCategory.BASTION
         ))
         if i < len(y_positions) - 1:
             next_y = y_positions[i+1]
@@ -94,7 +101,8 @@ def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeat
         features.append(ProceduralFeature(
             id=f"bastion_right_{i}", parent_id="citadel_walls", shape="RECT",
             geometry={'x': x_end, 'y': y_pos, 'w': bastion_w, 'h': bastion_l},
-            description="Citadel Bastion"
+            description="Citadel Bastion",
+            category=FeatureCategory.BASTION
         ))
         if i < len(y_positions) - 1:
             next_y = y_positions[i+1]
@@ -124,6 +132,31 @@ def generate_citadel_bastions(registry: LandmarkRegistry) -> list[ProceduralFeat
 
     return features
 
+# Block footprints (w, h) the interior packer picks from, largest first
+CITADEL_BLOCK_SIZES = [(22.0, 15.0), (18.0, 18.0), (18.0, 12.0), (15.0, 15.0), (15.0, 10.0), (12.0, 12.0), (10.0, 10.0)]
+
+def block_parts(kind: str, w: float, h: float, rotation: str = 'N') -> list[dict]:
+    """Part rects (dx, dy, w, h around the block centre) of a Solid, O-Type or U-Type block.
+
+    Proportions follow the original 15 m blocks: the U sits in the inner
+    80% with walls a third of its short side, the courtyard is a third of
+    the block.
+    """
+    if kind == 'Solid':
+        return [{'dx': 0.0, 'dy': 0.0, 'w': w, 'h': h}]
+    if kind == 'O':
+        return [{'dx': 0.0, 'dy': 0.0, 'w': w, 'h': h},
+                {'dx': 0.0, 'dy': 0.0, 'w': round(w / 3, 2), 'h': round(h / 3, 2)}]
+    uw, uh = w * 0.8, h * 0.8
+    t = min(uw, uh) / 3
+    if rotation in ('N', 'S'):  # Open Top / Open Bottom: vertical arms
+        sign = 1 if rotation == 'N' else -1
+        parts = [(-(uw - t) / 2, 0.0, t, uh), ((uw - t) / 2, 0.0, t, uh), (0.0, sign * (uh - t) / 2, uw - 2 * t, t)]
+    else:  # Open Left / Open Right: horizontal arms
+        sign = 1 if rotation == 'W' else -1
+        parts = [(0.0, -(uh - t) / 2, uw, t), (0.0, (uh - t) / 2, uw, t), (sign * (uw - t) / 2, 0.0, t, uh - 2 * t)]
+    return [{'dx': round(dx, 2), 'dy': round(dy, 2), 'w': round(pw, 2), 'h': round(ph, 2)} for dx, dy, pw, ph in parts]
+
 def generate_citadel_interior(registry: LandmarkRegistry) -> list[ProceduralFeature]:
     features = []
     
@@ -141,127 +174,80 @@ def generate_citadel_interior(registry: LandmarkRegistry) -> list[ProceduralFeat
     min_y = c_y - (c_l/2) + wall_thickness
     max_y = c_y + (c_l/2) - wall_thickness
     
-    # Get Exclusion Zones (Existing Landmarks in Citadel)
-    # We add a buffer of 5m
-    padding = 5.0
-    exclusion_zones = []
-    for lm in registry.landmarks.values():
-        if lm.region == 'Citadel' and lm.id != 'citadel_walls':
-            exclusion_zones.append(lm.get_bounds(padding=padding))
-            
-    def check_collision(x, y, w, h):
-        b_min_x = x - w/2
-        b_max_x = x + w/2
-        b_min_y = y - h/2
-        b_max_y = y + h/2
-        
-        # Check against Walls
-        if b_min_x < min_x or b_max_x > max_x or b_min_y < min_y or b_max_y > max_y:
-            return True
-            
-        # Check against Exclusion Zones
-        for ex in exclusion_zones:
-            if (b_max_x < ex[0] or b_min_x > ex[2] or 
-                b_max_y < ex[1] or b_min_y > ex[3]):
-                continue # No collision
-            else:
-                return True # Collided
-        return False
-
     # Block Generation Strategy
     import random
     random.seed(42) # Deterministic seed
-    
-    # Grid of potential blocks
-    block_size = 15.0 # Updated to 15m to match test sample
     street_width = 4.0
-    step = block_size + street_width
-    
-    # Start top-left
-    current_x = min_x + block_size/2
-    
-    count = 0
-    while current_x <= max_x:
-        current_y = min_y + block_size/2
-        while current_y <= max_y:
-            
-            # Try to place a block
-            if not check_collision(current_x, current_y, block_size, block_size):
-                
-                # Pick Type: 40% O-Shape (Courtyard), 40% U-Shape, 20% Solid
-                roll = random.random()
-                
-                if roll < 0.2:
-                    # Solid
-                    features.append(ProceduralFeature(
-                        id=f"cit_bldg_{count}", parent_id="citadel_walls", shape="RECT",
-                        geometry={'x': current_x, 'y': current_y, 'w': block_size, 'h': block_size},
-                        description="Citadel Building Block Solid"
-                    ))
-                elif roll < 0.6:
-                    # O-Shape (Courtyard)
-                    features.append(ProceduralFeature(
-                        id=f"cit_bldg_{count}_main", parent_id="citadel_walls", shape="RECT",
-                        geometry={'x': current_x, 'y': current_y, 'w': block_size, 'h': block_size},
-                        description="Citadel Building Block O-Type"
-                    ))
-                    # Inner Courtyard
-                    features.append(ProceduralFeature(
-                        id=f"cit_bldg_{count}_court", parent_id="citadel_walls", shape="RECT",
-                        geometry={'x': current_x, 'y': current_y, 'w': 5.0, 'h': 5.0},
-                        description="Citadel Building Courtyard"
-                    ))
-                else:
-                    # U-Shape
-                    rotation = random.choice(['N', 'S', 'E', 'W'])
-                    parts = []
-                    if rotation == 'N': # Open Top
-                        parts = [
-                            {'dx': -4.0, 'dy': 0.0, 'w': 4.0, 'h': 12.0},
-                            {'dx': 4.0, 'dy': 0.0, 'w': 4.0, 'h': 12.0},
-                            {'dx': 0.0, 'dy': 4.0, 'w': 4.0, 'h': 4.0}
-                        ]
-                    elif rotation == 'S': # Open Bottom
-                        parts = [
-                            {'dx': -4.0, 'dy': 0.0, 'w': 4.0, 'h': 12.0},
-                            {'dx': 4.0, 'dy': 0.0, 'w': 4.0, 'h': 12.0},
-                            {'dx': 0.0, 'dy': -4.0, 'w': 4.0, 'h': 4.0}
-                        ]
-                    elif rotation == 'W': # Open Left
-                        parts = [
-                            {'dx': 0.0, 'dy': -4.0, 'w': 12.0, 'h': 4.0},
-                            {'dx': 0.0, 'dy': 4.0, 'w': 12.0, 'h': 4.0},
-                            {'dx': 4.0, 'dy': 0.0, 'w': 4.0, 'h': 4.0}
-                        ]
-                    elif rotation == 'E': # Open Right
-                        parts = [
-                            {'dx': 0.0, 'dy': -4.0, 'w': 12.0, 'h': 4.0},
-                            {'dx': 0.0, 'dy': 4.0, 'w': 12.0, 'h': 4.0},
-                            {'dx': -4.0, 'dy': 0.0, 'w': 4.0, 'h': 4.0}
-                        ]
-                    
-                    for idx, p in enumerate(parts):
-                        features.append(ProceduralFeature(
-                            id=f"cit_bldg_{count}_u_{idx}", parent_id="citadel_walls", shape="RECT",
-                            geometry={'x': current_x + p['dx'], 'y': current_y + p['dy'], 
-                                    'w': p['w'], 'h': p['h']},
-                            description=f"Citadel Building Block U-Type {rotation}"
-                        ))
-                
-                count += 1
-                
-            current_y += step
-        current_x += step
-        
+    padding = 5.0 # Buffer kept around existing landmarks
+
+    # Free-space search: every block reserves its footprint plus half a street
+    # on each side, so neighbours end up one street apart. The container grows
+    # by half a street and the landmarks (Great Bath, Granary, College...)
+    # shrink by it, keeping buildings inside the walls and `padding` clear of them.
+    half = street_width / 2
+    exclusion_zones = [lm.get_bounds(padding=padding - half) for lm in registry.landmarks.values()
+                       if lm.region == 'Citadel' and lm.id != 'citadel_walls']
+    smallest = min(min(size) for size in CITADEL_BLOCK_SIZES) + street_width
+    packer = FreeRectPacker((min_x - half, min_y - half, max_x + half, max_y + half),
+                            exclusion_zones, min_size=smallest)
+
+    def choose(free_w, free_h):
+        # Random preferred size, else the largest one that fits (either way round)
+        preferred = random.choice(CITADEL_BLOCK_SIZES)
+        for w, h in [preferred] + CITADEL_BLOCK_SIZES:
+            for rotated, (bw, bh) in ((False, (w, h)), (True, (h, w))):
+                if bw + street_width <= free_w and bh + street_width <= free_h:
+                    return bw + street_width, bh + street_width, rotated
+        return None
+
+    start = time.perf_counter()
+    placements = packer.fill(choose)
+    elapsed = time.perf_counter() - start
+
+    for count, placement in enumerate(placements):
+        x1, y1, x2, y2 = placement.box
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        w, h = placement.size[0] - street_width, placement.size[1] - street_width
+
+        # Pick Type: 40% O-Shape (Courtyard), 40% U-Shape, 20% Solid
+        roll = random.random()
+        if roll < 0.2:
+            kind, suffixes, description = 'Solid', [''], "Citadel Building Block Solid"
+            parts = block_parts(kind, w, h)
+        elif roll < 0.6:
+            kind, suffixes, description = 'O', ['_main', '_court'], "Citadel Building Block O-Type"
+            parts = block_parts(kind, w, h)
+        else:
+            rotation = random.choice(['N', 'S', 'E', 'W'])
+            parts = block_parts('U', w, h, rotation)
+            suffixes = [f"_u_{idx}" for idx in range(len(parts))]
+            description = f"Citadel Building Block U-Type {rotation}"
+
+        for suffix, p in zip(suffixes, parts):
+            court = suffix == '_court'
+            features.append(ProceduralFeature(
+                id=f"cit_bldg_{count}{suffix}", parent_id="citadel_walls", shape="RECT",
+                geometry={'x': round(cx + p['dx'], 2), 'y': round(cy + p['dy'], 2), 'w': p['w'], 'h': p['h']},
+                description="Citadel Building Courtyard" if court else description,
+                category=FeatureCategory.COURTYARD if court else FeatureCategory.CITADEL_BUILDING
+            ))
+
+    built = sum(p.size[0] * p.size[1] for p in placements)
+    print(f"  Packed {len(placements)} blocks in {elapsed * 1000:.1f} ms "
+          f"({built / ((max_x - min_x + street_width) * (max_y - min_y + street_width)):.0%} of the interior reserved)")
     return features
 
+def merge_citadel(existing: list[ProceduralFeature], citadel: list[ProceduralFeature]) -> list[ProceduralFeature]:
+    """Replaces the Citadel features in a full feature list, keeping the area features."""
+    return citadel + [f for f in existing if f.parent_id != 'citadel_walls']
+
 def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     # Scripts are in src/scripts, data is in src/data
     data_path = os.path.join(base_dir, '..', 'data', 'landmarks.yaml')
     output_path = os.path.join(base_dir, '..', 'data', 'procedural.yaml')
     
-    registry = LandmarkRegistry(data_path)
+    registry = LandmarkRegistry(data_path, output_path if os.path.exists(output_path) else None)
     
     all_features = []
     
@@ -273,9 +259,12 @@ def main():
     interior = generate_citadel_interior(registry)
     all_features.extend(interior)
     
+    # Walls + bastions and multi-part buildings become single polygons
+    all_features = consolidate_features(all_features)
+
     print(f"Total features: {len(all_features)}")
-    print(f"Saving to {output_path}...")
-    registry.save_procedural(output_path, all_features)
+    print(f"Saving to {output_path} (VS/DK features kept)...")
+    registry.save_procedural(output_path, merge_citadel(registry.procedural_features, all_features))
     print("Done.")
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 from PIL import Image, ImageDraw
@@ -5,30 +6,37 @@ from PIL import Image, ImageDraw
 # Add project root to path to import mohenjo package
 sys.path.append(os.path.join(os.path.dirname(__file__), "../..", "src"))
 
-from mohenjo.registry import LandmarkRegistry
+from mohenjo.registry import FeatureCategory, LandmarkCategory, LandmarkRegistry
+from mohenjo.raster import fill_polygon
+from mohenjo.heights import (LegacyLevels, MATERIALS, height_code, DEFAULT_BUILDING_HEIGHT_M,
+                              GROUND_HEIGHT_M, STREET_HEIGHT_M)
 
 # Constants matches generate_test_sample.py
 SCALE_RATIO = 4000 # Updated to 1:4000
 DPI = 600
 CM_TO_INCH = 1 / 2.54
 
-# Laser Grayscale Values
-LEVEL_GROUND = 50       # Low burn (Gray)
-LEVEL_STREET = 20       # Medium burn (Dark Gray)
-LEVEL_BUILDING = 255    # No burn (White) - Highest point
+# Everything is drawn as height codes (mohenjo.heights) and turned into
+# laser grays at the end by the calibration: legacy 3 levels or a material curve.
+CODE_GROUND = height_code(GROUND_HEIGHT_M)
+CODE_STREET = height_code(STREET_HEIGHT_M)
 
-def meters_to_pixels(meters):
-    return int(meters * (100 / SCALE_RATIO) * CM_TO_INCH * DPI)
+def meters_to_pixels(meters, dpi=DPI):
+    return int(meters * (100 / SCALE_RATIO) * CM_TO_INCH * dpi)
 
-def generate_citadel_print():
+def generate_citadel_print(material=None, dpi=DPI, registry=None, output_path=None):
+    """Renders and saves the citadel print; returns the image.
+
+    The golden tests pass their own registry and output_path and a low dpi.
+    """
     # Paths
     base_dir = os.path.join(os.path.dirname(__file__), "../..")
     landmarks_path = os.path.join(base_dir, "src/data/landmarks.yaml")
     procedural_path = os.path.join(base_dir, "src/data/procedural.yaml")
-    output_path = os.path.join(base_dir, "outputs/samples/citadel_print.png")
+    output_path = output_path or os.path.join(base_dir, "outputs/samples/citadel_print.png")
 
     # Load Registry
-    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    registry = registry or LandmarkRegistry(landmarks_path, procedural_path)
     
     # Get Citadel Walls for canvas sizing
     citadel = registry.landmarks.get("citadel_walls")
@@ -57,16 +65,16 @@ def generate_citadel_print():
     total_w_m = model_w_m + (pad_w_m * 2)
     total_l_m = model_l_m + (pad_l_m * 2)
     
-    img_w = meters_to_pixels(total_w_m)
-    img_h = meters_to_pixels(total_l_m)
+    img_w = meters_to_pixels(total_w_m, dpi)
+    img_h = meters_to_pixels(total_l_m, dpi)
     
     print(f"Canvas: {total_w_m:.1f}m x {total_l_m:.1f}m")
     print(f"Padding X: {pad_w_m:.1f}m, Padding Y: {pad_l_m:.1f}m")
     print(f"Image: {img_w}x{img_h} px")
-    print(f"Scale: 1:{SCALE_RATIO} @ {DPI} DPI")
+    print(f"Scale: 1:{SCALE_RATIO} @ {dpi} DPI")
 
     # Create Image
-    img = Image.new('L', (img_w, img_h), LEVEL_GROUND)
+    img = Image.new('L', (img_w, img_h), CODE_GROUND)
     draw = ImageDraw.Draw(img)
     
     # Coordinate System
@@ -77,14 +85,14 @@ def generate_citadel_print():
     def world_to_img(x, y):
         # Image X increases Right (+X)
         # Image Y increases Down (-Y)
-        px = center_x_px + meters_to_pixels(x)
-        py = center_y_px - meters_to_pixels(y) 
+        px = center_x_px + meters_to_pixels(x, dpi)
+        py = center_y_px - meters_to_pixels(y, dpi) 
         return px, py
 
     def draw_rect(draw_obj, w_m, h_m, x_m, y_m, color):
         # x_m, y_m are CENTER of the rect
-        w_px = meters_to_pixels(w_m)
-        h_px = meters_to_pixels(h_m)
+        w_px = meters_to_pixels(w_m, dpi)
+        h_px = meters_to_pixels(h_m, dpi)
         
         cx, cy = world_to_img(x_m, y_m)
         
@@ -97,8 +105,8 @@ def generate_citadel_print():
         draw_obj.rectangle([x1, y1, x2, y2], fill=color)
 
     def draw_ellipse(draw_obj, w_m, l_m, x_m, y_m, color):
-        w_px = meters_to_pixels(w_m)
-        l_px = meters_to_pixels(l_m)
+        w_px = meters_to_pixels(w_m, dpi)
+        l_px = meters_to_pixels(l_m, dpi)
         
         cx, cy = world_to_img(x_m, y_m)
         
@@ -116,12 +124,10 @@ def generate_citadel_print():
         if lm.region == "Citadel" and lm.id != "citadel_walls":
             print(f"  - Drawing {lm.name} ({lm.shape})")
             
-            # Determine Color
-            color = LEVEL_BUILDING
-            if "pool" in lm.description.lower() or "tank" in lm.description.lower():
-                color = LEVEL_GROUND # Emulate depth for pool?
-            elif lm.id == "citadel_divinity_street":
-                 color = LEVEL_STREET
+            # Determine Height
+            height = height_code(lm.height_m or DEFAULT_BUILDING_HEIGHT_M)
+            if lm.category == LandmarkCategory.STREET:
+                height = CODE_STREET
 
             # Draw based on shape
             w = lm.dimensions.width
@@ -131,17 +137,13 @@ def generate_citadel_print():
                 if lm.dimensions.diameter > 0:
                     w = lm.dimensions.diameter
                     l = lm.dimensions.diameter
-                draw_ellipse(draw, w, l, lm.abs_x, lm.abs_y, color)
+                draw_ellipse(draw, w, l, lm.abs_x, lm.abs_y, height)
             
             elif lm.shape in ["RECT_COMPLEX", "RECT_GRID", "SQUARE_GRID", "LINE", "RECT_BORDER"]:
-                if lm.id == "citadel_great_bath":
-                     # Draw base block
-                     draw_rect(draw, w, l, lm.abs_x, lm.abs_y, LEVEL_BUILDING)
-                     # Draw Pool (Rough center approximation)
-                     if lm.dimensions.pool_w > 0:
-                         draw_rect(draw, lm.dimensions.pool_w, lm.dimensions.pool_l, lm.abs_x, lm.abs_y, LEVEL_GROUND)
-                else:
-                    draw_rect(draw, w, l, lm.abs_x, lm.abs_y, color)
+                draw_rect(draw, w, l, lm.abs_x, lm.abs_y, height)
+                # Tanks (pool_w/pool_l in landmarks.yaml) are cut to the ground, roughly centered
+                if lm.dimensions.pool_w > 0:
+                    draw_rect(draw, lm.dimensions.pool_w, lm.dimensions.pool_l, lm.abs_x, lm.abs_y, CODE_GROUND)
 
 
 
@@ -153,23 +155,38 @@ def generate_citadel_print():
     print(f"Drawing {len(registry.procedural_features)} Procedural Features...")
     for pf in registry.procedural_features:
         if pf.parent_id == "citadel_walls": # Only draw Citadel stuff
-            bg_color = LEVEL_BUILDING
-            if "Courtyard" in pf.description or "pool" in pf.description.lower():
-                bg_color = LEVEL_GROUND
+            bg_color = height_code(DEFAULT_BUILDING_HEIGHT_M)
+            if pf.category == FeatureCategory.COURTYARD:
+                bg_color = CODE_GROUND
             
-            # Geometry: x, y, w, h
             geo = pf.geometry
+            if pf.shape == "POLYGON":
+                # Consolidated walls/buildings; holes (courtyards, the walled interior) are left as drawn
+                fill_polygon(img, [world_to_img(x, y) for x, y in geo['points']], bg_color,
+                             [[world_to_img(x, y) for x, y in hole] for hole in geo.get('holes', [])])
+                continue
+
+            # Geometry: x, y, w, h
             draw_rect(draw, geo['w'], geo['h'], geo['x'], geo['y'], bg_color)
 
+    # Heights -> laser grays (one lookup-table pass)
+    calibration = MATERIALS[material] if material else LegacyLevels()
+    img = calibration.apply(img)
+
     # Save
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     img.save(output_path)
     print(f"Saved to {output_path}")
     
     # Calculat phys size
-    w_cm = img_w / DPI * 2.54
-    h_cm = img_h / DPI * 2.54
+    w_cm = img_w / dpi * 2.54
+    h_cm = img_h / dpi * 2.54
     print(f"Physical Size: {w_cm:.2f} cm x {h_cm:.2f} cm")
+    return img
 
 if __name__ == "__main__":
-    generate_citadel_print()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--material", choices=sorted(MATERIALS),
+                        help="Map heights through a material calibration curve (default: 3 legacy levels)")
+    args = parser.parse_args()
+    generate_citadel_print(args.material)
@@ -1,23 +1,23 @@
+import argparse
 import os
 import sys
 import random
-from PIL import Image, ImageDraw
 
 # Add project root to path to import mohenjo package
 sys.path.append(os.path.join(os.path.dirname(__file__), "../..", "src"))
 
-from mohenjo.registry import LandmarkRegistry
-from mohenjo.generators import generate_rich_zone, generate_poor_zone
+from mohenjo.registry import LANDMARKS, FeatureCategory, LandmarkCategory, LandmarkRegistry
+from mohenjo.generators import ZONE_GENERATORS
+from mohenjo.raster import AreaCanvas, DPI, split_tiles_vertical
+from mohenjo.heights import LegacyLevels, MATERIALS, height_code, DEFAULT_BUILDING_HEIGHT_M, GROUND_HEIGHT_M
+from mohenjo.areas import PrintArea, is_street
+from mohenjo.formats import DEFAULT_PROFILE, PROFILES
+from mohenjo.output import save_images, save_pyramid
+from mohenjo.preview import PREVIEW_FRACTION, describe_scale, preview_dpi
 
-# Constants
-SCALE_RATIO = 4000
-DPI = 600
-CM_TO_INCH = 1 / 2.54
-
-# Laser Grayscale Values
-LEVEL_GROUND = 50       # Low burn (Gray)
-LEVEL_STREET = 20       # Medium burn (Dark Gray)
-LEVEL_BUILDING = 255    # No burn (White) - Highest point
+# Everything is drawn as height codes (mohenjo.heights) and turned into
+# laser grays at the end by the calibration: legacy 3 levels or a material curve.
+CODE_GROUND = height_code(GROUND_HEIGHT_M)
 
 # Housing Constants
 RICH_HOUSE_SIZE_M = 15
@@ -26,9 +26,6 @@ POOR_HOUSE_H_M = 6
 RICH_GAP_M = 2  # Generous gap
 POOR_GAP_M = 1  # Tight gap
 
-def meters_to_pixels(meters):
-    return int(meters * (100 / SCALE_RATIO) * CM_TO_INCH * DPI)
-
 def draw_wobbly_rect(draw, x1, y1, x2, y2, color, wobble=1):
     """Draws a rectangle with slightly perturbed corners."""
     p1 = (x1 + random.randint(-wobble, wobble), y1 + random.randint(-wobble, wobble))
@@ -82,13 +79,20 @@ def gen_poor_block(draw, x1, y1, x2, y2, house_w_px, house_h_px, gap_px, color):
             current_x += w_actual + gap_px
         current_y += house_h_px + gap_px
 
-def generate_hr_area_print():
+def generate_hr_area_print(material=None, dpi=DPI, registry=None, output_dir=None, preview=None, terrain_seed=None):
+    """Renders and saves the HR print, its two tiles and its thumbnail pyramid; returns the full image.
+
+    The golden tests pass their own registry and output_dir and a low dpi.
+    `preview` renders at that fraction of the print DPI into outputs/previews.
+    """
     base_dir = os.path.join(os.path.dirname(__file__), "../..")
     landmarks_path = os.path.join(base_dir, "src/data/landmarks.yaml")
     procedural_path = os.path.join(base_dir, "src/data/procedural.yaml")
-    output_dir = os.path.join(base_dir, "outputs/samples")
+    output_dir = output_dir or os.path.join(base_dir, "outputs/previews" if preview else "outputs/samples")
+    # Previews are drafts: fast encoding
+    profile = PROFILES["preview" if preview else DEFAULT_PROFILE]
     
-    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    registry = registry or LandmarkRegistry(landmarks_path, procedural_path)
     
     hr_area_id = "lower_hr_area"
     hr_area = registry.landmarks.get(hr_area_id)
@@ -99,62 +103,36 @@ def generate_hr_area_print():
     # Canvas
     model_w_m = hr_area.dimensions.width
     model_l_m = hr_area.dimensions.length
-    padding_m = 10
-    total_w_m = model_w_m + (padding_m * 2)
-    total_l_m = model_l_m + (padding_m * 2)
-    
-    img_w = meters_to_pixels(total_w_m)
-    img_h = meters_to_pixels(total_l_m)
-    
-    img = Image.new('L', (img_w, img_h), LEVEL_GROUND)
-    draw = ImageDraw.Draw(img)
-    
-    center_x_px = img_w // 2
-    center_y_px = img_h // 2
+    canvas = AreaCanvas(hr_area.abs_x, hr_area.abs_y, model_w_m, model_l_m, padding_m=10, dpi=dpi)
+    if preview:
+        # Same drawing at a fraction of the resolution
+        final = canvas
+        canvas = AreaCanvas(hr_area.abs_x, hr_area.abs_y, model_w_m, model_l_m, padding_m=10,
+                            dpi=preview_dpi(preview))
+        print(describe_scale(canvas, final))
+    region = canvas.region(fill=CODE_GROUND)
+    if terrain_seed is not None:
+        # Noise ground under everything instead of flat ground, as on the VS/DK prints
+        from mohenjo.terrain import Terrain  # Needs numpy
+        terrain = Terrain.from_registry(registry, seed=terrain_seed)
+        terrain.paint(region, terrain.datum(hr_area.abs_x, hr_area.abs_y))
     
     hr_center_global_x = hr_area.abs_x
     hr_center_global_y = hr_area.abs_y
-    
-    def world_to_img(x, y):
-        rel_x = x - hr_center_global_x
-        rel_y = y - hr_center_global_y
-        px = center_x_px + meters_to_pixels(rel_x)
-        py = center_y_px - meters_to_pixels(rel_y)
-        return int(px), int(py)
-
-    def draw_rect(draw_obj, w_m, h_m, x_m, y_m, color):
-        w_px = meters_to_pixels(w_m)
-        h_px = meters_to_pixels(h_m) 
-        cx, cy = world_to_img(x_m, y_m)
-        x1 = cx - (w_px // 2)
-        y1 = cy - (h_px // 2)
-        x2 = x1 + w_px
-        y2 = y1 + h_px
-        draw_obj.rectangle([x1, y1, x2, y2], fill=color)
 
     # 1. Procedural Zones Generation
     print("Generating Procedural Housing...")
     
-    # Identify Zones
-    zones = [lm for lm in registry.landmarks.values() if lm.region == "Lower City" and "zone" in lm.shape.lower()]
+    # Identify Zones (Landmark.district from landmarks.yaml)
+    zones = [lm for lm in registry.landmarks.values() if lm.category == LandmarkCategory.ZONE and lm.district == "HR"]
     
-    rich_h_size_px = meters_to_pixels(RICH_HOUSE_SIZE_M)
-    poor_h_w_px = meters_to_pixels(POOR_HOUSE_W_M)
-    poor_h_h_px = meters_to_pixels(POOR_HOUSE_H_M)
-    rich_gap_px = meters_to_pixels(RICH_GAP_M)
-    poor_gap_px = meters_to_pixels(POOR_GAP_M)
-
-    from mohenjo.generators import generate_rich_zone, generate_poor_zone
-
     # [Collision Detection Preparation]
     # Identify Obstacles (Streets, specific landmarks)
     obstacles = []
     print("Identifying Obstacles for Collision Detection...")
     for lm in registry.landmarks.values():
-        # Heuristic: Streets/Lanes are obstacles. Existing explicit houses are obstacles.
-        if "street" in lm.id or "lane" in lm.id or "house" in lm.id:
-            if "zone" in lm.id: continue # Zones are not obstacles to themselves
-            
+        # Streets/Lanes are obstacles. Existing explicit houses are obstacles.
+        if lm.category in (LandmarkCategory.STREET, LandmarkCategory.HOUSE):
             # Simple Bounding Box Collision
             # Calculate Global Bounds in METERS
             w = lm.dimensions.width
@@ -188,9 +166,9 @@ def generate_hr_area_print():
         print(f"    - Absolute Loc: ({zone.abs_x}, {zone.abs_y})")
         
         # Get Pixel Bounds of the zone
-        w_px = meters_to_pixels(zone.dimensions.width)
-        l_px = meters_to_pixels(zone.dimensions.length)
-        cx, cy = world_to_img(zone.abs_x, zone.abs_y)
+        w_px = canvas.m2p(zone.dimensions.width)
+        l_px = canvas.m2p(zone.dimensions.length)
+        cx, cy = canvas.world_to_img(zone.abs_x, zone.abs_y)
         
         # Zone Bounds (Top Left)
         z_x1 = cx - w_px//2
@@ -201,14 +179,12 @@ def generate_hr_area_print():
 
         # Generator returns houses in LOCAL coordinates (0 to width/length in meters)
         # We need to transform them to IMAGE coordinates:
-        # Image X = z_x1 + meters_to_pixels(local_x)
-        # Image Y = z_y1 + meters_to_pixels(local_y)
+        # Image X = z_x1 + canvas.m2p(local_x)
+        # Image Y = z_y1 + canvas.m2p(local_y)
         
         houses = []
-        if "rich" in zone.id:
-            houses = generate_rich_zone(zone.dimensions.width, zone.dimensions.length)
-        elif "poor" in zone.id:
-            houses = generate_poor_zone(zone.dimensions.width, zone.dimensions.length)
+        if zone.zone_kind:
+            houses = ZONE_GENERATORS[zone.zone_kind](zone.dimensions.width, zone.dimensions.length)
             
         print(f"    - Generating {len(houses)} shapes (pre-collision)...")
         
@@ -241,20 +217,9 @@ def generate_hr_area_print():
         print(f"    - Valid shapes after collision check: {len(valid_houses)}")
 
         for (h, global_points) in valid_houses:
-            # Transform global points to Canvas Pixels
-            pixel_points = []
-            for (gx, gy) in global_points:
-                # world_to_img takes global coordinates
-                px, py = world_to_img(gx, gy)
-                pixel_points.append((px, py))
-            
-            # Determine color
-            if h.category == "COURTYARD":
-                color = LEVEL_GROUND
-            else:
-                color = LEVEL_BUILDING
-                
-            draw.polygon(pixel_points, fill=color)
+            # The region maps global points to canvas pixels; heights as in the VS/DK prints
+            height = PrintArea.category_heights[FeatureCategory[h.category]]
+            region.polygon(global_points, height_code(height))
 
 
     # 2. explicit Landmarks (Overlay on top)
@@ -266,63 +231,57 @@ def generate_hr_area_print():
     min_y = hr_center_global_y - half_l
     max_y = hr_center_global_y + half_l
 
-    for lm_id, lm in registry.landmarks.items():
-        if lm.id == hr_area_id or "zone" in lm.shape.lower(): 
+    # Landmarks centered in the HR area (spatial index query instead of a scan)
+    for lm in registry.within_bbox((min_x, min_y, max_x, max_y), LANDMARKS, center=True):
+        if lm.id == hr_area_id or lm.category == LandmarkCategory.ZONE:
             continue 
         
-        if (lm.abs_x >= min_x and lm.abs_x <= max_x and 
-            lm.abs_y >= min_y and lm.abs_y <= max_y):
-            
-            print(f"  - Drawing {lm.name}")
-            
-            w = lm.dimensions.width
-            l = lm.dimensions.length
-            
-            # Check type
-            is_street = "street" in lm.id or "lane" in lm.id
-            
-            # Always clear the ground first (Essential for gaps/streets to ensure they cut through)
-            # For streets/lanes, this IS the drawing (creating a gap).
-            # For buildings, this creates a clean foundation.
-            draw_rect(draw, w+2, l+2, lm.abs_x, lm.abs_y, LEVEL_GROUND) 
-            
-            if is_street:
-                 # If it's a street, optionally burn deeper? 
-                 # User asked for "gaps". LEVEL_GROUND is the gap between houses.
-                 # If we want distinct streets, use LEVEL_STREET (20).
-                 # Let's use LEVEL_STREET to distinguish "Designated Street" from "Random Ground".
-                 # But if "gap" simply means "not a house", LEVEL_GROUND is safer.
-                 # Current Collision Detection keeps houses out. 
-                 # This 'draw' just enforces the gap over any potential bleed.
-                 # Let's stick to cleaning to Ground.
-                 pass
-            else:
-                 # It's a building/structure
-                 draw_rect(draw, w, l, lm.abs_x, lm.abs_y, LEVEL_BUILDING)
-            
-    # Save Full Reference
-    os.makedirs(output_dir, exist_ok=True)
-    full_out = os.path.join(output_dir, "hr_area_print_full.png")
-    img.save(full_out)
-    print(f"Saved Full Reference: {full_out}")
+        print(f"  - Drawing {lm.name}")
+        
+        w = lm.dimensions.width
+        l = lm.dimensions.length
+        
+        # Always clear the ground first (Essential for gaps/streets to ensure they cut through)
+        # For streets/lanes, this IS the drawing (creating a gap).
+        # For buildings, this creates a clean foundation.
+        region.rect(w+2, l+2, lm.abs_x, lm.abs_y, CODE_GROUND)
+        
+        if is_street(lm):
+             # If it's a street, optionally burn deeper? 
+             # User asked for "gaps". Ground is the gap between houses.
+             # If we want distinct streets, use STREET_HEIGHT_M.
+             # Let's use STREET_HEIGHT_M to distinguish "Designated Street" from "Random Ground".
+             # But if "gap" simply means "not a house", ground is safer.
+             # Current Collision Detection keeps houses out. 
+             # This 'draw' just enforces the gap over any potential bleed.
+             # Let's stick to cleaning to Ground.
+             pass
+        else:
+             # It's a building/structure
+             region.rect(w, l, lm.abs_x, lm.abs_y, height_code(lm.height_m or DEFAULT_BUILDING_HEIGHT_M))
 
-    # 3. Tiling Logic (Same as before)
-    # ...
-    # Re-using previous tiling logic code block
-    overlap_cm = 0.5 
-    overlap_px = int(overlap_cm * CM_TO_INCH * DPI)
-    split_x_px = img_w // 2
-    
-    tile1 = img.crop((0, 0, split_x_px + overlap_px, img_h))
-    tile2 = img.crop((split_x_px - overlap_px, 0, img_w, img_h))
-    
-    t1_out = os.path.join(output_dir, "hr_area_print_tile_1.png")
-    t2_out = os.path.join(output_dir, "hr_area_print_tile_2.png")
-    
-    tile1.save(t1_out)
-    tile2.save(t2_out)
-    print(f"Saved Tile 1: {t1_out}")
-    print(f"Saved Tile 2: {t2_out}")
+    # Heights -> laser grays (one lookup-table pass)
+    calibration = MATERIALS[material] if material else LegacyLevels()
+    img = calibration.apply(region.image)
+
+    # Full Reference + Tiles (left/right halves with overlap), encoded in parallel on worker threads
+    os.makedirs(output_dir, exist_ok=True)
+    items = [(img, profile.path(os.path.join(output_dir, "hr_area_print_full.png")))]
+    for tile in split_tiles_vertical(canvas, "hr_area_print"):
+        items.append((img.crop(tile.box), profile.path(os.path.join(output_dir, tile.name))))
+    save_images(items, profile=profile)
+    for out in [path for _, path in items] + save_pyramid(img, items[0][1]):
+        print(f"Saved: {out}")
+    return img
 
 if __name__ == "__main__":
-    generate_hr_area_print()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terrain", action="store_true", help="Noise terrain instead of flat ground")
+    parser.add_argument("--seed", type=int, default=42, help="Terrain noise seed")
+    parser.add_argument("--material", choices=sorted(MATERIALS),
+                        help="Map heights through a material calibration curve (default: 3 legacy levels)")
+    parser.add_argument("--preview", type=float, nargs='?', const=PREVIEW_FRACTION,
+                        help=f"Quick draft at this fraction of the print resolution (default {PREVIEW_FRACTION}) "
+                             "into outputs/previews")
+    args = parser.parse_args()
+    generate_hr_area_print(args.material, preview=args.preview, terrain_seed=args.seed if args.terrain else None)
@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+from collections import Counter
+
+import yaml
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import FeatureCategory, LandmarkRegistry
+
+def main():
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    landmarks_path = os.path.join(base_dir, 'src', 'data', 'landmarks.yaml')
+    procedural_path = os.path.join(base_dir, 'src', 'data', 'procedural.yaml')
+
+    parser = argparse.ArgumentParser(
+        description="Add the typed `category` field to procedural.yaml features saved before it existed")
+    parser.add_argument('--dry-run', action='store_true', help="Report only, do not rewrite procedural.yaml")
+    args = parser.parse_args()
+
+    with open(procedural_path) as f:
+        raw = yaml.safe_load(f) or {}
+    missing = sum(1 for item in raw.get('features', []) if 'category' not in item)
+
+    # Loading classifies features without a category from their description
+    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    counts = Counter(pf.category for pf in registry.procedural_features)
+    print(f"{len(registry.procedural_features)} features, {missing} without a stored category")
+    for category in FeatureCategory:
+        if counts[category]:
+            print(f"  {category.name}: {counts[category]}")
+    if counts[FeatureCategory.UNKNOWN]:
+        print("Warning: some features matched no category; check their descriptions.")
+
+    if args.dry_run or not missing:
+        return
+    registry.save_procedural(procedural_path, registry.procedural_features)
+    print(f"Saved {procedural_path}")
+
+if __name__ == "__main__":
+    main()
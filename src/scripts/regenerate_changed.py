@@ -0,0 +1,151 @@
+import argparse
+import copy
+import os
+import shutil
+import sys
+import threading
+import time
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.areas import AREAS
+from mohenjo.heights import MATERIALS
+from mohenjo.incremental import diff_registries, regenerate_area, rerasterize_area
+from mohenjo.watch import watch_loop
+
+def apply_changes(old, registry, features, area_keys, output_dir, redraw_ids=()):
+    """Regenerates and re-rasterizes what changed between two registries.
+
+    A change to any landmark in `redraw_ids` re-rasters the whole print
+    (the terrain mounds are sampled from those).
+    Returns the new feature list and whether anything changed.
+    """
+    changes = diff_registries(old, registry)
+    if not changes:
+        print("No landmark changes.")
+        return features, False
+    for c in changes:
+        print(f"  - {c.kind}: {c.id}")
+    redraw_all = any(c.id in redraw_ids for c in changes)
+    if redraw_all:
+        print("  Terrain mound moved: redrawing whole prints")
+
+    for key in area_keys:
+        area = AREAS[key]
+        if not area.area(registry):
+            print(f"Error: {area.area_id} not found.")
+            continue
+
+        result = regenerate_area(area, registry, changes, features)
+        mode = "full" if result.full else "incremental"
+        print(f"[{key}] {mode}: re-collided {result.considered} candidates, "
+              f"+{len(result.added)} / -{len(result.removed)} features")
+        if not result.full and not result.dirty and not redraw_all:
+            continue
+
+        features = area.merge(registry, features, result.features)
+        for out in rerasterize_area(area, registry, result, output_dir, redraw_all=redraw_all):
+            print(f"    Saved: {out}")
+    return features, True
+
+def main():
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    landmarks_path = os.path.join(base_dir, 'src', 'data', 'landmarks.yaml')
+    procedural_path = os.path.join(base_dir, 'src', 'data', 'procedural.yaml')
+    output_dir = os.path.join(base_dir, 'outputs', 'samples')
+    default_snapshot = os.path.join(base_dir, 'outputs', 'cache', 'landmarks_snapshot.yaml')
+
+    parser = argparse.ArgumentParser(description="Regenerate only what changed in landmarks.yaml")
+    parser.add_argument('--old', type=str, default=default_snapshot,
+                        help="Previous landmarks.yaml to diff against (default: last snapshot)")
+    parser.add_argument('--area', choices=sorted(AREAS), action='append',
+                        help="Limit to these print areas (default: all)")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="Only record the current landmarks.yaml as the baseline")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and regenerate on every save of landmarks.yaml")
+    parser.add_argument('--poll', action='store_true', help="Watch by polling instead of inotify")
+    parser.add_argument('--terrain', action='store_true',
+                        help="Noise terrain instead of flat ground (must match how the prints were made); "
+                             "a change to citadel_walls or lower_city_boundary moves the mounds and redraws whole prints")
+    parser.add_argument('--seed', type=int, default=42, help="Terrain noise seed")
+    parser.add_argument('--material', choices=sorted(MATERIALS),
+                        help="Material calibration curve (must match how the prints were made)")
+    args = parser.parse_args()
+    area_keys = args.area or sorted(AREAS)
+    for key in area_keys:
+        AREAS[key].calibration = MATERIALS[args.material] if args.material else None
+
+    def record_snapshot():
+        os.makedirs(os.path.dirname(default_snapshot), exist_ok=True)
+        shutil.copyfile(landmarks_path, default_snapshot)
+
+    if args.snapshot:
+        record_snapshot()
+        print(f"Snapshot saved to {default_snapshot}")
+        return
+
+    have_baseline = os.path.exists(args.old)
+    if not have_baseline and not args.watch:
+        print(f"Error: no baseline at {args.old}. Run with --snapshot after a full generation, or pass --old.")
+        return
+
+    redraw_ids = ()
+    if args.terrain:
+        from mohenjo.terrain import TERRAIN_LANDMARKS  # Needs numpy
+        redraw_ids = TERRAIN_LANDMARKS
+
+    def use_terrain(registry):
+        if args.terrain:
+            from mohenjo.terrain import Terrain
+            terrain = Terrain.from_registry(registry, seed=args.seed)
+            for key in area_keys:
+                AREAS[key].terrain = terrain
+
+    start = time.perf_counter()
+    registry = LandmarkRegistry(landmarks_path, procedural_path)
+    use_terrain(registry)
+    features = registry.procedural_features
+    if have_baseline:
+        features, changed = apply_changes(LandmarkRegistry(args.old), registry, features, area_keys, output_dir,
+                                          redraw_ids)
+        if changed:
+            registry.save_procedural(procedural_path, features)
+        record_snapshot()
+        print(f"Done in {time.perf_counter() - start:.2f}s")
+
+    if not args.watch:
+        return
+
+    # Watch mode: registry, features and generated zone candidates stay in memory;
+    # each save only re-parses landmarks.yaml and redraws the dirty tiles.
+    state = {'features': features, 'saver': None}
+
+    def persist(features):
+        registry.save_procedural(procedural_path, features)
+        record_snapshot()
+
+    def on_change(changed):
+        old = copy.copy(registry)  # Keeps the previous landmarks dict, reload swaps in a new one
+        registry.reload_landmarks(landmarks_path)
+        use_terrain(registry)  # Mounds follow the citadel / lower city landmarks
+        state['features'], changed = apply_changes(old, registry, state['features'], area_keys, output_dir,
+                                                   redraw_ids)
+        registry.procedural_features = state['features']
+        if not changed:
+            return
+
+        # Outputs are already on disk; writing procedural.yaml is the slow part,
+        # so it runs in the background (one save at a time).
+        if state['saver']:
+            state['saver'].join()
+        state['saver'] = threading.Thread(target=persist, args=(state['features'],))
+        state['saver'].start()
+
+    watch_loop([landmarks_path], on_change, use_inotify=not args.poll)
+    if state['saver']:
+        state['saver'].join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Deliberately imports nothing from mohenjo (no PIL, no YAML): the client
+# should start in a few milliseconds and leave the work to render_server.py.
+DEFAULT_URL = "http://127.0.0.1:8765"
+# Where render_server.py writes its per-session token (see token_path there)
+TOKEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'outputs', 'cache')
+
+def read_token(url):
+    path = os.path.join(TOKEN_DIR, f"render_server_{urllib.parse.urlsplit(url).port or 80}.token")
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ''  # The server answers 403, or the request fails to connect
+
+def call(url, name, params=None):
+    data = json.dumps(params or {}).encode()
+    headers = {'Content-Type': 'application/json', 'X-Render-Token': read_token(url)}
+    req = urllib.request.Request(f"{url}/{name}", data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b'{}') or {'error': str(e)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a request to a running render_server.py")
+    parser.add_argument('--url', default=DEFAULT_URL)
+    sub = parser.add_subparsers(dest='request', required=True)
+
+    sub.add_parser('status', help="Server state and request count")
+    sub.add_parser('shutdown', help="Stop the server")
+
+    p = sub.add_parser('svg', help="Render the landmark map (all, --region, --id or --match)")
+    p.add_argument('--region')
+    p.add_argument('--id')
+    p.add_argument('--match')
+    p.add_argument('--output', help="SVG path inside outputs/ (default: outputs/landmark_map.svg)")
+
+    p = sub.add_parser('raster', help="Rasterize an area print, or one tile of it")
+    p.add_argument('area')
+    p.add_argument('--tile', help="Tile number (1-based) or file name")
+    p.add_argument('--dpi', type=int)
+    p.add_argument('--material')
+    p.add_argument('--output-dir', help="Folder inside outputs/ (default: outputs/samples)")
+
+    p = sub.add_parser('regenerate', help="Re-place an area's (or one zone's) houses")
+    p.add_argument('area')
+    p.add_argument('--zone', help="Zone landmark id (default: the whole area)")
+    p.add_argument('--raster', action='store_true', help="Also rasterize the area afterwards")
+    p.add_argument('--material')
+
+    args = parser.parse_args()
+    params = {k: v for k, v in vars(args).items() if k not in ('url', 'request') and v not in (None, False)}
+    for key in ('output', 'output_dir'):
+        if key in params:
+            params[key] = os.path.abspath(params[key])  # The server resolves relative paths against outputs/
+    try:
+        result = call(args.url, args.request, params)
+    except urllib.error.URLError as e:
+        print(f"Error: no render server at {args.url} ({e.reason}). Start src/scripts/render_server.py first.")
+        sys.exit(2)
+    print(json.dumps(result, indent=2))
+    if 'error' in result:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import argparse
+import copy
+import functools
 import os
 import sys
 import math
@@ -6,13 +8,30 @@ from typing import List, Dict, Optional
 
 # Add src/ to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from mohenjo.registry import LandmarkRegistry
-from mohenjo.generators import generate_rich_zone, generate_poor_zone
+from mohenjo.registry import (LANDMARKS, FeatureCategory, LandmarkCategory, LandmarkRegistry, category_table,
+                              procedural_parent_ids)
+from mohenjo.spatial import bbox_intersects, bbox_of_points, bbox_union
 
 # Constants
 SCALE_PIXELS_PER_METER = 2.0  # 1 meter = 2 pixels in SVG
 PADDING = 100  # Padding around the map in generated SVG
 
+# Procedural feature styles per FeatureCategory: (fill, stroke, stroke width, opacity)
+RECT_STYLES = category_table(("#8D6E63", "black", "1", "1.0"), {  # Distinct Brown/Red
+    FeatureCategory.COURTYARD: ("#E0E0E0", "none", "1", "1.0"),  # darker grey to stand out from background
+    FeatureCategory.CITADEL_BUILDING: ("#EF5350", "black", "1", "1.0"),  # Brighter Red
+})
+POLYGON_STYLES = category_table(("#BCAAA4", "none", "1", "1.0"), {  # Default Light Brown
+    # Merged citadel rects (walls, bastions, building blocks), same style as RECTs
+    FeatureCategory.CITADEL_WALL: ("#8D6E63", "black", "1", "1.0"),
+    FeatureCategory.BASTION: ("#8D6E63", "black", "1", "1.0"),
+    FeatureCategory.CITADEL_BUILDING: ("#EF5350", "black", "1", "1.0"),
+    FeatureCategory.RICH_WALL: ("#8D6E63", "none", "1", "1.0"),
+    FeatureCategory.COURTYARD: ("#F5F5F5", "#5D4037", "0.5", "1.0"),  # Same as ground (Matches HR style)
+    FeatureCategory.POOR: ("#A1887F", "black", "0.5", "1.0"),
+    FeatureCategory.STREET: ("#BDBDBD", "none", "1", "0.8"),
+})
+
 class LandmarkRenderer:
     def __init__(self, registry: LandmarkRegistry):
         self.registry = registry
@@ -43,10 +62,7 @@ class LandmarkRenderer:
             print("To Render List is Empty!")
             return
 
-        min_x = min(lm.abs_x - (lm.dimensions.width/2 + lm.dimensions.diameter/2) for lm in to_render)
-        max_x = max(lm.abs_x + (lm.dimensions.width/2 + lm.dimensions.diameter/2) for lm in to_render)
-        min_y = min(lm.abs_y - (lm.dimensions.length/2 + lm.dimensions.diameter/2) for lm in to_render)
-        max_y = max(lm.abs_y + (lm.dimensions.length/2 + lm.dimensions.diameter/2) for lm in to_render)
+        min_x, min_y, max_x, max_y = functools.reduce(bbox_union, (lm.get_extent() for lm in to_render))
 
         print(f"DEBUG: Rendering {len(to_render)} landmarks.")
         print(f"DEBUG: World Bounds: X[{min_x:.1f}, {max_x:.1f}] Y[{min_y:.1f}, {max_y:.1f}]")
@@ -106,7 +122,7 @@ class LandmarkRenderer:
                 svg_lines.append(f'<title>{lm.name}</title>')
                 svg_lines.append('</circle>')
                 
-            elif lm.shape == 'CURVE' and 'river' in lm.id:
+            elif lm.shape == 'CURVE' and lm.category == LandmarkCategory.RIVER:
                 w = lm.dimensions.width * SCALE_PIXELS_PER_METER
                 l = lm.dimensions.length * SCALE_PIXELS_PER_METER
                 svg_lines.append(f'<rect x="{cx - w/2}" y="{cy - l/2}" width="{w}" height="{l}" fill="{color}" opacity="0.6" />')
@@ -274,17 +290,7 @@ class LandmarkRenderer:
                 
                 # Let's assume X/Y is center for simplicity in world_to_svg
                 
-                fill_color = "#8D6E63" # Distinct Brown/Red
-                stroke_color = "black"
-                stroke_width = "1"
-                opacity = "1.0"
-                
-                if "Courtyard" in pf.description:
-                    fill_color = "#E0E0E0" # darker grey to stand out from background
-                    stroke_color = "none"
-                    opacity = "1.0"
-                elif "Building" in pf.description:
-                     fill_color = "#EF5350" # Brighter Red
+                fill_color, stroke_color, stroke_width, opacity = RECT_STYLES[pf.category]
                 
                 svg_lines.append(f'<rect x="{px - pw/2}" y="{py - pl/2}" width="{pw}" height="{pl}" fill="{fill_color}" stroke="{stroke_color}" stroke-width="{stroke_width}" opacity="{opacity}" />')
 
@@ -298,38 +304,25 @@ class LandmarkRenderer:
                  points_str = " ".join(poly_points)
                  
                  # Styling
-                 fill = "#BCAAA4" # Default Light Brown
-                 stroke = "none"
-                 stroke_width = "1"
-                 opacity = "1.0"
-                 
-                 if "RICH_WALL" in pf.description:
-                     fill = "#8D6E63"
-                 elif "COURTYARD" in pf.description:
-                     fill = "#F5F5F5" # Same as ground (Matches HR style)
-                     stroke = "#5D4037"
-                     stroke_width = "0.5"
-                 elif "POOR" in pf.description:
-                     fill = "#A1887F"
-                     stroke = "black"
-                     stroke_width = "0.5"
-                 elif "Street" in pf.description or "street" in pf.description:
-                     fill = "#BDBDBD" 
-                     stroke = "none"
-                     opacity = "0.8"
+                 fill, stroke, stroke_width, opacity = POLYGON_STYLES[pf.category]
                      
-                 svg_lines.append(f'<polygon points="{points_str}" fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}" opacity="{opacity}" />')
+                 holes = pf.geometry.get('holes')
+                 if holes:
+                     # Consolidated footprint: outline and holes as one even-odd path
+                     d = "M " + " L ".join(poly_points) + " Z"
+                     for hole in holes:
+                         d += " M " + " L ".join("{},{}".format(*world_to_svg(wx, wy)) for (wx, wy) in hole) + " Z"
+                     svg_lines.append(f'<path d="{d}" fill-rule="evenodd" fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}" opacity="{opacity}" />')
+                 else:
+                     svg_lines.append(f'<polygon points="{points_str}" fill="{fill}" stroke="{stroke}" stroke-width="{stroke_width}" opacity="{opacity}" />')
                  
                  # Debug Label (Global Counter)
                  try:
-                     # Determine prefix
-                     prefix = "Z"
-                     if "vs_" in pf.id or "VS" in pf.id: prefix = "VS"
-                     elif "cit_" in pf.id or "bastion" in pf.id: prefix = "CIT"
-                     elif "dk_" in pf.id or "DK" in pf.id: prefix = "DK"
+                     # Prefix from the parent's district (landmarks.yaml)
+                     prefix = self.registry.landmarks[pf.parent_id].district or "Z"
                      
                      # Only label relevant items (Polygons, not streets)
-                     if prefix in ["VS", "CIT"] and "street" not in pf.id and "lane" not in pf.id:
+                     if prefix in ["VS", "CIT"] and pf.category != FeatureCategory.STREET:
                          label_counts[prefix] += 1
                          idx = label_counts[prefix]
                          
@@ -346,47 +339,29 @@ class LandmarkRenderer:
                      pass
 
         # [Collision Detection Preparation]
-        # Identify Obstacles (Streets, specific landmarks)
-        obstacles = []
-        # print("Identifying Obstacles for Collision Detection...")
-        for lm in self.registry.landmarks.values():
-            if "street" in lm.id or "lane" in lm.id or "house" in lm.id:
-                if "zone" in lm.id: continue
-                
-                w = lm.dimensions.width
-                l = lm.dimensions.length
-                obs_min_x = lm.abs_x - w/2
-                obs_max_x = lm.abs_x + w/2
-                obs_min_y = lm.abs_y - l/2
-                obs_max_y = lm.abs_y + l/2
-                obstacles.append((obs_min_x, obs_max_x, obs_min_y, obs_max_y))
+        # Obstacles: street and house landmarks, found through the registry's spatial index
+        obstacles = (LandmarkCategory.STREET, LandmarkCategory.HOUSE)
 
         def check_collision(poly_points_global, obstacles):
-            p_xs = [p[0] for p in poly_points_global]
-            p_ys = [p[1] for p in poly_points_global]
-            p_min_x, p_max_x = min(p_xs), max(p_xs)
-            p_min_y, p_max_y = min(p_ys), max(p_ys)
-            
-            for (o_min_x, o_max_x, o_min_y, o_max_y) in obstacles:
-                if (p_min_x < o_max_x and p_max_x > o_min_x and
-                    p_min_y < o_max_y and p_max_y > o_min_y):
-                    return True
-            return False
+            box = bbox_of_points(poly_points_global)
+            return any(lm.category in obstacles for lm in self.registry.intersecting(box, LANDMARKS))
+
+        # Zones whose houses are in procedural.yaml were drawn with the features above
+        persisted = {pf.parent_id for pf in self.registry.procedural_features}
 
         # Identify rendered zones
         for lm in to_render:
-             if "zone" in lm.shape.lower():
+             if lm.category == LandmarkCategory.ZONE:
                  
-                 # SKIP VS ZONES (Persisted)
-                 if "vs_zone" in lm.id:
+                 # SKIP PERSISTED ZONES (VS)
+                 if lm.id in persisted:
                      continue
 
-                 # Generate houses
+                 # Generate houses with the zone's generator (zone_kind in landmarks.yaml)
+                 from mohenjo.generators import ZONE_GENERATORS
                  houses = []
-                 if "rich" in lm.id:
-                     houses = generate_rich_zone(lm.dimensions.width, lm.dimensions.length)
-                 elif "poor" in lm.id:
-                     houses = generate_poor_zone(lm.dimensions.width, lm.dimensions.length)
+                 if lm.zone_kind:
+                     houses = ZONE_GENERATORS[lm.zone_kind](lm.dimensions.width, lm.dimensions.length)
                  
                  zone_w_m = lm.dimensions.width
                  zone_l_m = lm.dimensions.length
@@ -439,7 +414,7 @@ class LandmarkRenderer:
                      # try:
                      # Debug Label
                      # try:
-                     prefix = "HR" if "hr" in lm.id else ("DK" if "dk" in lm.id else "Z")
+                     prefix = lm.district or "Z"
                      
                      if prefix != "Z":
                          label_counts[prefix] += 1
@@ -455,7 +430,7 @@ class LandmarkRenderer:
                      #    print(f"Error adding label: {e}")
                      return True
 
-                 if "rich" in lm.id:
+                 if lm.zone_kind == "rich":
                      # Rich Zone: Process in Pairs (Wall + Courtyard)
                      # Assumption: generate_rich_zone returns [Wall, Court, Wall, Court...]
                      num_houses = len(houses)
@@ -497,6 +472,79 @@ class LandmarkRenderer:
             f.write('\n'.join(svg_lines))
         print(f"Generated map at {output_path}")
 
+def select_landmarks(registry: LandmarkRegistry, args) -> List:
+    """Landmarks picked by the command line filters."""
+    if args.id:
+        lm = registry.landmarks.get(args.id)
+        return [lm] if lm else []
+    if args.match:
+        return [lm for lm in registry.landmarks.values() if args.match in lm.id]
+    if args.region:
+        return [lm for lm in registry.landmarks.values() if lm.region == args.region]
+    return list(registry.landmarks.values())
+
+def render_selection(renderer: LandmarkRenderer, registry: LandmarkRegistry, args) -> bool:
+    if args.id:
+        if args.id not in registry.landmarks:
+            print(f"Error: Landmark ID '{args.id}' not found.")
+            return False
+        renderer.render(args.output, target_id=args.id)
+    elif args.match:
+        # Custom matching logic
+        to_render = select_landmarks(registry, args)
+        if not to_render:
+            print(f"No landmarks matched '{args.match}'")
+            return False
+        renderer.render(args.output, custom_list=to_render)
+    elif args.region:
+        renderer.render(args.output, region=args.region)
+    else:
+        renderer.render(args.output)
+    return True
+
+def selection_affected(changes, selected) -> bool:
+    """True if a landmark change can show up in the rendered selection."""
+    if not selected:
+        return bool(changes)
+    ids = {lm.id for lm in selected}
+    bounds = selected[0].get_bounds()
+    for lm in selected[1:]:
+        bounds = bbox_union(bounds, lm.get_bounds())
+    for c in changes:
+        if c.id in ids or any(bbox_intersects(b, bounds) for b in c.boxes):
+            return True
+    return False
+
+def watch(registry: LandmarkRegistry, renderer: LandmarkRenderer, args, data_path: str, procedural_path: str):
+    """Re-renders on every save of landmarks.yaml / procedural.yaml, keeping the registry in memory."""
+    from mohenjo.incremental import diff_registries
+    from mohenjo.watch import watch_loop
+
+    data_path = os.path.abspath(data_path)
+    procedural_path = os.path.abspath(procedural_path)
+
+    def on_change(changed):
+        dirty = False
+        if procedural_path in changed:
+            # Written by the generators; reload features only
+            registry.procedural_features = []
+            registry.load_procedural(procedural_path)
+            dirty = True
+        if data_path in changed:
+            old = copy.copy(registry)  # Keeps the previous landmarks dict, reload swaps in a new one
+            registry.reload_landmarks(data_path)
+            changes = diff_registries(old, registry)
+            for c in changes:
+                print(f"  - {c.kind}: {c.id}")
+            selected = select_landmarks(old, args) + select_landmarks(registry, args)
+            dirty = dirty or selection_affected(changes, selected)
+        if dirty:
+            render_selection(renderer, registry, args)
+        else:
+            print("No change affects the rendered selection.")
+
+    watch_loop([data_path, procedural_path], on_change, use_inotify=not args.poll)
+
 def main():
     parser = argparse.ArgumentParser(description="VerifyMohenjo-daro Landmarks")
     parser.add_argument('--all', action='store_true', help="Render all landmarks")
@@ -507,6 +555,8 @@ def main():
     # Default output should be relative to where script is run, but let's make it go to outputs/ if CWD is root
     # Ideally, just default='outputs/landmark_map.svg' if running from root.
     parser.add_argument('--output', type=str, default='outputs/landmark_map.svg', help="Output SVG file")
+    parser.add_argument('--watch', action='store_true', help="Re-render whenever the data files change")
+    parser.add_argument('--poll', action='store_true', help="Watch by polling instead of inotify")
     
     args = parser.parse_args()
     
@@ -515,25 +565,20 @@ def main():
     data_path = os.path.join(base_dir, '..', 'data', 'landmarks.yaml')
     procedural_path = os.path.join(base_dir, '..', 'data', 'procedural.yaml')
     
-    registry = LandmarkRegistry(data_path, procedural_path)
+    registry = LandmarkRegistry(data_path)
+    # Features are drawn under their parent landmark only; skip parsing procedural.yaml
+    # (most of a small render's time) when nothing selected owns any, else keep just theirs.
+    parents = procedural_parent_ids(procedural_path)
+    selected = {lm.id for lm in select_landmarks(registry, args)}
+    if args.watch:
+        registry.load_procedural(procedural_path)
+    elif selected & parents:
+        registry.load_procedural(procedural_path, parent_ids=selected)
     renderer = LandmarkRenderer(registry)
     
-    if args.id:
-        if args.id not in registry.landmarks:
-            print(f"Error: Landmark ID '{args.id}' not found.")
-            return
-        renderer.render(args.output, target_id=args.id)
-    elif args.match:
-        # Custom matching logic
-        to_render = [lm for lm in registry.landmarks.values() if args.match in lm.id]
-        if not to_render:
-            print(f"No landmarks matched '{args.match}'")
-            return
-        renderer.render(args.output, custom_list=to_render)
-    elif args.region:
-        renderer.render(args.output, region=args.region)
-    else:
-        renderer.render(args.output)
+    render_selection(renderer, registry, args)
+    if args.watch:
+        watch(registry, renderer, args, data_path, procedural_path)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,283 @@
+import argparse
+import copy
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.areas import AREAS
+from mohenjo.heights import MATERIALS
+from mohenjo.incremental import diff_registries
+from mohenjo.raster import DPI
+from mohenjo.watch import PollingWatcher
+from render_map import LandmarkRenderer
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+LANDMARKS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'landmarks.yaml')
+PROCEDURAL_PATH = os.path.join(BASE_DIR, 'src', 'data', 'procedural.yaml')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'outputs')
+DEFAULT_PORT = 8765
+# Per-session token, readable by local users only; render_client.py sends it with every request
+TOKEN_DIR = os.path.join(OUTPUT_DIR, 'cache')
+TOKEN_HEADER = 'X-Render-Token'
+
+def token_path(port: int) -> str:
+    return os.path.join(TOKEN_DIR, f"render_server_{port}.token")
+
+def output_path(path: str) -> str:
+    """A requested output path, relative to outputs/ unless absolute; anything outside outputs/ is refused."""
+    root = os.path.realpath(OUTPUT_DIR)
+    full = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full]) != root:
+        raise RequestError(f"{path!r} is outside {OUTPUT_DIR}")
+    return full
+
+class RequestError(Exception):
+    """Bad request parameters: reported to the client as HTTP 400."""
+
+class RenderState:
+    """Everything a render needs, loaded once: registry, features, area candidates and canvases.
+
+    Before each request the data files are checked (mtime/size); a changed
+    landmarks.yaml is re-parsed and diffed, a procedural.yaml written by
+    someone else is reloaded. Nothing else is recomputed between requests.
+    """
+
+    def __init__(self):
+        start = time.perf_counter()
+        self.registry = LandmarkRegistry(LANDMARKS_PATH, PROCEDURAL_PATH)
+        self.renderer = LandmarkRenderer(self.registry)
+        self.watcher = PollingWatcher([LANDMARKS_PATH, PROCEDURAL_PATH])
+        self.saver = None
+        self.terrain_seed = None  # Set by --terrain; mounds are rebuilt when their landmarks change
+        self.requests = 0
+        self.started = time.time()
+        self.load_s = time.perf_counter() - start
+
+    def refresh(self):
+        changed = self.watcher.poll()
+        if self.saver and self.saver.is_alive():
+            changed.discard(PROCEDURAL_PATH)  # Our own save in progress
+        if LANDMARKS_PATH in changed:
+            old = copy.copy(self.registry)
+            self.registry.reload_landmarks(LANDMARKS_PATH)
+            changes = diff_registries(old, self.registry)
+            print(f"landmarks.yaml changed: {len(changes)} landmark(s)")
+            if self.terrain_seed is not None:
+                from mohenjo.terrain import TERRAIN_LANDMARKS
+                if any(c.id in TERRAIN_LANDMARKS for c in changes):
+                    self.use_terrain(self.terrain_seed)
+                    print("Terrain mounds rebuilt")
+        if PROCEDURAL_PATH in changed:
+            self.registry.procedural_features = []
+            self.registry.load_procedural(PROCEDURAL_PATH)
+            print(f"procedural.yaml reloaded: {len(self.registry.procedural_features)} features")
+
+    def use_terrain(self, seed):
+        from mohenjo.terrain import Terrain  # Needs numpy
+        self.terrain_seed = seed
+        terrain = Terrain.from_registry(self.registry, seed=seed)
+        for area in AREAS.values():
+            area.terrain = terrain
+
+    def area(self, key, material=None):
+        if key not in AREAS:
+            raise RequestError(f"unknown area {key!r} (have: {', '.join(sorted(AREAS))})")
+        if material and material not in MATERIALS:
+            raise RequestError(f"unknown material {material!r}")
+        area = AREAS[key]
+        area.calibration = MATERIALS[material] if material else None
+        if not area.area(self.registry):
+            raise RequestError(f"{area.area_id} not found in landmarks.yaml")
+        return area
+
+    # --- Requests ---
+
+    def status(self, params):
+        return {
+            'landmarks': len(self.registry.landmarks),
+            'features': len(self.registry.procedural_features),
+            'requests': self.requests,
+            'uptime_s': round(time.time() - self.started, 1),
+            'load_s': round(self.load_s, 3),
+            'pid': os.getpid(),
+        }
+
+    def svg(self, params):
+        """Landmark map for all landmarks, one id, a region or an id substring."""
+        output = output_path(params.get('output') or 'landmark_map.svg')
+        if params.get('id'):
+            if params['id'] not in self.registry.landmarks:
+                raise RequestError(f"landmark {params['id']!r} not found")
+            self.renderer.render(output, target_id=params['id'])
+        elif params.get('match'):
+            selected = [lm for lm in self.registry.landmarks.values() if params['match'] in lm.id]
+            if not selected:
+                raise RequestError(f"no landmarks match {params['match']!r}")
+            self.renderer.render(output, custom_list=selected)
+        else:
+            self.renderer.render(output, region=params.get('region'))
+        return {'written': [output]}
+
+    def raster(self, params):
+        """Area print, full or one tile (1-based index or file name), from the in-memory features."""
+        area = self.area(params.get('area'), params.get('material'))
+        canvas = area.canvas(self.registry, dpi=int(params.get('dpi') or DPI))
+        features = area.own_features(self.registry, self.registry.procedural_features)
+        output_dir = output_path(params.get('output_dir') or 'samples')
+        os.makedirs(output_dir, exist_ok=True)
+
+        tile = params.get('tile')
+        if tile is None:
+            image = area.rasterize(self.registry, features, canvas)
+            return {'written': area.save_outputs(image, canvas, output_dir)}
+        tiles = area.tiles(canvas)
+        match = [t for i, t in enumerate(tiles, 1) if str(tile) in (str(i), t.name)]
+        if not match:
+            raise RequestError(f"no tile {tile!r} (have 1-{len(tiles)}: {', '.join(t.name for t in tiles)})")
+        out = os.path.join(output_dir, match[0].name)
+        area.rasterize(self.registry, features, canvas, match[0].box).save(out)
+        return {'written': [out]}
+
+    def regenerate(self, params):
+        """Re-places an area's (or one zone's) houses and streets; procedural.yaml is saved in the background."""
+        area = self.area(params.get('area'))
+        plans = area.zone_plans(self.registry)
+        zone_id = params.get('zone')
+        if zone_id:
+            plans = [p for p in plans if p.zone.id == zone_id]
+            if not plans:
+                raise RequestError(f"{zone_id!r} is not a zone of {params.get('area')}")
+        new, _ = area.generate(self.registry, verbose=False, plans=plans)
+        if zone_id:
+            kept = [f for f in self.registry.procedural_features if f.parent_id != zone_id]
+            features = kept + new
+        else:
+            features = area.merge(self.registry, self.registry.procedural_features, new)
+        self.registry.procedural_features = features
+
+        # Writing YAML is the slow part; one save at a time, never blocking the next request
+        if self.saver:
+            self.saver.join()
+        self.saver = threading.Thread(target=self.persist, args=(features,))
+        self.saver.start()
+        result = {'features': len(new), 'total': len(features)}
+        if params.get('raster'):
+            result['written'] = self.raster({'area': params.get('area'), 'material': params.get('material')})['written']
+        return result
+
+    def persist(self, features):
+        self.registry.save_procedural(PROCEDURAL_PATH, features)
+        # Our own write is not an outside change
+        self.watcher.stamps[PROCEDURAL_PATH] = self.watcher._stamp(PROCEDURAL_PATH)
+
+ROUTES = {
+    'status': RenderState.status,
+    'svg': RenderState.svg,
+    'raster': RenderState.raster,
+    'regenerate': RenderState.regenerate,
+}
+
+def make_handler(state: RenderState, server_ref: dict, token: str):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            # Read-only, so a browser can look at it; everything else writes files or stops the server
+            if self.path.strip('/') != 'status':
+                return self.reply(405, {'error': "only status is served over GET; POST JSON for the rest"})
+            self.handle_request({})
+
+        def do_POST(self):
+            # A web page can POST to localhost too, but not with a JSON content type or our token
+            # (both need a CORS preflight, which this server never answers)
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type != 'application/json':
+                return self.reply(415, {'error': "requests must be application/json"})
+            if not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ''), token):
+                where = token_path(self.server.server_port)
+                return self.reply(403, {'error': f"missing or wrong {TOKEN_HEADER} (see {where})"})
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self.reply(400, {'error': 'body is not JSON'})
+            if not isinstance(params, dict):
+                return self.reply(400, {'error': 'body is not a JSON object'})
+            self.handle_request(params)
+
+        def handle_request(self, params):
+            name = self.path.strip('/')
+            if name == 'shutdown':
+                self.reply(200, {'ok': True})
+                threading.Thread(target=server_ref['server'].shutdown).start()
+                return
+            if name not in ROUTES:
+                return self.reply(404, {'error': f"unknown request {name!r} (have: {', '.join(ROUTES)}, shutdown)"})
+            start = time.perf_counter()
+            try:
+                state.refresh()
+                result = ROUTES[name](state, params)
+            except RequestError as e:
+                return self.reply(400, {'error': str(e)})
+            except Exception as e:
+                return self.reply(500, {'error': f"{type(e).__name__}: {e}"})
+            state.requests += 1
+            result['ms'] = round((time.perf_counter() - start) * 1000, 1)
+            self.reply(200, result)
+
+        def log_message(self, fmt, *args):
+            print(f"{self.address_string()} {fmt % args}")
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep the registry loaded and serve render/rasterize/regenerate requests on localhost")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Bind address (keep it local: the token only keeps out other origins and users)")
+    parser.add_argument('--terrain', action='store_true', help="Noise terrain under the area prints (mounds follow citadel_walls / lower_city_boundary edits)")
+    parser.add_argument('--seed', type=int, default=42, help="Terrain noise seed")
+    args = parser.parse_args()
+
+    state = RenderState()
+    if args.terrain:
+        state.use_terrain(args.seed)
+
+    token = secrets.token_hex(16)
+    os.makedirs(TOKEN_DIR, exist_ok=True)
+    path = token_path(args.port)
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+        f.write(token)
+
+    server_ref = {}
+    server = HTTPServer((args.host, args.port), make_handler(state, server_ref, token))
+    server_ref['server'] = server
+    print(f"Loaded {len(state.registry.landmarks)} landmarks, {len(state.registry.procedural_features)} features "
+          f"in {state.load_s:.2f}s; serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+        if state.saver:
+            state.saver.join()
+
+if __name__ == "__main__":
+    main()
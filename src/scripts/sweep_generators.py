@@ -0,0 +1,101 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add src/ to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from mohenjo.areas import AREAS
+from mohenjo.registry import LandmarkRegistry
+from mohenjo.sweep import DEFAULT_GRIDS, DEFAULT_ZONES, SweepRun, expand_grid, run_sweep
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+LANDMARKS_PATH = os.path.join(BASE_DIR, 'src', 'data', 'landmarks.yaml')
+
+_registry = None
+
+def _init_worker():
+    # One registry per worker process, loaded once
+    global _registry
+    _registry = LandmarkRegistry(LANDMARKS_PATH)
+
+def _run(job):
+    run, thumb_dpi = job
+    return run_sweep(_registry, run, thumb_dpi)
+
+def parse_param(text):
+    """'gap=1,2,3' -> ('gap', [1.0, 2.0, 3.0])"""
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected name=v1,v2,...: {text}")
+    return name.strip(), [float(v) for v in values.split(',')]
+
+def write_matrix(rows, path, parquet=False):
+    with open(path, 'w', newline='') as f:
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    written = [path]
+    if parquet:
+        import pandas  # Optional: Parquet needs pandas + pyarrow
+        out = os.path.splitext(path)[0] + '.parquet'
+        pandas.DataFrame(rows).to_parquet(out, index=False)
+        written.append(out)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep zone generator settings against the real obstacle set and record a result matrix")
+    parser.add_argument('--generator', choices=sorted(DEFAULT_GRIDS), default='poor')
+    parser.add_argument('--area', choices=sorted(AREAS), help="Area whose obstacles are used (default per generator)")
+    parser.add_argument('--zone', help="Zone landmark id to fill, inside the area "
+                        "(default per generator, or the area's first zone when --area differs)")
+    parser.add_argument('--param', action='append', type=parse_param, default=[],
+                        help="Swept values, e.g. --param gap=0.5,1,1.5 (replaces the default grid)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--thumb-dpi', type=int, default=50, help="Thumbnail resolution (0 disables thumbnails)")
+    parser.add_argument('--name', help="Output folder under outputs/sweeps (default: generator name)")
+    parser.add_argument('--parquet', action='store_true', help="Also write results.parquet (needs pandas)")
+    args = parser.parse_args()
+
+    area_key, zone_id = DEFAULT_ZONES[args.generator]
+    if args.area and args.area != area_key:
+        area_key, zone_id = args.area, None  # The default zone belongs to another area
+    zone_ids = [plan.zone.id for plan in AREAS[area_key].zone_plans(LandmarkRegistry(LANDMARKS_PATH))]
+    zone_id = args.zone or zone_id or zone_ids[0]
+    if zone_id not in zone_ids:
+        # A zone outside the area would sweep nothing and write a matrix of zeros
+        parser.error(f"zone {zone_id} is not in area {area_key} (zones: {', '.join(zone_ids)})")
+    grid = dict(args.param) if args.param else DEFAULT_GRIDS[args.generator]
+
+    out_dir = os.path.join(BASE_DIR, 'outputs', 'sweeps', args.name or args.generator)
+    thumb_dir = os.path.join(out_dir, 'thumbs')
+    os.makedirs(thumb_dir, exist_ok=True)
+
+    runs = []
+    for i, params in enumerate(expand_grid(grid)):
+        thumb = os.path.join(thumb_dir, f"run_{i:03d}.png") if args.thumb_dpi else None
+        runs.append(SweepRun(i, area_key, zone_id, args.generator, params, thumb))
+    print(f"Sweeping {args.generator} in {zone_id} ({area_key}): {len(runs)} combinations on {args.jobs} workers")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker) as pool:
+        results = list(pool.map(_run, [(run, args.thumb_dpi) for run in runs]))
+    elapsed = time.perf_counter() - start
+
+    rows = [r.row() for r in results]
+    for row in rows:
+        if row['thumbnail']:
+            row['thumbnail'] = os.path.relpath(row['thumbnail'], out_dir)
+    for path in write_matrix(rows, os.path.join(out_dir, 'results.csv'), args.parquet):
+        print(f"Saved: {path}")
+
+    best = max(results, key=lambda r: r.built_ratio)
+    print(f"Done in {elapsed:.1f}s. Densest: run {best.run.index} {best.run.params} "
+          f"-> {best.built_ratio:.1%} built, {best.houses} houses, {best.rejection_rate:.1%} rejected")
+
+if __name__ == "__main__":
+    main()
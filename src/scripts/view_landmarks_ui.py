@@ -2,19 +2,335 @@ import tkinter as tk
 from tkinter import ttk
 import os
 import sys
+from typing import Dict, List, Tuple
 
 # Add src/ to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from mohenjo.registry import LandmarkRegistry, Landmark
+from mohenjo.registry import (FEATURES, LANDMARKS, FeatureCategory, LandmarkCategory, LandmarkRegistry, Landmark,
+                              ProceduralFeature, category_table)
+from mohenjo.spatial import BBox, GridIndex
+from mohenjo.geometry import signed_area
 
-# ... (Constants and Class definition) ...
+# Colors match render_map.py
+REGION_COLORS = {
+    'Citadel': '#E57373',
+    'Lower City': '#81C784',
+    'Natural': '#64B5F6',
+    'Default': '#B0BEC5'
+}
+BACKGROUND = '#F5F5F5'
+
+# Items drawn per idle callback; keeps each Tk event loop turn short
+BATCH_SIZE = 400
+# Below this many pixels per meter, houses are drawn as aggregated LOD cells
+LOD_MIN_SCALE = 1.5
+# Aggregation cell size on screen (pixels)
+LOD_CELL_PX = 12
+
+# (fill, outline) per FeatureCategory
+FEATURE_COLORS = category_table(('#8D6E63', ''), {
+    FeatureCategory.COURTYARD: (BACKGROUND, ''),
+    FeatureCategory.RICH_SOLID_FILLER: ('', ''),
+    FeatureCategory.STREET: ('#BDBDBD', ''),
+    FeatureCategory.POOR: ('#A1887F', 'black'),
+    FeatureCategory.CITADEL_BUILDING: ('#EF5350', 'black'),
+})
+
+# (fill, outline, dash) of landmarks drawn as plain boxes, per LandmarkCategory; the rest by shape
+LANDMARK_OUTLINES = {
+    LandmarkCategory.BOUNDARY: ('', '#9E9E9E', (6, 3)),
+    LandmarkCategory.ZONE: ('', '#9E9E9E', (2, 2)),
+    LandmarkCategory.STREET: ('#424242', '', ()),
+}
+
+def feature_color(pf: ProceduralFeature) -> Tuple[str, str]:
+    """(fill, outline) for a procedural feature."""
+    return FEATURE_COLORS[pf.category]
+
+def feature_points(pf: ProceduralFeature) -> List[Tuple[float, float]]:
+    if pf.shape == 'RECT':
+        g = pf.geometry
+        hw, hh = g['w'] / 2, g['h'] / 2
+        return [(g['x'] - hw, g['y'] - hh), (g['x'] + hw, g['y'] - hh),
+                (g['x'] + hw, g['y'] + hh), (g['x'] - hw, g['y'] + hh)]
+    return [tuple(p) for p in pf.geometry['points']]
+
+class LODLevel:
+    """Features merged into square cells of one size: one rectangle per occupied cell.
+
+    The fill darkens with the built-up share of the cell, so dense quarters
+    still read as dense when tens of thousands of houses are off-screen detail.
+    """
+
+    def __init__(self, features: List[ProceduralFeature], cell_m: float):
+        self.cell_m = cell_m
+        coverage: Dict[Tuple[int, int], float] = {}
+        for pf in features:
+            fill, _ = feature_color(pf)
+            if not fill or fill == BACKGROUND:
+                continue
+            points = feature_points(pf)
+            area = abs(signed_area(points)) - sum(abs(signed_area(h)) for h in pf.geometry.get('holes', ()))
+            # Spread over the cells the outline passes through (merged walls span many cells)
+            keys = {(int(x // cell_m), int(y // cell_m)) for x, y in points}
+            for key in keys:
+                coverage[key] = coverage.get(key, 0.0) + area / len(keys)
+
+        self.index = GridIndex(cell_size=max(cell_m * 4, 25.0))
+        cell_area = cell_m * cell_m
+        for (cx, cy), area in coverage.items():
+            box = (cx * cell_m, cy * cell_m, (cx + 1) * cell_m, (cy + 1) * cell_m)
+            self.index.insert(min(1.0, area / cell_area), box)
+
+class LandmarkViewerApp:
+    """Pan/zoom viewer for landmarks and procedural features.
+
+    - Drag to pan, mouse wheel to zoom, click an item for its details.
+    - Only items inside the viewport are drawn (the registry's spatial queries).
+    - Drawing happens in idle-time batches, so a redraw never blocks input;
+      a new pan/zoom cancels the batch in progress.
+    - At low zoom, procedural features are aggregated into LOD cells.
+    """
+
+    def __init__(self, root: tk.Tk, registry: LandmarkRegistry):
+        self.root = root
+        self.registry = registry
+        root.title("Mohenjo-daro Landmarks")
+
+        self.canvas = tk.Canvas(root, bg=BACKGROUND, width=1000, height=750, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.status = tk.StringVar()
+        ttk.Label(root, textvariable=self.status, anchor='w').pack(fill=tk.X)
+
+        self.lod_levels: Dict[float, LODLevel] = {}
+
+        # View state: screen = (world - origin) * scale, Y flipped
+        self.scale = 1.0
+        self.origin_x = 0.0
+        self.origin_y = 0.0
+        self.pending = []
+        self.drawn = 0
+        self.job = None
+        self.redraw_job = None
+        self.drag_start = None
+        self.item_info: Dict[int, str] = {}
+
+        self.canvas.bind('<ButtonPress-1>', self.on_press)
+        self.canvas.bind('<B1-Motion>', self.on_drag)
+        self.canvas.bind('<ButtonRelease-1>', self.on_release)
+        self.canvas.bind('<MouseWheel>', self.on_wheel)                           # Windows / macOS
+        self.canvas.bind('<Button-4>', lambda e: self.zoom_at(e.x, e.y, 1.25))   # X11
+        self.canvas.bind('<Button-5>', lambda e: self.zoom_at(e.x, e.y, 0.8))
+        self.canvas.bind('<Configure>', lambda e: self.schedule_redraw())
+        root.bind('<Key-0>', lambda e: self.fit_all())
+
+        root.update_idletasks()
+        self.fit_all()
+
+    # --- Coordinates ---
+
+    def world_to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        return (x - self.origin_x) * self.scale, (self.origin_y - y) * self.scale
+
+    def screen_to_world(self, sx: float, sy: float) -> Tuple[float, float]:
+        return sx / self.scale + self.origin_x, self.origin_y - sy / self.scale
+
+    def visible_box(self) -> BBox:
+        w = max(self.canvas.winfo_width(), 1)
+        h = max(self.canvas.winfo_height(), 1)
+        min_x, max_y = self.screen_to_world(0, 0)
+        max_x, min_y = self.screen_to_world(w, h)
+        return (min_x, min_y, max_x, max_y)
+
+    def fit_all(self):
+        boxes = [lm.get_bounds() for lm in self.registry.landmarks.values() if lm.region != 'Natural']
+        if not boxes:
+            return
+        min_x = min(b[0] for b in boxes)
+        min_y = min(b[1] for b in boxes)
+        max_x = max(b[2] for b in boxes)
+        max_y = max(b[3] for b in boxes)
+        w = max(self.canvas.winfo_width(), 100)
+        h = max(self.canvas.winfo_height(), 100)
+        self.scale = 0.95 * min(w / (max_x - min_x), h / (max_y - min_y))
+        self.origin_x = (min_x + max_x) / 2 - w / (2 * self.scale)
+        self.origin_y = (min_y + max_y) / 2 + h / (2 * self.scale)
+        self.redraw()
+
+    # --- Interaction ---
+
+    def on_press(self, event):
+        self.drag_start = (event.x, event.y, event.x, event.y)
+
+    def on_drag(self, event):
+        if not self.drag_start:
+            return
+        x0, y0, last_x, last_y = self.drag_start
+        # Move what is already drawn; the real redraw happens on release
+        self.canvas.move('all', event.x - last_x, event.y - last_y)
+        self.drag_start = (x0, y0, event.x, event.y)
+
+    def on_release(self, event):
+        if not self.drag_start:
+            return
+        x0, y0, _, _ = self.drag_start
+        self.drag_start = None
+        dx, dy = event.x - x0, event.y - y0
+        if abs(dx) < 3 and abs(dy) < 3:
+            self.show_info(event)
+            return
+        self.origin_x -= dx / self.scale
+        self.origin_y += dy / self.scale
+        self.redraw()
+
+    def on_wheel(self, event):
+        self.zoom_at(event.x, event.y, 1.25 if event.delta > 0 else 0.8)
+
+    def zoom_at(self, sx: float, sy: float, factor: float):
+        wx, wy = self.screen_to_world(sx, sy)
+        self.scale = min(200.0, max(0.05, self.scale * factor))
+        self.origin_x = wx - sx / self.scale
+        self.origin_y = wy + sy / self.scale
+        # Instant feedback by scaling existing items, full redraw once the wheel settles
+        self.canvas.scale('all', sx, sy, factor, factor)
+        self.schedule_redraw(150)
+
+    def show_info(self, event):
+        items = self.canvas.find_overlapping(event.x - 1, event.y - 1, event.x + 1, event.y + 1)
+        for item in reversed(items):
+            if item in self.item_info:
+                self.status.set(self.item_info[item])
+                return
+
+    # --- Drawing ---
+
+    def schedule_redraw(self, delay_ms: int = 50):
+        if self.redraw_job:
+            self.root.after_cancel(self.redraw_job)
+        self.redraw_job = self.root.after(delay_ms, self.redraw)
+
+    def lod_level(self) -> LODLevel:
+        # Snap the cell size to powers of two so levels are reused between zoom steps
+        cell_m = 2.0
+        while cell_m * self.scale < LOD_CELL_PX:
+            cell_m *= 2
+        if cell_m not in self.lod_levels:
+            self.lod_levels[cell_m] = LODLevel(self.registry.procedural_features, cell_m)
+        return self.lod_levels[cell_m]
+
+    def redraw(self):
+        """Culls to the viewport and queues the visible items for batched drawing."""
+        self.redraw_job = None
+        if self.job:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.canvas.delete('all')
+        self.item_info.clear()
+
+        view = self.visible_box()
+        # Large landmarks first so small ones draw on top
+        landmarks = sorted(self.registry.intersecting(view, LANDMARKS),
+                           key=lambda lm: lm.dimensions.width * lm.dimensions.length, reverse=True)
+        pending = [('landmark', lm) for lm in landmarks]
+        if self.scale >= LOD_MIN_SCALE:
+            pending += [('feature', pf) for pf in self.registry.intersecting(view, FEATURES)]
+            mode = "detail"
+        else:
+            level = self.lod_level()
+            pending += [('cell', (level.index.items[i], level.index.boxes[i]))
+                        for i in level.index.query_indices(view)]
+            mode = f"LOD {level.cell_m:.0f}m"
+        self.pending = pending
+        self.drawn = 0
+        self.status.set(f"Scale {self.scale:.2f} px/m | {mode} | {len(pending)} visible items")
+        self.job = self.root.after_idle(self.draw_batch)
+
+    def draw_batch(self):
+        batch = self.pending[self.drawn:self.drawn + BATCH_SIZE]
+        for kind, obj in batch:
+            if kind == 'landmark':
+                self.draw_landmark(obj)
+            elif kind == 'feature':
+                self.draw_feature(obj)
+            else:
+                self.draw_cell(*obj)
+        self.drawn += len(batch)
+        if self.drawn < len(self.pending):
+            # Yield to the event loop before the next batch
+            self.job = self.root.after(1, self.draw_batch)
+        else:
+            self.job = None
+            self.canvas.tag_raise('label')
+
+    def draw_landmark(self, lm: Landmark):
+        min_x, min_y, max_x, max_y = lm.get_bounds()
+        x1, y1 = self.world_to_screen(min_x, max_y)
+        x2, y2 = self.world_to_screen(max_x, min_y)
+        if lm.category in LANDMARK_OUTLINES:
+            fill, outline, dash = LANDMARK_OUTLINES[lm.category]
+            item = self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill, outline=outline, dash=dash)
+        elif lm.shape in ('CIRCLE', 'OVAL'):
+            if lm.dimensions.diameter:
+                r = lm.dimensions.diameter / 2 * self.scale
+                cx, cy = self.world_to_screen(lm.abs_x, lm.abs_y)
+                x1, y1, x2, y2 = cx - r, cy - r, cx + r, cy + r
+            item = self.canvas.create_oval(x1, y1, x2, y2, fill=REGION_COLORS.get(lm.region, REGION_COLORS['Default']))
+        else:
+            item = self.canvas.create_rectangle(x1, y1, x2, y2, outline='black',
+                                                fill=REGION_COLORS.get(lm.region, REGION_COLORS['Default']))
+        self.item_info[item] = f"{lm.name} ({lm.id}) - {lm.description}"
+
+        # Label only what is big enough on screen to read
+        if abs(x2 - x1) > len(lm.name) * 6 and lm.category != LandmarkCategory.ZONE:
+            cx, cy = self.world_to_screen(lm.abs_x, lm.abs_y)
+            self.canvas.create_text(cx, cy, text=lm.name, font=('Arial', 9), tags=('label',))
+
+    def draw_feature(self, pf: ProceduralFeature):
+        fill, outline = feature_color(pf)
+        if not fill:
+            return
+        outer = feature_points(pf)
+        holes = pf.geometry.get('holes', ())
+        if not holes:
+            coords = []
+            for (x, y) in outer:
+                coords.extend(self.world_to_screen(x, y))
+            item = self.canvas.create_polygon(coords, fill=fill, outline=outline)
+            self.item_info[item] = f"{pf.id} - {pf.description}"
+            return
+
+        # Tk polygons have no holes: bridge each hole to the outline ("keyhole") so the
+        # even-odd fill leaves it empty, and stroke the rings separately.
+        ring = list(outer) + [outer[0]]
+        for hole in holes:
+            ring += [tuple(p) for p in hole] + [tuple(hole[0]), outer[0]]
+        coords = []
+        for (x, y) in ring:
+            coords.extend(self.world_to_screen(x, y))
+        item = self.canvas.create_polygon(coords, fill=fill, outline='')
+        self.item_info[item] = f"{pf.id} - {pf.description}"
+        if outline:
+            for r in [outer] + list(holes):
+                coords = []
+                for (x, y) in list(r) + [r[0]]:
+                    coords.extend(self.world_to_screen(x, y))
+                self.canvas.create_line(coords, fill=outline)
+
+    def draw_cell(self, density: float, box: BBox):
+        x1, y1 = self.world_to_screen(box[0], box[3])
+        x2, y2 = self.world_to_screen(box[2], box[1])
+        # Light brown (sparse) to dark brown (fully built)
+        shade = int(200 - 110 * density)
+        color = f'#{shade + 30:02x}{shade:02x}{max(0, shade - 25):02x}'
+        self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline='')
 
 def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     data_path = os.path.join(base_dir, '..', 'data', 'landmarks.yaml')
-    
-    registry = LandmarkRegistry(data_path)
-    
+    procedural_path = os.path.join(base_dir, '..', 'data', 'procedural.yaml')
+
+    registry = LandmarkRegistry(data_path, procedural_path)
+
     root = tk.Tk()
     app = LandmarkViewerApp(root, registry)
     root.mainloop()
@@ -0,0 +1,95 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# Import the package and the scripts the way the scripts do
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(os.path.join(ROOT, 'src', 'scripts'))
+
+GOLDEN_DIR = os.path.join(ROOT, 'tests', 'golden')
+FAILURES_DIR = os.path.join(ROOT, 'outputs', 'golden')  # Renders and diffs of failed comparisons
+LANDMARKS_PATH = os.path.join(ROOT, 'src', 'data', 'landmarks.yaml')
+
+def pytest_addoption(parser):
+    parser.addoption("--update-golden", action="store_true",
+                     help="Write the current renders to tests/golden/ instead of comparing with them; "
+                          "look at the new images and commit them with the change")
+
+@pytest.fixture(scope="session")
+def registry():
+    """Landmarks only: the golden renders never read procedural.yaml, so regenerating it does not break them."""
+    from mohenjo.registry import LandmarkRegistry
+    return LandmarkRegistry(LANDMARKS_PATH)
+
+@pytest.fixture(scope="session")
+def features(registry):
+    """Generated features per print (generators are seeded), as build_city.py makes them."""
+    from generate import generate_citadel_bastions, generate_citadel_interior
+    from mohenjo.areas import DKArea, VSArea
+    from mohenjo.consolidate import consolidate_features
+    return {
+        "citadel": consolidate_features(generate_citadel_bastions(registry) + generate_citadel_interior(registry)),
+        "vs": VSArea().generate(registry)[0],
+        "dk": DKArea().generate(registry)[0],
+    }
+
+@pytest.fixture(scope="session")
+def city(features):
+    """A second registry holding every generated feature, as procedural.yaml would after a full build."""
+    from mohenjo.registry import LandmarkRegistry
+    city = LandmarkRegistry(LANDMARKS_PATH)
+    city.procedural_features = features["citadel"] + features["vs"] + features["dk"]
+    return city
+
+class Golden:
+    def __init__(self, update: bool):
+        self.update = update
+
+    @staticmethod
+    def require(path: str):
+        if not os.path.exists(path):
+            pytest.fail(f"Missing golden {path}; run pytest with --update-golden to write it")
+
+    def check_image(self, name: str, image, writes: bool = True):
+        """Compares with tests/golden/<name>.png; writes it instead with --update-golden (unless `writes` is off)."""
+        from PIL import Image
+        from mohenjo.golden import GOLDEN_TOLERANCE, compare_images, diff_image
+        path = os.path.join(GOLDEN_DIR, f"{name}.png")
+        if writes and self.update:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            image.save(path, optimize=True)
+            pytest.skip(f"Wrote golden image {path}")
+        self.require(path)
+        expected = Image.open(path)
+        diff = compare_images(expected, image)
+        if not diff.ok:
+            os.makedirs(FAILURES_DIR, exist_ok=True)
+            image.save(os.path.join(FAILURES_DIR, f"{name}.png"))
+            if diff.max_diff >= 0:
+                diff_image(expected, image, GOLDEN_TOLERANCE).save(os.path.join(FAILURES_DIR, f"{name}_diff.png"))
+            pytest.fail(f"{name} differs from its golden image: {diff} (render and diff in {FAILURES_DIR})")
+
+    def check_svg(self, name: str, text: str):
+        """Compares with tests/golden/<name>.svg.gz element by element, or writes it with --update-golden."""
+        from mohenjo.golden import compare_svg
+        path = os.path.join(GOLDEN_DIR, f"{name}.svg.gz")  # Gzipped: the full map is 1 MB of text
+        if self.update:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with open(path, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+                gz.write(text.encode())  # No timestamp, so an unchanged map rewrites the same bytes
+            pytest.skip(f"Wrote golden SVG {path}")
+        self.require(path)
+        with gzip.open(path, 'rt') as f:
+            problems = compare_svg(f.read(), text)
+        if problems:
+            os.makedirs(FAILURES_DIR, exist_ok=True)
+            with open(os.path.join(FAILURES_DIR, f"{name}.svg"), 'w') as f:
+                f.write(text)
+            pytest.fail(f"{name} differs from its golden SVG:\n  " + "\n  ".join(problems))
+
+@pytest.fixture
+def golden(request):
+    return Golden(request.config.getoption("--update-golden"))
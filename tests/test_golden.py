@@ -0,0 +1,86 @@
+import dataclasses
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from PIL import Image, ImageDraw
+
+from mohenjo.areas import DKArea, VSArea
+from mohenjo.golden import compare_images, compare_svg
+
+# A 16th of the print's pixels: the narrowest lanes are still a couple of pixels wide
+GOLDEN_DPI = 150
+TERRAIN_SEED = 42
+AREA_CLASSES = {"vs": VSArea, "dk": DKArea}
+
+def render_area(key, registry, features, spans=False, terrain_seed=None):
+    area = AREA_CLASSES[key]()
+    if terrain_seed is not None:
+        from mohenjo.terrain import Terrain
+        area.terrain = Terrain.from_registry(registry, seed=terrain_seed)
+    canvas = area.canvas(registry, dpi=GOLDEN_DPI)
+    if spans:
+        return area.rasterize_spans(registry, features[key], canvas).to_image()
+    return area.rasterize(registry, features[key], canvas)
+
+@pytest.mark.parametrize("key", sorted(AREA_CLASSES))
+def test_area_print(key, registry, features, golden):
+    golden.check_image(f"{key}_area_print", render_area(key, registry, features))
+
+@pytest.mark.parametrize("key", sorted(AREA_CLASSES))
+def test_area_print_spans(key, registry, features, golden):
+    # The span rasterizer must reproduce the dense golden
+    golden.check_image(f"{key}_area_print", render_area(key, registry, features, spans=True), writes=False)
+
+def test_area_print_terrain(registry, features, golden):
+    golden.check_image("vs_area_print_terrain", render_area("vs", registry, features, terrain_seed=TERRAIN_SEED))
+
+def test_hr_print(registry, golden, tmp_path):
+    from generate_hr_area_print import generate_hr_area_print
+    golden.check_image("hr_area_print", generate_hr_area_print(dpi=GOLDEN_DPI, registry=registry,
+                                                               output_dir=str(tmp_path)))
+
+def test_citadel_print(city, golden, tmp_path):
+    from generate_citadel_print import generate_citadel_print
+    golden.check_image("citadel_print", generate_citadel_print(dpi=GOLDEN_DPI, registry=city,
+                                                               output_path=str(tmp_path / "citadel_print.png")))
+
+def test_landmark_map(city, golden, tmp_path):
+    from render_map import LandmarkRenderer
+    path = str(tmp_path / "landmark_map.svg")
+    LandmarkRenderer(city).render(path)
+    with open(path) as f:
+        golden.check_svg("landmark_map", f.read())
+
+# --- The comparison itself ---
+
+def test_moved_house_is_caught(registry, features):
+    moved = list(features["vs"])
+    g = moved[10].geometry
+    moved[10] = dataclasses.replace(moved[10], geometry=dict(g, points=[(x + 1.0, y) for x, y in g['points']]))
+    expected = render_area("vs", registry, features)
+    assert not compare_images(expected, render_area("vs", registry, {"vs": moved})).ok
+
+def test_image_diff_tolerates_edge_pixels_only():
+    image = Image.new('L', (200, 200), 50)
+    ImageDraw.Draw(image).rectangle((40, 40, 120, 150), fill=255)
+    assert compare_images(image, image.copy()).ok
+
+    edge = image.copy()
+    edge.putpixel((120, 90), 50)  # One edge pixel flipped
+    assert compare_images(image, edge).ok
+
+    moved = Image.new('L', (200, 200), 50)
+    ImageDraw.Draw(moved).rectangle((44, 40, 124, 150), fill=255)  # The building shifted 4 px
+    diff = compare_images(image, moved)
+    assert not diff.ok and diff.box == (40, 40, 125, 151)
+
+    assert not compare_images(image, image.resize((100, 100))).ok
+
+def test_svg_diff():
+    svg = '<svg xmlns="http://www.w3.org/2000/svg"><rect x="1.5" y="2" fill="red" /></svg>'
+    assert compare_svg(svg, svg.replace('1.5', '1.5000000001')) == []
+    assert compare_svg(svg, svg.replace('1.5', '1.6')) == ["element 1 <rect> x: '1.5' -> '1.6'"]
+    assert compare_svg(svg, svg.replace('red', 'blue'))
+    assert compare_svg(svg, svg.replace('<rect', '<circle'))